@@ -0,0 +1,163 @@
+# batch.py
+
+import numpy as np
+from recipe import PizzaRecipe
+from recipe_spec import FermentationStage, RecipeSpec, RecipeResult, parse_stages
+
+RECIPE_COLUMNS = ("salt", "oil", "hydration", "ball_weight", "num_balls", "yeast_type",
+                  "fridge_temp", "fridge_fermentation", "room_temp", "room_fermentation")
+
+
+def _has_column(params, name):
+    try:
+        return params[name] is not None
+    except (KeyError, ValueError):
+        return False
+
+
+def _column(params, name, default, n):
+    if not _has_column(params, name):
+        return np.full(n, default, dtype=object if isinstance(default, str) else np.float64)
+    return np.asarray(params[name], dtype=str if isinstance(default, str) else np.float64)
+
+
+def default_inputs(snapshot=None):
+    """Scalar value used for each of RECIPE_COLUMNS when it is not given, as PizzaRecipe() does."""
+    snapshot = PizzaRecipe.current_snapshot() if snapshot is None else snapshot
+    table = snapshot.yeast_table
+    defaults = snapshot.recipe_defaults
+    xlsx = snapshot.xlsx_defaults
+    room_temp = table.temperature_options[xlsx['room_temperature_row']]
+    fridge_temp = table.temperature_options[xlsx['fridge_temperature_row']]
+    return {
+        "salt": defaults['salt_percentage'],
+        "oil": defaults['oil_percentage'],
+        "hydration": defaults['hydration'],
+        "ball_weight": defaults['ball_weight'],
+        "num_balls": defaults['num_balls'],
+        "yeast_type": defaults['yeast_types'][1],
+        "fridge_temp": fridge_temp,
+        "fridge_fermentation": table.hour_range(fridge_temp)[xlsx['fridge_time_default']],
+        "room_temp": room_temp,
+        "room_fermentation": table.hour_range(room_temp)[xlsx['room_time_default']],
+        "pre_stages": (),
+    }
+
+
+def _pre_stage_columns(table, stages):
+    """(rows, hours, active) arrays per stage position, latest stage first, for YeastTable.yeast_percentages."""
+    depth = max(map(len, stages), default=0)
+    columns = []
+    for position in range(1, depth + 1):  # position 1 is the stage just before the cold proof
+        active = np.array([len(row) >= position for row in stages])
+        picked = [row[-position] if len(row) >= position else None for row in stages]
+        rows = table.nearest_rows([stage.temp if stage else table.temperature_options[0] for stage in picked])
+        hours = table.snap_hours_many(rows, [stage.hours if stage else 0.0 for stage in picked])
+        columns.append((rows, hours, active))
+    return columns
+
+
+def compute_recipes(params):
+    """Compute many recipes at once from columnar inputs.
+
+    params maps names from RECIPE_COLUMNS to equal-length sequences (a dict of lists/arrays or a
+    NumPy structured array); missing columns take the same defaults as PizzaRecipe(). An optional
+    "pre_stages" column holds each row's stages before the cold proof (anything parse_stages accepts,
+    rows may have different numbers of stages). Temperatures
+    are snapped to the nearest table option, as the UI does, and hours to the nearest selectable value
+    for their temperature; a temperature outside the range of options raises ValueError, as in
+    RecipeResultCache. Each row matches a PizzaRecipe built from the same values whose temperatures
+    were then set, i.e. the state after PizzaRecipe.recalculate_yeast().
+
+    Returns a dict of NumPy arrays: flour, water, salt_weight and oil_weight (rounded like the
+    PizzaRecipe properties), yeast_percentage, yeast_weight and the snapped temperatures and hours,
+    plus "pre_stages", a list of FermentationStage tuples with snapped temperatures and hours.
+    """
+    snapshot = PizzaRecipe.current_snapshot()  # One table for the whole call, even during a reload
+    defaults = default_inputs(snapshot)
+    table = snapshot.yeast_table
+    xlsx = snapshot.xlsx_defaults
+
+    lengths = {len(params[name]) for name in RECIPE_COLUMNS if _has_column(params, name)}
+    if len(lengths) > 1:
+        raise ValueError(f"All recipe columns must have the same length, got {sorted(lengths)}.")
+    n = lengths.pop() if lengths else 0
+    stages = [()] * n
+    if _has_column(params, "pre_stages"):
+        stages = [parse_stages(value) for value in params["pre_stages"]]
+        if len(stages) != n and (lengths or n):
+            raise ValueError(f"pre_stages has {len(stages)} rows, the other recipe columns have {n}.")
+        n = len(stages)
+
+    salt, oil, hydration, ball_weight, num_balls, yeast_type, fridge_temp, fridge_fer, room_temp, room_fer = (
+        _column(params, name, defaults[name], n) for name in RECIPE_COLUMNS)
+
+    table.check_temperatures(fridge_temp)
+    table.check_temperatures(room_temp)
+    table.check_temperatures([stage.temp for row in stages for stage in row])
+
+    # Mass balance, with the same operation order as PizzaRecipe.recalculate
+    total = num_balls * ball_weight
+    flour = total / (1 + (hydration + oil + salt) / 100)
+    salt_weight = (flour * salt) / 100
+    oil_weight = (flour * oil) / 100
+    water = total - flour - salt_weight - np.floor(oil_weight)  # PizzaRecipe subtracts the rounded oil weight
+
+    # Staged yeast lookup, as PizzaRecipe.recalculate_yeast
+    fridge_rows = table.nearest_rows(fridge_temp)
+    room_rows = table.nearest_rows(room_temp)
+    fridge_fer = table.snap_hours_many(fridge_rows, fridge_fer)
+    room_fer = table.snap_hours_many(room_rows, room_fer)
+    pre_columns = _pre_stage_columns(table, stages)
+    yeast_percentage = table.yeast_percentages(table.yeast_type_indexes(yeast_type),
+                                               room_rows, room_fer, fridge_rows, fridge_fer, pre_columns)
+    yeast_weight = (flour * yeast_percentage) / 100
+
+    return {
+        "flour": np.ceil(flour).astype(np.int64),
+        "water": np.ceil(water).astype(np.int64),
+        "salt_weight": np.floor(salt_weight).astype(np.int64),
+        "oil_weight": np.floor(oil_weight).astype(np.int64),
+        "yeast_percentage": yeast_percentage,
+        "yeast_weight": yeast_weight,
+        "fridge_temp": table.data[fridge_rows, xlsx['temp_row_range_offset']],
+        "fridge_fermentation": fridge_fer,
+        "room_temp": table.data[room_rows, xlsx['temp_row_range_offset']],
+        "room_fermentation": room_fer,
+        "pre_stages": _snapped_stages(table, stages, pre_columns, xlsx['temp_row_range_offset']),
+    }
+
+
+def _snapped_stages(table, stages, pre_columns, temp_column):
+    if not pre_columns:
+        return [()] * len(stages)
+    temps = [table.data[rows, temp_column].tolist() for rows, _, _ in pre_columns]
+    hours = [values.tolist() for _, values, _ in pre_columns]
+    return [tuple(FermentationStage(stage.name, temps[len(row) - 1 - i][index], hours[len(row) - 1 - i][index])
+                  for i, stage in enumerate(row))
+            for index, row in enumerate(stages)]
+
+
+def compute_specs(specs):
+    """compute_recipes for a sequence of RecipeSpec; returns a list of RecipeResult in the same order.
+
+    The spec of each result holds the snapped temperatures and hours that were actually used.
+    """
+    specs = list(specs)
+    params = {name: [getattr(spec, name) for spec in specs] for name in RECIPE_COLUMNS}
+    if any(spec.pre_stages for spec in specs):
+        params["pre_stages"] = [spec.pre_stages for spec in specs]
+    results = compute_recipes(params)
+    columns = {name: values if name == "pre_stages" else values.tolist() for name, values in results.items()}
+    return [
+        RecipeResult(
+            RecipeSpec(spec.salt, spec.oil, spec.hydration, spec.ball_weight, spec.num_balls, spec.yeast_type,
+                       fridge_temp, fridge_fer, room_temp, room_fer, pre_stages),
+            flour, water, salt_weight, oil_weight, yeast_percentage, yeast_weight)
+        for spec, flour, water, salt_weight, oil_weight, yeast_percentage, yeast_weight,
+        fridge_temp, fridge_fer, room_temp, room_fer, pre_stages in zip(
+            specs, columns['flour'], columns['water'], columns['salt_weight'], columns['oil_weight'],
+            columns['yeast_percentage'], columns['yeast_weight'], columns['fridge_temp'],
+            columns['fridge_fermentation'], columns['room_temp'], columns['room_fermentation'],
+            columns['pre_stages'])
+    ]
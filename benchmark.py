@@ -0,0 +1,281 @@
+# benchmark.py
+#
+# Reproducible, display-free benchmarks for the recipe engine:
+#   python benchmark.py                      # run, print and append to bench_history.json
+#   python benchmark.py --save-baseline      # also store this run as bench_baseline.json
+#   python benchmark.py --compare            # exit 1 if a benchmark regressed against the baseline
+#   python benchmark.py --check-imports      # exit 1 if a headless import is slow or pulls in pandas/Tk
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent
+DEFAULT_HISTORY = PROJECT_DIR / "bench_history.json"
+DEFAULT_BASELINE = PROJECT_DIR / "bench_baseline.json"
+
+# Modules that must import without a display or the xlsx stack, and what they may not pull in
+HEADLESS_MODULES = ("recipe", "batch", "result_cache", "manager", "cli", "server", "planner")
+FORBIDDEN_IMPORTS = ("pandas", "openpyxl", "tkinter")
+IMPORT_BUDGET_MS = 400
+
+
+def measure(func, repeat=7, min_time=0.05, setup=None):
+    """Median and best seconds per call, auto-ranging the loop count so one repeat takes at least min_time."""
+    if setup is not None:
+        setup()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return {"median": statistics.median(timings), "best": min(timings), "loops": number, "repeat": repeat}
+
+
+def measure_subprocess(code, repeat=5):
+    """Wall time of a fresh interpreter running code, for cold-start numbers."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return {"median": statistics.median(timings), "best": min(timings), "loops": 1, "repeat": repeat}
+
+
+def import_profile(module):
+    """Cumulative import time of module in ms (python -X importtime, fresh interpreter), the forbidden modules
+    it loaded, and the number of root logging handlers it installed."""
+    code = (f"import json, logging, sys, {module}; "
+            f"print(json.dumps([[name for name in {FORBIDDEN_IMPORTS!r} if name in sys.modules], "
+            f"len(logging.root.handlers)]))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_DIR,
+                            capture_output=True, text=True, check=True)
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative_us = int(fields[1])
+    forbidden, handlers = json.loads(result.stdout.splitlines()[-1])
+    return cumulative_us / 1000, forbidden, handlers
+
+
+def check_imports(budget_ms=IMPORT_BUDGET_MS):
+    """Print the import cost of each headless module; returns the names that broke the budget or a rule."""
+    failures = []
+    for module in HEADLESS_MODULES:
+        ms, forbidden, handlers = import_profile(module)
+        problems = [f"imports {name}" for name in forbidden]
+        if handlers:
+            problems.append("configures logging")
+        if ms > budget_ms:
+            problems.append(f"over the {budget_ms} ms budget")
+        print(f"import {module:<39} {ms:>9.1f} ms  {', '.join(problems)}")
+        if problems:
+            failures.append(module)
+    return failures
+
+
+def collect_benchmarks():
+    from config import Configuration
+    from recipe import PizzaRecipe, MASS_BALANCE_FIELDS
+    from manager import RecipeManager
+    from recipe_store import RecipeStore
+    from yeast_cache import YeastTableCache
+    from yeast_lookup import YeastLookup
+    from recipe_spec import RecipeSpec
+    from result_cache import RecipeResultCache
+    from planner import FermentationPlanner
+
+    PizzaRecipe.initialize()
+    temps = PizzaRecipe.get_temp_range()
+    recipe = PizzaRecipe()
+    alternate_temps = [temps[10], temps[30]]
+    setter_values = {name: [getattr(recipe, name), getattr(recipe, name) + 1] for name in MASS_BALANCE_FIELDS}
+    setter_values['yeast_type'] = PizzaRecipe.get_yeast_types()[:2]
+    setter_values['room_temp'] = alternate_temps
+    setter_values['fridge_temp'] = alternate_temps
+    setter_values['room_fermentation'] = [4, 8]
+    setter_values['fridge_fermentation'] = [24, 48]
+
+    benchmarks = {
+        "startup.import_and_construct": lambda: measure_subprocess(
+            "from recipe import PizzaRecipe; PizzaRecipe().to_string()"),
+        "config.get_yeast_table_data": lambda: measure(Configuration.get_yeast_table_data),
+        "config.parse_xlsx": lambda: measure(
+            lambda: YeastTableCache.parse_xlsx(Configuration.get_yeast_table_path()), repeat=3),
+        "recipe.initialize": lambda: measure(PizzaRecipe.initialize),
+        "recipe.construct": lambda: measure(PizzaRecipe),
+        "recipe.construct_and_read": lambda: measure(lambda: PizzaRecipe().to_string()),
+        "recipe.get_hour_range_by_temp.all_temps": lambda: measure(
+            lambda: [PizzaRecipe.get_hour_range_by_temp(temp) for temp in temps]),
+    }
+
+    for name, values in setter_values.items():
+        def set_and_read(name=name, values=values, state={"i": 0}):
+            state["i"] ^= 1
+            setattr(recipe, name, values[state["i"]])
+            recipe.to_string()
+        benchmarks[f"recipe.setter.{name}"] = lambda func=set_and_read: measure(func)
+
+    def store_round_trip():
+        with tempfile.TemporaryDirectory() as folder:
+            RecipeStore._default = store = RecipeStore(Path(folder) / "bench.db")
+            try:
+                result = measure(lambda: RecipeManager.load_recipe_by_id(RecipeManager.save_recipe(recipe)).to_string())
+            finally:
+                store.close()
+                RecipeStore._default = None
+        return result
+
+    benchmarks["manager.save_load_round_trip"] = store_round_trip
+
+    cache = RecipeResultCache(maxsize=16)
+    spec = RecipeSpec.from_recipe(PizzaRecipe())
+    benchmarks["result_cache.hit"] = lambda: measure(lambda: cache.get(spec).to_string())
+
+    def shared_table_attach():
+        from multiprocessing import shared_memory
+        from shared_table import write_segment, read_segment
+        segment = write_segment(PizzaRecipe.current_snapshot())
+        attached = shared_memory.SharedMemory(name=segment.name)
+        try:
+            return measure(lambda: read_segment(attached))  # What a pool worker does instead of initialize()
+        finally:
+            attached.close()
+            segment.unlink()
+
+    benchmarks["shared_table.attach"] = shared_table_attach
+
+    lookup_recipe = PizzaRecipe()
+    lookup_recipe.snap_fermentation_hours()
+    table = PizzaRecipe.current_snapshot().yeast_table
+    benchmarks["recipe.yeast_percentage.live"] = lambda: measure(
+        lambda: lookup_recipe.calculate_yeast_percentage_dual(table))
+    lookup = YeastLookup.load(Configuration.get_yeast_lookup_path(), table)
+    if lookup is not None:  # Only once yeast_lookup.py build has been run
+        benchmarks["recipe.yeast_percentage.lookup"] = lambda: measure(
+            lambda: lookup_recipe.calculate_yeast_percentage_dual(table, lookup))
+
+    planner = FermentationPlanner()
+    planner_now = datetime(2026, 1, 1, 9, 0)
+    benchmarks["planner.plan"] = lambda: measure(
+        lambda: planner.plan(planner_now + timedelta(hours=30), 4, 22, now=planner_now), setup=planner._ensure_index)
+    return benchmarks
+
+
+def run(selected=None):
+    results = {}
+    for name, bench in collect_benchmarks().items():
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+        results[name] = bench()
+        print(f"{name:<45} {results[name]['median'] * 1e6:>12.1f} us  (best {results[name]['best'] * 1e6:.1f} us)")
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_json(path, default):
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return default
+
+
+def compare(results, baseline, threshold):
+    """Names of benchmarks whose best time is more than threshold (a fraction) slower than the baseline.
+
+    The best of the repeats is compared rather than the median, as it is far less sensitive to machine noise.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        change = result["best"] / reference["best"] - 1
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:<45} {change:>+8.1%}  {flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pizza recipe engine.")
+    parser.add_argument('-k', dest='selected', action='append', help="only run benchmarks whose name contains this")
+    parser.add_argument('--history', default=str(DEFAULT_HISTORY), help="JSON file that runs are appended to")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--compare', action='store_true', help="compare against the baseline, exit 1 on regression")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument('--check-imports', action='store_true',
+                        help="only check the import cost of the headless modules, exit 1 on a failure")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_MS, help="ms allowed per import")
+    args = parser.parse_args(argv)
+
+    if args.check_imports:
+        failures = check_imports(args.import_budget)
+        if failures:
+            print(f"{len(failures)} module(s) failed the import check: {', '.join(failures)}")
+            return 1
+        return 0
+
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": run(args.selected),
+    }
+
+    history = load_json(args.history, [])
+    history.append(entry)
+    with open(args.history, 'w') as file:
+        json.dump(history, file, indent=4)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(entry, file, indent=4)
+
+    if args.compare:
+        baseline = load_json(args.baseline, None)
+        if baseline is None:
+            print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+            return 1
+        regressions = compare(entry["results"], baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+# cli.py
+#
+# Headless bulk recipe calculation:
+#   python -m cli orders.csv -o recipes.csv
+#   python -m cli orders.jsonl --workers 8 --chunk-size 5000 > recipes.jsonl
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from batch import compute_specs, default_inputs
+from config import configure_logging
+from hot_reload import start_hot_reload
+from profiling import Profiler, cprofile_to
+from recipe_spec import RecipeSpec, as_number
+from shared_table import worker_pool_setup
+
+# The fields of PizzaRecipe.to_string, in the same order
+OUTPUT_COLUMNS = ("flour", "water", "salt", "oil", "yeast", "yeast_type", "cold_proof_hours", "cold_proof_temp",
+                  "room_proof_hours", "room_proof_temp", "num_balls", "ball_weight", "error")
+
+
+def read_rows(file, fmt):
+    if fmt == 'csv':
+        yield from csv.DictReader(file)
+    else:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def parse_row(row, defaults):
+    """RecipeSpec from a raw input row, or the error message if it is malformed."""
+    try:
+        return RecipeSpec.from_dict(row, defaults)
+    except (ValueError, TypeError) as e:
+        return str(e)
+
+
+def format_result(result):
+    """Output row for a RecipeResult, or for the error message of a failed row."""
+    if isinstance(result, str):
+        return {**{name: "" for name in OUTPUT_COLUMNS}, "error": result}
+    spec = result.spec
+    return {
+        "flour": result.flour,
+        "water": result.water,
+        "salt": result.salt_weight,
+        "oil": result.oil_weight,
+        "yeast": round(result.yeast_weight, 3),
+        "yeast_type": spec.yeast_type,
+        "cold_proof_hours": round(spec.fridge_fermentation),
+        "cold_proof_temp": round(spec.fridge_temp, 1),
+        "room_proof_hours": round(spec.room_fermentation),
+        "room_proof_temp": round(spec.room_temp, 1),
+        "num_balls": as_number(spec.num_balls),
+        "ball_weight": as_number(spec.ball_weight),
+        "error": "",
+    }
+
+
+def process_chunk(rows):
+    """Worker entry point: compute a chunk of raw input rows, in order.
+
+    Returns a RecipeResult per row, or the error message for a row that could not be computed; these
+    small immutable values are what is pickled back to the parent process.
+    """
+    defaults = default_inputs()
+    specs = [parse_row(row, defaults) for row in rows]
+    if not any(isinstance(spec, str) for spec in specs):
+        try:
+            return compute_specs(specs)
+        except (ValueError, TypeError, IndexError):
+            pass
+
+    # Some row is invalid: fall back to one row at a time so only that row is reported
+    output = []
+    for spec in specs:
+        if isinstance(spec, str):
+            output.append(spec)
+            continue
+        try:
+            output.append(compute_specs([spec])[0])
+        except (ValueError, TypeError, IndexError) as e:
+            output.append(str(e))
+    return output
+
+
+def process_stream(rows, workers, chunk_size, max_pending):
+    """Yield results in input order; at most max_pending chunks are held in memory at once."""
+    chunks = chunked(rows, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from process_chunk(chunk)
+        return
+
+    # Workers attach to this process's table in shared memory and follow its reloads (or, with
+    # shared_worker_table off, load and watch the files themselves), so a long run picks up edits without a restart
+    initializer, initargs = worker_pool_setup()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(process_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_rows(file, fmt, results):
+    if fmt == 'csv':
+        writer = csv.DictWriter(file, fieldnames=OUTPUT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(format_result(result) for result in results)
+    else:
+        for result in results:
+            file.write(json.dumps(format_result(result)) + "\n")
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    if path is not None and Path(path).suffix.lower() in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    return 'csv'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Calculate pizza recipes from an order file.")
+    parser.add_argument('input', help="CSV or JSONL order file, '-' for stdin")
+    parser.add_argument('-o', '--output', help="output file (default: stdout)")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="input/output format (default: by extension)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=2000, help="rows per worker task")
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help="write call counters and timers to PATH (covers this process; use --workers 1)")
+    parser.add_argument('--cprofile', metavar='PATH', help="write cProfile stats of this process to PATH")
+    args = parser.parse_args(argv)
+
+    if args.profile_json:
+        Profiler.enable()
+    else:
+        Profiler.enable_if_requested()
+
+    workers = args.workers if args.workers is not None else (os.cpu_count() or 1)
+    if workers <= 1:
+        start_hot_reload()
+    in_path = None if args.input == '-' else args.input
+    fmt = detect_format(in_path, args.format)
+
+    in_file = sys.stdin if in_path is None else open(in_path, 'r', newline='')
+    out_file = sys.stdout if args.output is None else open(args.output, 'w', newline='')
+    try:
+        results = process_stream(read_rows(in_file, fmt), workers, args.chunk_size, max_pending=2 * workers)
+        if args.cprofile:
+            with cprofile_to(args.cprofile):
+                write_rows(out_file, fmt, results)
+        else:
+            write_rows(out_file, fmt, results)
+    finally:
+        if in_file is not sys.stdin:
+            in_file.close()
+        if out_file is not sys.stdout:
+            out_file.close()
+
+    if args.profile_json:
+        Profiler.dump_json(args.profile_json)
+
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
@@ -3,20 +3,36 @@
 import json
 from pathlib import Path
 import logging
-import pandas as pd
+from yeast_cache import YeastTableCache
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 
 # Default paths will be relative to the project root directory
 DEFAULT_PATHS = {
     "json_recipes_path": "data/saved_pizza_recipes.json",  # Relative path to save pizza recipes
+    "recipe_store_path": "data/saved_pizza_recipes.db",  # Relative path to the indexed recipe store
+    "batch_store_path": "data/dough_batches.db",  # Relative path to the dough batches being proofed
     "xlsx_yeast_table_path": "data/yeast.xlsx",  # Relative path to yeast table
+    "yeast_cache_path": "data/yeast_cache.npy",  # Relative path to compiled yeast table cache
+    "yeast_lookup_path": "data/yeast_lookup.npy",  # Relative path to the precomputed yeast lookup (yeast_lookup.py)
     "save_icon": "icons/diskette.png",  # Relative path to save icon
     "load_icon": "icons/folder.png"  # Relative path to load icon
 }
 
 JSON_CONFIG_FILE_NAME_DEFAULT = "config.json"
 
+DEFAULT_RESULT_CACHE_SIZE = 256  # Recipe results kept by the LRU result cache
+DEFAULT_HOT_RELOAD_INTERVAL = 2.0  # Seconds between checks of config.json and the yeast sheet; 0 disables
+DEFAULT_BATCH_GRACE_MINUTES = 15  # A dough batch is overdue this long after its stage was due
+
+# Stages run before the cold proof, offered as schedules in the UI; temperatures snap to the nearest table option
+DEFAULT_STAGE_PRESETS = {
+    "Cold + room": [],
+    "Bulk + cold + room": [{"name": "Bulk", "temp": 24, "hours": 2}],
+    "Bulk + cold + cold + room": [{"name": "Bulk", "temp": 24, "hours": 1},
+                                  {"name": "Fridge Bulk", "temp": 4, "hours": 24}],
+}
+
 DEFAULT_RECIPE = {
     "salt_percentage": 3,
     "oil_percentage": 1,
@@ -39,6 +55,15 @@ DEFAULT_XLSX = {
 }
 
 
+class YeastTableError(Exception):
+    """The yeast table could not be loaded; the message names the file and the cause."""
+
+
+def configure_logging(level=logging.INFO):
+    """Logging setup for the entry points; importing the engine leaves logging alone."""
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+
 class Configuration:
     _data = None
     _json_config_full_path = Path(__file__).parent / JSON_CONFIG_FILE_NAME_DEFAULT
@@ -60,6 +85,23 @@ class Configuration:
         cls.create_default_config()
         return {**DEFAULT_PATHS, **DEFAULT_RECIPE, **DEFAULT_XLSX}
 
+    @classmethod
+    def reload(cls):
+        """Re-read config.json. The new settings replace the old ones in a single assignment; if the file
+        cannot be read or parsed (e.g. it is being written), the current settings are kept."""
+        try:
+            with open(cls._json_config_full_path, 'r') as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Keeping the current configuration, reloading it failed: {e}")
+            return False
+        cls._data = data
+        return True
+
+    @classmethod
+    def config_path(cls):
+        return cls._json_config_full_path
+
     @classmethod
     def create_default_config(cls):
         default_data = {**DEFAULT_PATHS, **DEFAULT_RECIPE, **DEFAULT_XLSX}
@@ -74,38 +116,33 @@ class Configuration:
     def get_recipe_defaults():
         if Configuration._data is None:
             Configuration.initialize()
+        data = Configuration._data  # One read, in case a reload swaps it meanwhile
 
         return {
-            "salt_percentage": Configuration._data.get('salt_percentage', DEFAULT_RECIPE['salt_percentage']),
-            "oil_percentage": Configuration._data.get('oil_percentage', DEFAULT_RECIPE['oil_percentage']),
-            "yeast_types": Configuration._data.get('yeast_types', DEFAULT_RECIPE['yeast_types']),
-            "hydration": Configuration._data.get('hydration', DEFAULT_RECIPE['hydration']),
-            "ball_weight": Configuration._data.get('ball_weight', DEFAULT_RECIPE['ball_weight']),
-            "num_balls": Configuration._data.get('num_balls', DEFAULT_RECIPE['num_balls'])
+            "salt_percentage": data.get('salt_percentage', DEFAULT_RECIPE['salt_percentage']),
+            "oil_percentage": data.get('oil_percentage', DEFAULT_RECIPE['oil_percentage']),
+            "yeast_types": data.get('yeast_types', DEFAULT_RECIPE['yeast_types']),
+            "hydration": data.get('hydration', DEFAULT_RECIPE['hydration']),
+            "ball_weight": data.get('ball_weight', DEFAULT_RECIPE['ball_weight']),
+            "num_balls": data.get('num_balls', DEFAULT_RECIPE['num_balls'])
         }
 
     @staticmethod
     def get_yeast_table_params():
         if Configuration._data is None:
             Configuration.initialize()
+        data = Configuration._data  # One read, in case a reload swaps it meanwhile
 
         return {
-            "temp_row_range_l": Configuration._data.get('temp_row_range_l', DEFAULT_XLSX['temp_row_range_l']),
-            "temp_row_range_r": Configuration._data.get('temp_row_range_r', DEFAULT_XLSX['temp_row_range_r']),
-            "temp_row_range_offset": Configuration._data.get('temp_row_range_offset',
-                                                             DEFAULT_XLSX['temp_row_range_offset']),
-            "room_temperature_row": Configuration._data.get('room_temperature_row',
-                                                            DEFAULT_XLSX['room_temperature_row']),
-            "fridge_temperature_row": Configuration._data.get('fridge_temperature_row',
-                                                              DEFAULT_XLSX['fridge_temperature_row']),
-            "room_time_default": Configuration._data.get('room_time_default',
-                                                         DEFAULT_XLSX['room_time_default']),
-            "fridge_time_default": Configuration._data.get('fridge_time_default',
-                                                           DEFAULT_XLSX['fridge_time_default']),
-            "start_hour_index": Configuration._data.get('start_hour_index',
-                                                        DEFAULT_XLSX['start_hour_index']),
-            "end_hour_index": Configuration._data.get('end_hour_index',
-                                                      DEFAULT_XLSX['end_hour_index'])
+            "temp_row_range_l": data.get('temp_row_range_l', DEFAULT_XLSX['temp_row_range_l']),
+            "temp_row_range_r": data.get('temp_row_range_r', DEFAULT_XLSX['temp_row_range_r']),
+            "temp_row_range_offset": data.get('temp_row_range_offset', DEFAULT_XLSX['temp_row_range_offset']),
+            "room_temperature_row": data.get('room_temperature_row', DEFAULT_XLSX['room_temperature_row']),
+            "fridge_temperature_row": data.get('fridge_temperature_row', DEFAULT_XLSX['fridge_temperature_row']),
+            "room_time_default": data.get('room_time_default', DEFAULT_XLSX['room_time_default']),
+            "fridge_time_default": data.get('fridge_time_default', DEFAULT_XLSX['fridge_time_default']),
+            "start_hour_index": data.get('start_hour_index', DEFAULT_XLSX['start_hour_index']),
+            "end_hour_index": data.get('end_hour_index', DEFAULT_XLSX['end_hour_index'])
         }
 
     @staticmethod
@@ -120,6 +157,60 @@ class Configuration:
             Configuration.initialize()
         return Path(Configuration._data['json_recipes_path']).parent.resolve()
 
+    @staticmethod
+    def get_recipe_store_path():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return Path(Configuration._data.get('recipe_store_path', DEFAULT_PATHS['recipe_store_path'])).resolve()
+
+    @staticmethod
+    def get_batch_store_path():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return Path(Configuration._data.get('batch_store_path', DEFAULT_PATHS['batch_store_path'])).resolve()
+
+    @staticmethod
+    def get_batch_grace_minutes():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return float(Configuration._data.get('batch_grace_minutes', DEFAULT_BATCH_GRACE_MINUTES))
+
+    @staticmethod
+    def get_result_cache_size():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return int(Configuration._data.get('result_cache_size', DEFAULT_RESULT_CACHE_SIZE))
+
+    @staticmethod
+    def get_hot_reload_interval():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return float(Configuration._data.get('hot_reload_interval', DEFAULT_HOT_RELOAD_INTERVAL))
+
+    @staticmethod
+    def get_shared_worker_table():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return bool(Configuration._data.get('shared_worker_table', True))
+
+    @staticmethod
+    def get_yeast_lookup_enabled():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return bool(Configuration._data.get('yeast_lookup', False))
+
+    @staticmethod
+    def get_stage_presets():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return Configuration._data.get('stage_presets', DEFAULT_STAGE_PRESETS)
+
+    @staticmethod
+    def get_profiling_enabled():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return bool(Configuration._data.get('profiling', False))
+
     @staticmethod
     def get_save_icon_path():
         if Configuration._data is None:
@@ -133,11 +224,32 @@ class Configuration:
         return Path(Configuration._data['load_icon']).resolve()
 
     @staticmethod
-    def get_yeast_table_data():
+    def get_yeast_table_path():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return Path(Configuration._data['xlsx_yeast_table_path']).resolve()
+
+    @staticmethod
+    def get_yeast_cache_path():
         if Configuration._data is None:
             Configuration.initialize()
+        return Path(Configuration._data.get('yeast_cache_path', DEFAULT_PATHS['yeast_cache_path'])).resolve()
+
+    @staticmethod
+    def get_yeast_lookup_path():
+        if Configuration._data is None:
+            Configuration.initialize()
+        return Path(Configuration._data.get('yeast_lookup_path', DEFAULT_PATHS['yeast_lookup_path'])).resolve()
+
+    @staticmethod
+    def get_yeast_table_array():
+        path = Configuration.get_yeast_table_path()
         try:
-            yeast_data = pd.read_excel(Path(Configuration._data['xlsx_yeast_table_path']).resolve(), header=None)
-            return yeast_data
+            return YeastTableCache.load(path, Configuration.get_yeast_cache_path())
         except Exception as e:
-            print("Error loading yeast data:", e)
+            raise YeastTableError(f"Could not load the yeast table from {path}: {e}") from e
+
+    @staticmethod
+    def get_yeast_table_data():
+        import pandas as pd  # Only for callers that want a DataFrame; the engine works on the array
+        return pd.DataFrame(Configuration.get_yeast_table_array())
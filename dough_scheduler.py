@@ -0,0 +1,426 @@
+# dough_scheduler.py
+#
+# Dough batches moving through the proofing stages of their recipes, driven by one timer queue:
+#   python dough_scheduler.py start 12 --name "Friday dough"   # start saved recipe #12 now
+#   python dough_scheduler.py list
+#   python dough_scheduler.py advance 3                        # batch 3 moved on to its next stage
+#   python dough_scheduler.py watch                            # log stages as they fall due
+# A stage is due once its hours have passed since the dough entered it, and overdue after the grace period.
+# Moving the dough on starts the next stage's clock; moving it on after the room proof finishes the batch.
+# Several processes may share the store (e.g. `advance` while the UI or `watch` runs): each scheduler reloads
+# the rows another one changed, and a batch that moved on meanwhile cannot be moved on again from a stale copy.
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from pathlib import Path
+from recipe_spec import parse_stages
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    stages TEXT NOT NULL,
+    stage INTEGER NOT NULL,
+    stage_started_at TEXT NOT NULL,
+    recipe TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_batches_active ON batches (finished_at);
+"""
+REFRESH_SECONDS = 5  # How often an idle driver looks for batches changed by another process
+
+
+@dataclass(frozen=True, slots=True)
+class DoughBatch:
+    """A batch of dough in stages[stage] since stage_started_at; stage == len(stages) once it is finished.
+
+    recipe is RecipeManager's JSON dict of the recipe the batch was started from, if any.
+    """
+    id: int
+    name: str
+    stages: tuple
+    stage: int
+    stage_started_at: datetime
+    created_at: datetime
+    recipe: dict = None
+
+    @property
+    def finished(self):
+        return self.stage >= len(self.stages)
+
+    @property
+    def current(self):
+        return None if self.finished else self.stages[self.stage]
+
+    @property
+    def next_name(self):
+        return "Bake" if self.stage + 1 >= len(self.stages) else self.stages[self.stage + 1].name
+
+    @property
+    def due_at(self):
+        return None if self.finished else self.stage_started_at + timedelta(hours=self.current.hours)
+
+    def status(self, now, grace):
+        if self.finished:
+            return "finished"
+        if now >= self.due_at + grace:
+            return "overdue"
+        return "due" if now >= self.due_at else "proofing"
+
+
+class BatchStore:
+    """The batches in one SQLite file; finished batches are kept with their finish time."""
+    _default = None
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._writes = 0
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+
+    @classmethod
+    def default(cls):
+        """The store at the configured batch_store_path, opened once per process."""
+        if cls._default is None:
+            from config import Configuration
+            cls._default = cls(Configuration.get_batch_store_path())
+        return cls._default
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def version(self):
+        """Changes whenever any connection, this one included, commits to the store."""
+        with self._lock:
+            return self._connection.execute("PRAGMA data_version").fetchone()[0], self._writes
+
+    def add(self, name, stages, started_at, recipe=None):
+        with self._lock, self._connection:
+            self._writes += 1
+            cursor = self._connection.execute(
+                "INSERT INTO batches (name, created_at, stages, stage, stage_started_at, recipe) "
+                "VALUES (?, ?, ?, 0, ?, ?)",
+                (name, started_at.isoformat(), json.dumps([stage.to_dict() for stage in stages]),
+                 started_at.isoformat(), None if recipe is None else json.dumps(recipe)))
+            return cursor.lastrowid
+
+    def set_stage(self, batch, from_stage):
+        """Persist a batch's stage and stage start, if the stored batch is still active in from_stage.
+
+        A finished batch is marked with its finish time. Raises ValueError if the batch was moved on,
+        finished or removed meanwhile (e.g. by another process), leaving the stored row as it is.
+        """
+        with self._lock, self._connection:
+            self._writes += 1
+            cursor = self._connection.execute(
+                "UPDATE batches SET stage = ?, stage_started_at = ?, finished_at = ? "
+                "WHERE id = ? AND stage = ? AND finished_at IS NULL",
+                (batch.stage, batch.stage_started_at.isoformat(),
+                 batch.stage_started_at.isoformat() if batch.finished else None, batch.id, from_stage))
+            if cursor.rowcount == 0:
+                raise ValueError(f"Batch #{batch.id} was moved on or removed elsewhere; reload and try again.")
+
+    def remove(self, batch_id):
+        with self._lock, self._connection:
+            self._writes += 1
+            self._connection.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+
+    @staticmethod
+    def _batch(row):
+        return DoughBatch(row['id'], row['name'], parse_stages(row['stages']), row['stage'],
+                          datetime.fromisoformat(row['stage_started_at']), datetime.fromisoformat(row['created_at']),
+                          json.loads(row['recipe']) if row['recipe'] else None)
+
+    def get(self, batch_id):
+        """The batch with this id, finished or not, or None if there is none."""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+        return None if row is None else self._batch(row)
+
+    def active(self):
+        with self._lock:
+            rows = self._connection.execute("SELECT * FROM batches WHERE finished_at IS NULL ORDER BY id").fetchall()
+        return [self._batch(row) for row in rows]
+
+
+class DoughScheduler:
+    """The active batches and a single heap of their upcoming due and overdue events.
+
+    Each batch has two entries in the heap, for its current stage. An entry holds the batch object it was
+    scheduled for, and entries whose object is no longer the current one (the batch moved on or was removed)
+    are skipped when they reach the top, so changes never search the heap. A driver (watch() on asyncio,
+    or a Tk after() pump) sleeps until next_deadline() and then calls fire_due(); listeners registered with
+    add_listener are told about every event and change, which is also when a driver re-arms its one timer.
+    State lives in the BatchStore, so a restarted process picks up where it left off and immediately reports
+    whatever fell due while it was not running. refresh() picks up batches another process started, moved on
+    or removed; the drivers call it (through fire_due) at least every REFRESH_SECONDS.
+    """
+    _default = None
+
+    def __init__(self, store, grace_minutes=None):
+        if grace_minutes is None:
+            from config import Configuration
+            grace_minutes = Configuration.get_batch_grace_minutes()
+        self.store = store
+        self.grace = timedelta(minutes=grace_minutes)
+        self._lock = threading.RLock()
+        self._batches = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._listeners = []
+        self._store_version = store.version()
+        for batch in store.active():
+            self._batches[batch.id] = batch
+            self._schedule(batch)
+
+    @classmethod
+    def default(cls):
+        if cls._default is None:
+            cls._default = cls(BatchStore.default())
+        return cls._default
+
+    def add_listener(self, callback):
+        """callback(event, batch) for "started", "advanced", "finished", "removed", "due" and "overdue"."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, event, batch):
+        for callback in list(self._listeners):
+            try:
+                callback(event, batch)
+            except Exception as e:
+                logging.error(f"Batch listener failed: {e}")
+
+    def _schedule(self, batch):
+        if batch.finished:
+            return
+        for when, event in ((batch.due_at, "due"), (batch.due_at + self.grace, "overdue")):
+            heapq.heappush(self._heap, (when, next(self._sequence), event, batch))
+
+    def _is_current(self, entry):
+        batch = entry[3]
+        return self._batches.get(batch.id) is batch
+
+    # Batches
+
+    def refresh(self):
+        """Reload the batches if the store changed since the last look, and announce what another process did.
+
+        Batches that did not change keep their object, and with it their heap entries.
+        """
+        changes = []
+        with self._lock:
+            version = self.store.version()
+            if version == self._store_version:
+                return changes
+            self._store_version = version
+            stored = {batch.id: batch for batch in self.store.active()}
+            for batch_id, batch in list(self._batches.items()):
+                if batch_id not in stored:
+                    del self._batches[batch_id]
+                    latest = self.store.get(batch_id)
+                    changes.append(("removed", batch) if latest is None else ("finished", latest))
+            for batch_id, batch in stored.items():
+                known = self._batches.get(batch_id)
+                if known is not None and (known.stage, known.stage_started_at) == (batch.stage, batch.stage_started_at):
+                    continue
+                self._batches[batch_id] = batch
+                self._schedule(batch)
+                changes.append(("started" if known is None else "advanced", batch))
+        for event, batch in changes:
+            self._notify(event, batch)
+        return changes
+
+    def batches(self):
+        """Active batches, the one due soonest first."""
+        self.refresh()
+        with self._lock:
+            return sorted(self._batches.values(), key=lambda batch: (batch.due_at, batch.id))
+
+    def get(self, batch_id):
+        self.refresh()
+        return self._batches.get(batch_id)
+
+    def _active(self, batch_id):
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            raise ValueError(f"No active batch #{batch_id}.")
+        return batch
+
+    def start(self, name, stages, recipe=None, now=None):
+        """Start a batch in the first of stages (FermentationStage values, e.g. PizzaRecipe.stages) at now."""
+        now = now or datetime.now()
+        stages = parse_stages(stages)
+        if not stages:
+            raise ValueError("A batch needs at least one stage.")
+        with self._lock:
+            batch_id = self.store.add(name, stages, now, recipe)
+            batch = DoughBatch(batch_id, name, stages, 0, now, now, recipe)
+            self._batches[batch_id] = batch
+            self._schedule(batch)
+        self._notify("started", batch)
+        return batch
+
+    def start_recipe(self, recipe, name=None, now=None):
+        """Start a batch following a PizzaRecipe's stages."""
+        from manager import RecipeManager
+        name = name or f"{recipe.num_balls} x {recipe.ball_weight}g {recipe.yeast_type}"
+        return self.start(name, recipe.stages, RecipeManager.to_dict(recipe), now)
+
+    def advance(self, batch_id, now=None):
+        """The dough was moved on: start its next stage at now, or finish it after the last one."""
+        now = now or datetime.now()
+        self.refresh()
+        with self._lock:
+            batch = self._active(batch_id)
+            batch = replace(batch, stage=batch.stage + 1, stage_started_at=now)
+            self.store.set_stage(batch, batch.stage - 1)
+            if batch.finished:
+                del self._batches[batch_id]
+            else:
+                self._batches[batch_id] = batch
+                self._schedule(batch)
+        self._notify("finished" if batch.finished else "advanced", batch)
+        return batch
+
+    def remove(self, batch_id):
+        """Discard a batch (e.g. started by mistake); its heap entries are skipped from now on."""
+        self.refresh()
+        with self._lock:
+            batch = self._active(batch_id)
+            self.store.remove(batch_id)
+            del self._batches[batch_id]
+        self._notify("removed", batch)
+
+    # Timer queue
+
+    def next_deadline(self):
+        """When the next event is due, or None if no batch is waiting for anything."""
+        with self._lock:
+            while self._heap and not self._is_current(self._heap[0]):
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def fire_due(self, now=None):
+        """Pop and announce every event due by now; returns them as (event, batch) pairs.
+
+        Changes another process made to the store are picked up first, so their stale events are skipped.
+        """
+        now = now or datetime.now()
+        self.refresh()
+        fired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if not self._is_current(entry):
+                    continue
+                _, _, event, batch = entry
+                if event == "due" and now >= batch.due_at + self.grace:
+                    continue  # Already overdue (e.g. after a restart); only that one is announced
+                fired.append((event, batch))
+        for event, batch in fired:
+            self._notify(event, batch)
+        return fired
+
+    def seconds_until_next(self, now=None):
+        deadline = self.next_deadline()
+        if deadline is None:
+            return None
+        return max(0.0, (deadline - (now or datetime.now())).total_seconds())
+
+    def seconds_until_wake(self, now=None):
+        """How long a driver may sleep: until the next event, but no longer than REFRESH_SECONDS."""
+        seconds = self.seconds_until_next(now)
+        return REFRESH_SECONDS if seconds is None else min(seconds, REFRESH_SECONDS)
+
+    async def watch(self, stop=None):
+        """asyncio driver: sleep until the next deadline, a change or the next refresh, fire what is due, repeat
+        until stop is set."""
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def on_change(event, batch):
+            if event not in ("due", "overdue"):
+                loop.call_soon_threadsafe(changed.set)
+
+        self.add_listener(on_change)
+        try:
+            while stop is None or not stop.is_set():
+                changed.clear()  # Before firing, so a change made meanwhile still wakes the next wait
+                self.fire_due()
+                try:
+                    await asyncio.wait_for(changed.wait(), self.seconds_until_wake())
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.remove_listener(on_change)
+
+
+def format_batch(batch, now, grace):
+    status = batch.status(now, grace)
+    return (f"#{batch.id:<5} {batch.name[:28]:<28} {batch.current.name:<14} due {batch.due_at:%a %H:%M}  "
+            f"{status}{', move to ' + batch.next_name if status != 'proofing' else ''}")
+
+
+if __name__ == "__main__":
+    from config import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Track dough batches through their proofing stages.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    start_parser = commands.add_parser('start', help="start a batch from a saved recipe")
+    start_parser.add_argument('recipe_id', type=int)
+    start_parser.add_argument('--name')
+    commands.add_parser('list', help="show the active batches")
+    advance_parser = commands.add_parser('advance', help="record that a batch moved on to its next stage")
+    advance_parser.add_argument('batch_id', type=int)
+    commands.add_parser('watch', help="log due and overdue stages as they happen")
+    args = parser.parse_args()
+
+    scheduler = DoughScheduler.default()
+    if args.command == 'start':
+        from manager import RecipeManager
+        recipe = RecipeManager.load_recipe_by_id(args.recipe_id)
+        if recipe is None:
+            parser.error(f"No saved recipe #{args.recipe_id}")
+        batch = scheduler.start_recipe(recipe, args.name)
+        print(f"Started batch #{batch.id}: {batch.current.name} due {batch.due_at:%a %H:%M}")
+    elif args.command == 'list':
+        now = datetime.now()
+        for batch in scheduler.batches():
+            print(format_batch(batch, now, scheduler.grace))
+    elif args.command == 'advance':
+        try:
+            batch = scheduler.advance(args.batch_id)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Batch #{batch.id} finished" if batch.finished else
+              f"Batch #{batch.id}: {batch.current.name} due {batch.due_at:%a %H:%M}")
+    else:
+        def log_event(event, batch):
+            if event in ("due", "overdue"):
+                logging.warning(f"Batch #{batch.id} {batch.name}: {batch.current.name} {event}, "
+                                f"move to {batch.next_name}")
+
+        scheduler.add_listener(log_event)
+        try:
+            asyncio.run(scheduler.watch())
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,108 @@
+# hot_reload.py
+
+import logging
+import os
+import threading
+from config import Configuration
+from recipe import PizzaRecipe
+
+
+class HotReloader:
+    """Watches config.json and the yeast sheet and reloads them on a background thread when either changes.
+
+    Files are polled by modification time and size. A change is only acted on once the file has stayed the
+    same for one more poll, so a file that is still being written is not read. The reload builds a new
+    PizzaRecipe snapshot and swaps it in; if it fails, the current one stays in use.
+    """
+    _default = None
+
+    def __init__(self, interval=None):
+        self.interval = Configuration.get_hot_reload_interval() if interval is None else interval
+        self._stamps = self._read_stamps()
+        self._changed = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def default(cls):
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_stamps(self):
+        return {
+            "config": self._stamp(Configuration.config_path()),
+            "yeast_table": self._stamp(Configuration.get_yeast_table_path()),
+        }
+
+    def add_listener(self, callback):
+        """callback(snapshot) is called on the watcher thread after every successful reload."""
+        self._listeners.append(callback)
+
+    @property
+    def version(self):
+        return PizzaRecipe.table_version()
+
+    def check(self):
+        """Poll once; returns True if a new snapshot was swapped in."""
+        with self._lock:
+            stamps = self._read_stamps()
+            if stamps == self._stamps:
+                self._changed = None
+                return False
+            if stamps != self._changed:
+                self._changed = stamps  # Wait one more poll for the file to settle
+                return False
+            config_changed = stamps["config"] != self._stamps["config"]
+            previous, self._stamps, self._changed = self._stamps, stamps, None
+
+            if config_changed and not Configuration.reload():
+                self._stamps["yeast_table"] = previous["yeast_table"]  # Retry a sheet change with the next config
+                return False
+            try:
+                # Re-read the sheet path too: config.json may now point at another file
+                self._stamps["yeast_table"] = self._stamp(Configuration.get_yeast_table_path())
+                snapshot = PizzaRecipe.initialize()
+            except Exception as e:
+                logging.error(f"Reloading the yeast table failed, keeping version {self.version}: {e}")
+                return False
+        logging.info(f"Reloaded configuration and yeast table (version {snapshot.version}).")
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logging.error(f"Reload listener failed: {e}")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Start polling in the background; does nothing if the interval is 0 or it is already running."""
+        if self.interval <= 0 or self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, name="hot-reload", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def start_hot_reload():
+    """Start the process-wide watcher; also used as the initializer of worker processes."""
+    return HotReloader.default().start()
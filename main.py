@@ -1,9 +1,15 @@
 # main.py
 
 from ui import build_ui
+from profiling import Profiler
+from hot_reload import start_hot_reload
+from config import configure_logging
 import tkinter as tk
 
 if __name__ == "__main__":
+    configure_logging()
+    Profiler.enable_if_requested()
+    start_hot_reload()
     root = tk.Tk()
     app = build_ui(root)
     root.mainloop()
@@ -1,28 +1,15 @@
 # manager.py
 
 import json
-import os
-from tkinter import filedialog, messagebox
-from config import Configuration
-from datetime import datetime
 from recipe import PizzaRecipe
+from recipe_store import RecipeStore
+from write_behind import WriteBehindSaver, atomic_write_json
 
 
 class RecipeManager:
     @staticmethod
-    def save_recipe(recipe):
-        folder_path = Configuration.get_recipe_folder_path()
-        os.makedirs(folder_path, exist_ok=True)
-
-        base_filename = datetime.now().strftime("%Y-%m-%d")
-        file_path = os.path.join(folder_path, f"{base_filename}.json")
-
-        counter = 1
-        while os.path.exists(file_path):
-            file_path = os.path.join(folder_path, f"{base_filename}_{counter}.json")
-            counter += 1
-
-        data = {
+    def to_dict(recipe):
+        return {
             "salt_percentage": recipe.salt,
             "oil_percentage": recipe.oil,
             "yeast_type": recipe.yeast_type,
@@ -31,13 +18,65 @@ class RecipeManager:
             "num_balls": recipe.num_balls,
             "room_fer": recipe.room_fermentation,
             "fridge_fer": recipe.fridge_fermentation,
+            "room_temp": recipe.room_temp,
+            "fridge_temp": recipe.fridge_temp,
+            "pre_stages": [stage.to_dict() for stage in recipe.pre_stages],
         }
 
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=4)
+    @staticmethod
+    def from_dict(data):
+        recipe = PizzaRecipe(data.get('salt_percentage'),
+                             data.get('oil_percentage'),
+                             data.get('yeast_type'),
+                             data.get('hydration'),
+                             data.get('ball_weight'),
+                             data.get('num_balls'),
+                             data.get('room_fer'),
+                             data.get('fridge_fer'))
+        # Temperatures were not saved by older versions; those recipes keep the default temperatures
+        temps = {name: data[name] for name in ('room_temp', 'fridge_temp') if data.get(name) is not None}
+        if data.get('pre_stages'):
+            temps['pre_stages'] = data['pre_stages']
+        if temps:
+            recipe.update(**temps)
+        return recipe
+
+    @staticmethod
+    def save_recipe(recipe):
+        return RecipeStore.default().add(RecipeManager.to_dict(recipe))
+
+    @staticmethod
+    def save_recipe_async(recipe, on_done=None):
+        """Queue a save on the write-behind thread; on_done(recipe_id, error) is called from that thread.
+
+        Repeated saves of the same recipe object in quick succession are written once, with its latest values.
+        """
+        data = RecipeManager.to_dict(recipe)
+        WriteBehindSaver.default().submit(lambda: RecipeStore.default().add(data), key=id(recipe), on_done=on_done)
+
+    @staticmethod
+    def export_recipe(recipe, path):
+        atomic_write_json(path, RecipeManager.to_dict(recipe))
+
+    @staticmethod
+    def load_recipe_by_id(recipe_id):
+        data = RecipeStore.default().get(recipe_id)
+        return None if data is None else RecipeManager.from_dict(data)
 
     @staticmethod
     def load_recipe():
+        from tkinter import filedialog, messagebox  # Dialogs only; saving and loading by id work headless
+        store = RecipeStore.default()
+        choice = RecipeManager.ask_saved_recipe(store) if store.count() else 'file'
+        if choice is None:
+            return None
+        if choice != 'file':
+            try:
+                return RecipeManager.load_recipe_by_id(choice)
+            except Exception as e:
+                messagebox.showerror("Error Loading Recipe", f"An error occurred: {e}")
+                return None
+
         recipe_path = filedialog.askopenfilename(
             title="Select Recipe File",
             filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
@@ -49,15 +88,42 @@ class RecipeManager:
 
         try:
             with open(recipe_path, 'r') as file:
-                data = json.load(file)
-                return PizzaRecipe(data.get('salt_percentage'),
-                                   data.get('oil_percentage'),
-                                   data.get('yeast_type'),
-                                   data.get('hydration'),
-                                   data.get('ball_weight'),
-                                   data.get('num_balls'),
-                                   data.get('room_fer'),
-                                   data.get('fridge_fer'))
+                return RecipeManager.from_dict(json.load(file))
         except Exception as e:
             messagebox.showerror("Error Loading Recipe", f"An error occurred: {e}")
             return None
+
+    @staticmethod
+    def ask_saved_recipe(store, limit=200):
+        """Let the user pick one of the most recent saved recipes. Returns its id, 'file' or None."""
+        import tkinter as tk
+        recipes = store.query(limit=limit)
+        result = {"choice": None}
+
+        dialog = tk.Toplevel()
+        dialog.title("Load Recipe")
+        listbox = tk.Listbox(dialog, width=60, height=15)
+        listbox.pack(padx=10, pady=(10, 5))
+        for data in recipes:
+            listbox.insert(tk.END, f"#{data['id']}  {data['created_at']}  {data['hydration']}% {data['yeast_type']}  "
+                                   f"{data['fridge_fer']}h cold / {data['room_fer']}h room")
+
+        def choose(choice):
+            result["choice"] = choice
+            dialog.destroy()
+
+        def choose_selected():
+            selection = listbox.curselection()
+            if selection:
+                choose(recipes[selection[0]]['id'])
+
+        buttons = tk.Frame(dialog)
+        buttons.pack(pady=(0, 10))
+        tk.Button(buttons, text="Load", command=choose_selected).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Open File...", command=lambda: choose('file')).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Cancel", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+        listbox.bind('<Double-Button-1>', lambda _: choose_selected())
+
+        dialog.grab_set()
+        dialog.wait_window()
+        return result["choice"]
@@ -0,0 +1,177 @@
+# planner.py
+#
+# Ready-by planning: which cold and room proofing schedules finish the dough at a given time.
+#   python planner.py --ready "2026-10-19 18:00" --fridge-temp 4 --room-temp 22
+
+import argparse
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import numpy as np
+from config import configure_logging
+from recipe import PizzaRecipe
+from recipe_spec import RecipeSpec, RecipeResult
+from batch import compute_specs, default_inputs
+
+
+@dataclass(frozen=True, slots=True)
+class PlannedSchedule:
+    """A feasible schedule: start the cold proof at start_at and move the dough to room temperature at
+    room_proof_at. result holds the recipe with these temperatures and hours."""
+    start_at: datetime
+    room_proof_at: datetime
+    ready_at: datetime
+    result: RecipeResult
+
+
+class FermentationPlanner:
+    """Sorted index of every (room temp, room hours, fridge temp, fridge hours) combination in the yeast table.
+
+    For each pair of room and fridge temperature rows, the total proofing hours of all hour combinations
+    are stored in ascending order, so the schedules fitting a time window are found with a binary search.
+    The index is built on first use and rebuilt when PizzaRecipe reloads the yeast table.
+    """
+    _default = None
+
+    def __init__(self):
+        self._version = None
+        self._table = None
+
+    @classmethod
+    def default(cls):
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def _ensure_index(self):
+        snapshot = PizzaRecipe.current_snapshot()
+        if self._version != snapshot.version:
+            self._build(snapshot.yeast_table)
+            self._version = snapshot.version
+
+    def _build(self, table):
+        options = table.temperature_options
+        # Distinct values only: a repeated hour value in a row is the same schedule
+        hours = [np.asarray(list(dict.fromkeys(table.hour_range(temp))), dtype=np.float64) for temp in options]
+        width = max((len(h) for h in hours), default=0)
+        n = len(options)
+
+        # totals[room, fridge] is sorted; room_index/fridge_index give the hour positions of each entry
+        self._totals = np.full((n, n, width * width), np.inf, dtype=np.float32)
+        self._room_index = np.zeros((n, n, width * width), dtype=np.uint8)
+        self._fridge_index = np.zeros((n, n, width * width), dtype=np.uint8)
+        self._counts = np.zeros((n, n), dtype=np.int64)
+        for room in range(n):
+            for fridge in range(n):
+                sums = (hours[room][:, None] + hours[fridge][None, :]).ravel()
+                order = np.argsort(sums, kind='stable')
+                count = len(sums)
+                self._totals[room, fridge, :count] = sums[order]
+                self._room_index[room, fridge, :count] = order // max(len(hours[fridge]), 1)
+                self._fridge_index[room, fridge, :count] = order % max(len(hours[fridge]), 1)
+                self._counts[room, fridge] = count
+        self._hours = hours
+        self._options = np.asarray(options, dtype=np.float64)
+        self._table = table
+
+    def candidates(self, min_hours, max_hours, fridge_temp, room_temp, room_tolerance=1.0):
+        """(room option, room hours, fridge option, fridge hours) arrays of every combination whose total
+        proofing time is within [min_hours, max_hours], for the fridge temperature option nearest to
+        fridge_temp and the room temperature options within room_tolerance of room_temp. Temperatures outside the
+        range of options raise ValueError."""
+        self._ensure_index()
+        self._table.check_temperatures([fridge_temp, room_temp])
+        fridge = int(np.argmin(np.abs(self._options - fridge_temp)))
+        rooms = np.flatnonzero(np.abs(self._options - room_temp) <= room_tolerance)
+        if len(rooms) == 0:
+            rooms = np.array([np.argmin(np.abs(self._options - room_temp))])
+
+        room_opts, room_hours, fridge_hours = [], [], []
+        for room in rooms:
+            totals = self._totals[room, fridge, :self._counts[room, fridge]]
+            lo = int(np.searchsorted(totals, min_hours, side='left'))
+            hi = int(np.searchsorted(totals, max_hours, side='right'))
+            if lo >= hi:
+                continue
+            room_opts.append(np.full(hi - lo, room))
+            room_hours.append(self._hours[room][self._room_index[room, fridge, lo:hi]])
+            fridge_hours.append(self._hours[fridge][self._fridge_index[room, fridge, lo:hi]])
+        if not room_opts:
+            empty = np.array([], dtype=np.float64)
+            return np.array([], dtype=np.int64), empty, fridge, empty
+        return np.concatenate(room_opts), np.concatenate(room_hours), fridge, np.concatenate(fridge_hours)
+
+    def plan(self, ready_at, fridge_temp, room_temp, spec=None, now=None, room_tolerance=1.0, max_wait_hours=12,
+             min_room_hours=1, limit=10):
+        """Ranked schedules that have the dough ready at ready_at.
+
+        A schedule is feasible if it can start between now and now + max_wait_hours, its room proof is at
+        least min_room_hours and the yeast table has a yeast amount for it. The best schedules come first:
+        room temperature closest to room_temp, then the one starting soonest, then the longer cold proof.
+        spec supplies the dough (hydration, ball weight, yeast type...); it defaults to PizzaRecipe's defaults.
+        """
+        now = datetime.now() if now is None else now
+        available = (ready_at - now).total_seconds() / 3600
+        if available <= 0:
+            return []
+        spec = RecipeSpec.from_dict({}) if spec is None else spec
+        room_opts, room_hours, fridge, fridge_hours = self.candidates(
+            max(available - max_wait_hours, 0), available, fridge_temp, room_temp, room_tolerance)
+
+        keep = room_hours >= min_room_hours
+        room_opts, room_hours, fridge_hours = room_opts[keep], room_hours[keep], fridge_hours[keep]
+        if len(room_opts) == 0:
+            return []
+
+        table = self._table
+        room_rows = table.nearest_rows(self._options[room_opts])
+        fridge_rows = np.full(len(room_opts), table.nearest_rows([self._options[fridge]])[0])
+        type_indexes = table.yeast_type_indexes([spec.yeast_type] * len(room_opts))
+        percentages = table.yeast_percentages(type_indexes, room_rows, room_hours, fridge_rows, fridge_hours)
+
+        feasible = ~np.isnan(percentages) & (percentages > 0)
+        temp_distance = np.abs(self._options[room_opts] - room_temp)
+        wait = available - (room_hours + fridge_hours)
+        order = np.lexsort((-fridge_hours, wait, temp_distance))
+        order = order[feasible[order]][:limit]
+
+        specs = [RecipeSpec(spec.salt, spec.oil, spec.hydration, spec.ball_weight, spec.num_balls, spec.yeast_type,
+                            self._options[fridge], fridge_hours[i], self._options[room_opts[i]], room_hours[i])
+                 for i in order]
+        schedules = []
+        for result in compute_specs(specs):
+            total = result.spec.fridge_fermentation + result.spec.room_fermentation
+            start_at = ready_at - timedelta(hours=total)
+            schedules.append(PlannedSchedule(start_at, start_at + timedelta(hours=result.spec.fridge_fermentation),
+                                             ready_at, result))
+        return schedules
+
+
+def format_schedule(schedule):
+    spec = schedule.result.spec
+    return (f"{schedule.start_at:%a %H:%M}  cold {round(spec.fridge_fermentation):>3}h at {spec.fridge_temp:.1f}°C, "
+            f"{schedule.room_proof_at:%a %H:%M}  room {round(spec.room_fermentation):>2}h at {spec.room_temp:.1f}°C  "
+            f"yeast {schedule.result.yeast_weight:.3f}g ({schedule.result.yeast_percentage:.3f}%)")
+
+
+if __name__ == "__main__":
+    configure_logging()
+    defaults = default_inputs()
+    parser = argparse.ArgumentParser(description="Find proofing schedules that finish the dough at a given time.")
+    parser.add_argument('--ready', required=True, type=datetime.fromisoformat, help="e.g. '2026-10-19 18:00'")
+    parser.add_argument('--fridge-temp', type=float, default=defaults['fridge_temp'])
+    parser.add_argument('--room-temp', type=float, default=defaults['room_temp'])
+    parser.add_argument('--room-tolerance', type=float, default=1.0, help="°C around --room-temp to consider")
+    parser.add_argument('--max-wait', type=float, default=12, help="latest start, in hours from now")
+    parser.add_argument('--yeast-type', default=defaults['yeast_type'])
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    base = RecipeSpec.from_dict({"yeast_type": args.yeast_type})
+    try:
+        schedules = FermentationPlanner.default().plan(args.ready, args.fridge_temp, args.room_temp, spec=base,
+                                                       room_tolerance=args.room_tolerance,
+                                                       max_wait_hours=args.max_wait, limit=args.limit)
+    except ValueError as e:
+        parser.error(str(e))
+    for planned in schedules:
+        print(format_schedule(planned))
@@ -0,0 +1,188 @@
+# profiling.py
+#
+# Opt-in call counters and cumulative timers around the hot paths. Enable with PIZZA_PROFILE=1 or
+# "profiling": true in config.json. When disabled nothing is wrapped, so there is no overhead at all.
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# (module, class or None for module functions, attribute); only modules already imported are patched
+TARGETS = [
+    ("config", "Configuration", "load_config"),
+    ("config", "Configuration", "get_yeast_table_array"),
+    ("config", "Configuration", "get_yeast_table_data"),
+    ("yeast_cache", "YeastTableCache", "load"),
+    ("yeast_cache", "YeastTableCache", "parse_xlsx"),
+    ("yeast_table", "YeastTable", "hour_range"),
+    ("yeast_table", "YeastTable", "snap_hours"),
+    ("yeast_table", "YeastTable", "yeast_percentage_chain"),
+    ("yeast_table", "YeastTable", "yeast_percentages"),
+    ("yeast_lookup", "YeastLookup", "percentage"),
+    ("recipe", "PizzaRecipe", "initialize"),
+    ("recipe", "PizzaRecipe", "recalculate"),
+    ("recipe", "PizzaRecipe", "snap_fermentation_hours"),
+    ("recipe", "PizzaRecipe", "calculate_yeast_percentage_dual"),
+    ("recipe", "PizzaRecipe", "to_string"),
+    ("batch", None, "compute_recipes"),
+    ("batch", None, "compute_specs"),
+    ("cli", None, "process_chunk"),
+    ("result_cache", "RecipeResultCache", "get"),
+    ("planner", "FermentationPlanner", "plan"),
+    ("recipe_store", "RecipeStore", "add"),
+    ("recipe_store", "RecipeStore", "get"),
+    ("ui", "RecalculationScheduler", "_dispatch"),
+    ("ui", "RecalculationScheduler", "render"),
+    ("ui", "RecipeView", "bind_recipe"),
+]
+
+ENV_VARIABLE = "PIZZA_PROFILE"
+PROJECT_DIR = Path(__file__).resolve().parent
+
+
+class Profiler:
+    _stats = {}  # name -> [calls, cumulative seconds]
+    _lock = threading.Lock()
+    _installed = []  # (owner, attribute, original descriptor)
+
+    @staticmethod
+    def requested():
+        """True if profiling was asked for by the environment variable or the config key."""
+        if os.environ.get(ENV_VARIABLE, "").lower() in ("1", "true", "yes", "on"):
+            return True
+        from config import Configuration
+        return Configuration.get_profiling_enabled()
+
+    @classmethod
+    def enabled(cls):
+        return bool(cls._installed)
+
+    @classmethod
+    def enable_if_requested(cls):
+        if cls.requested():
+            cls.enable()
+        return cls.enabled()
+
+    @classmethod
+    def _record(cls, name, elapsed):
+        with cls._lock:
+            entry = cls._stats.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    @classmethod
+    def _wrap(cls, name, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                cls._record(name, time.perf_counter() - start)
+        return timed
+
+    @staticmethod
+    def _module_path(module):
+        path = getattr(module, "__file__", None)
+        return None if path is None else Path(path).resolve()
+
+    @staticmethod
+    def _find_module(name):
+        """The imported module called name, including a module run as a script (python -m name or python name.py)."""
+        module = sys.modules.get(name)
+        if module is None:
+            main = sys.modules.get("__main__")
+            spec = getattr(main, "__spec__", None)
+            if spec is not None:
+                matches = spec.name == name
+            else:
+                matches = Profiler._module_path(main) == PROJECT_DIR / f"{name}.py"
+            if matches:
+                module = main
+        return module
+
+    @classmethod
+    def _project_modules(cls):
+        return [module for module in list(sys.modules.values())
+                if (path := cls._module_path(module)) is not None and path.parent == PROJECT_DIR]
+
+    @classmethod
+    def enable(cls):
+        """Wrap every target in an already imported module; calling it again is harmless."""
+        if cls._installed:
+            return
+        for module_name, class_name, attribute in TARGETS:
+            module = cls._find_module(module_name)
+            if module is None:
+                continue
+            owner = module if class_name is None else getattr(module, class_name, None)
+            if owner is None:
+                continue
+            original = vars(owner).get(attribute)
+            if original is None:
+                continue
+            name = f"{module_name}.{class_name + '.' if class_name else ''}{attribute}"
+            if isinstance(original, staticmethod):
+                wrapped = staticmethod(cls._wrap(name, original.__func__))
+            elif isinstance(original, classmethod):
+                wrapped = classmethod(cls._wrap(name, original.__func__))
+            else:
+                wrapped = cls._wrap(name, original)
+            setattr(owner, attribute, wrapped)
+            cls._installed.append((owner, attribute, original))
+            if class_name is None:
+                # from module import function bound the original in the importing modules; wrap those names too
+                for importer in cls._project_modules():
+                    if importer is not owner and vars(importer).get(attribute) is original:
+                        setattr(importer, attribute, wrapped)
+                        cls._installed.append((importer, attribute, original))
+
+    @classmethod
+    def disable(cls):
+        for owner, attribute, original in reversed(cls._installed):
+            setattr(owner, attribute, original)
+        cls._installed = []
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._stats = {}
+
+    @classmethod
+    def snapshot(cls):
+        """{name: {"calls", "total_ms", "mean_us"}}, slowest cumulative time first."""
+        with cls._lock:
+            items = [(name, calls, total) for name, (calls, total) in cls._stats.items()]
+        items.sort(key=lambda item: item[2], reverse=True)
+        return {name: {"calls": calls, "total_ms": total * 1e3, "mean_us": total / calls * 1e6}
+                for name, calls, total in items}
+
+    @classmethod
+    def format_table(cls):
+        lines = [f"{'function':<56}{'calls':>8}{'total ms':>11}{'mean us':>10}"]
+        for name, entry in cls.snapshot().items():
+            lines.append(f"{name:<56}{entry['calls']:>8}{entry['total_ms']:>11.2f}{entry['mean_us']:>10.1f}")
+        return "\n".join(lines)
+
+    @classmethod
+    def dump_json(cls, path):
+        with open(path, 'w') as file:
+            json.dump(cls.snapshot(), file, indent=4)
+
+
+@contextmanager
+def cprofile_to(path):
+    """Run the enclosed block under cProfile and write the stats to path (for pstats/snakeviz)."""
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
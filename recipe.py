@@ -1,47 +1,84 @@
 # recipe.py
 
 from config import Configuration
+from contextlib import contextmanager
+import copy
+from dataclasses import dataclass
+from numbers import Real
+import threading
+from types import MappingProxyType
+from yeast_table import YeastTable
+from yeast_lookup import YeastLookup
+from recipe_spec import FermentationStage, parse_stages, format_pre_stages
 import math
 
+MASS_BALANCE_FIELDS = ('salt', 'oil', 'hydration', 'ball_weight', 'num_balls')
+YEAST_FIELDS = ('yeast_type', 'room_temp', 'fridge_temp', 'room_fermentation', 'fridge_fermentation', 'pre_stages')
+
+
+@dataclass(frozen=True)
+class TableSnapshot:
+    """Recipe defaults, sheet parameters and yeast table of one load, replaced as a whole on reload.
+
+    Code that needs a consistent view reads PizzaRecipe.current_snapshot() once and uses only that object.
+    """
+    version: int
+    recipe_defaults: MappingProxyType
+    xlsx_defaults: MappingProxyType
+    yeast_table: YeastTable
+    lookup: YeastLookup = None  # Precomputed cold + room percentages, when the yeast_lookup setting is on
+
+    @property
+    def temperature_options(self):
+        return self.yeast_table.temperature_options
+
 
 class PizzaRecipe:
     """A class to manage pizza recipe calculations."""
     _recipe_defaults = None
     _xlsx_defaults = None
     _temperature_options = None
-    _yeast_table_data = None
+    _yeast_table = None
+    _snapshot = None
+    _reload_lock = threading.Lock()
 
     def __init__(self, salt_percentage=None, oil_percentage=None, yeast_type=None,
                  hydration=None, ball_weight=None, num_balls=None, room_fer=None, fridge_fer=None):
         """Initialize the pizza recipe with given parameters or defaults."""
-        if PizzaRecipe._recipe_defaults is None or PizzaRecipe._yeast_table_data is None \
-                or PizzaRecipe._temperature_options is None or PizzaRecipe._xlsx_defaults is None:
-            PizzaRecipe.initialize()
+        snapshot = PizzaRecipe.current_snapshot()
+        recipe_defaults = snapshot.recipe_defaults
+        xlsx_defaults = snapshot.xlsx_defaults
 
-        self._salt = PizzaRecipe._recipe_defaults['salt_percentage'] if salt_percentage is None else salt_percentage
-        self._oil = PizzaRecipe._recipe_defaults['oil_percentage'] if oil_percentage is None else oil_percentage
-        self._hydration = PizzaRecipe._recipe_defaults['hydration'] if hydration is None else hydration
-        self._ball_weight = PizzaRecipe._recipe_defaults['ball_weight'] if ball_weight is None else ball_weight
-        self._num_balls = PizzaRecipe._recipe_defaults['num_balls'] if num_balls is None else num_balls
+        self._salt = recipe_defaults['salt_percentage'] if salt_percentage is None else salt_percentage
+        self._oil = recipe_defaults['oil_percentage'] if oil_percentage is None else oil_percentage
+        self._hydration = recipe_defaults['hydration'] if hydration is None else hydration
+        self._ball_weight = recipe_defaults['ball_weight'] if ball_weight is None else ball_weight
+        self._num_balls = recipe_defaults['num_balls'] if num_balls is None else num_balls
 
         self._flour = self._salt_weight = self._oil_weight = self._water = None
         self._yeast_percentage = self._yeast_weight = None
 
-        self.recalculate()
+        self._batch_depth = 0
+        self._recompute_counts = {'mass_balance': 0, 'yeast': 0}
+
+        # Derived values are computed lazily on first read; see _invalidate for the dependencies
+        self._mass_dirty = True
+        self._yeast_dirty = True
+        self._yeast_weight_dirty = True
+        self._hours_unsnapped = False
 
-        self._yeast_type = PizzaRecipe._recipe_defaults['yeast_types'][1] if yeast_type is None else yeast_type
-        self._room_temp = self._temperature_options[self._xlsx_defaults['room_temperature_row']]
-        self._fridge_temp = self._temperature_options[self._xlsx_defaults['fridge_temperature_row']]
+        self._yeast_type = recipe_defaults['yeast_types'][1] if yeast_type is None else yeast_type
+        self._pre_stages = ()  # Stages before the cold proof; none by default
+        self._room_temp = snapshot.temperature_options[xlsx_defaults['room_temperature_row']]
+        self._fridge_temp = snapshot.temperature_options[xlsx_defaults['fridge_temperature_row']]
 
-        self._room_fermentation = self.get_hour_range_by_temp(self._room_temp)[
-            PizzaRecipe._xlsx_defaults['room_time_default']] \
+        self._room_fermentation = snapshot.yeast_table.hour_range(self._room_temp)[
+            xlsx_defaults['room_time_default']] \
             if room_fer is None else room_fer
-        self._fridge_fermentation = self.get_hour_range_by_temp(self._fridge_temp)[
-            PizzaRecipe._xlsx_defaults['fridge_time_default']] \
+        self._fridge_fermentation = snapshot.yeast_table.hour_range(self._fridge_temp)[
+            xlsx_defaults['fridge_time_default']] \
             if fridge_fer is None else fridge_fer
 
-        self.calculate_yeast_percentage_dual()
-
     def calculate_flour_weight(self):
         total_weight = 1 + (self._hydration + (0 if self._oil is None else self._oil) +
                             (0 if self._salt is None else self._salt)) / 100
@@ -52,90 +89,222 @@ class PizzaRecipe:
                self._salt_weight - self.oil_weight
 
     def recalculate(self):
+        self._recompute_counts['mass_balance'] += 1
+        self._mass_dirty = False  # Cleared first: calculate_water_weight reads the oil_weight property
+        self._yeast_weight_dirty = True
         self._flour = self.calculate_flour_weight()
         self._salt_weight = self.calculate_salt_weight()
         self._oil_weight = self.calculate_oil_weight()
         self._water = self.calculate_water_weight()
 
+    def snap_fermentation_hours(self, table=None):
+        table = PizzaRecipe.current_snapshot().yeast_table if table is None else table
+        self._fridge_fermentation = table.snap_hours(self._fridge_temp, self._fridge_fermentation)
+        self._room_fermentation = table.snap_hours(self._room_temp, self._room_fermentation)
+        self._pre_stages = tuple(FermentationStage(stage.name, stage.temp, table.snap_hours(stage.temp, stage.hours))
+                                 for stage in self._pre_stages)
+        self._hours_unsnapped = False
+
     def recalculate_yeast(self):
-        f_tmp_time = min(PizzaRecipe.get_hour_range_by_temp(self.fridge_temp),
-                         key=lambda x: abs(x - self.fridge_fermentation))
-        r_tmp_time = min(PizzaRecipe.get_hour_range_by_temp(self.room_temp),
-                         key=lambda x: abs(x - self.room_fermentation))
-        if self._fridge_fermentation != f_tmp_time:
-            self._fridge_fermentation = f_tmp_time
-        if self._room_fermentation != r_tmp_time:
-            self._room_fermentation = r_tmp_time
-        self.calculate_yeast_percentage_dual()
+        snapshot = PizzaRecipe.current_snapshot()
+        self.snap_fermentation_hours(snapshot.yeast_table)
+        self.calculate_yeast_percentage_dual(snapshot.yeast_table, snapshot.lookup)
+
+    def _invalidate(self, mass_balance=False, yeast=False):
+        """Mark the derived values that depend on a changed input.
+
+        Mass-balance inputs (salt, oil, hydration, ball weight, number of balls) invalidate the
+        flour/water/salt/oil weights; proofing inputs (yeast type, temperatures, hours, earlier stages) invalidate the
+        yeast percentage and re-snap the hours. Either invalidates the yeast weight.
+        """
+        if mass_balance:
+            self._mass_dirty = True
+        if yeast:
+            self._yeast_dirty = True
+            self._hours_unsnapped = True
+        self._yeast_weight_dirty = True
+
+    def _ensure_mass_balance(self):
+        if self._mass_dirty:
+            self.recalculate()
+
+    def _ensure_hours(self):
+        if self._hours_unsnapped:
+            self.snap_fermentation_hours()
+
+    def _ensure_yeast(self):
+        snapshot = PizzaRecipe.current_snapshot()  # One table for both steps, even during a reload
+        if self._hours_unsnapped:
+            self.snap_fermentation_hours(snapshot.yeast_table)
+        if self._yeast_dirty:
+            self.calculate_yeast_percentage_dual(snapshot.yeast_table, snapshot.lookup)
+
+    @contextmanager
+    def batch(self):
+        """Group several setters into one transaction.
+
+        Derived values are only computed when read, so setters inside the block cost nothing extra.
+        If the block raises, the recipe is restored to its state on entry.
+        """
+        if self._batch_depth == 0:
+            saved = {key: value for key, value in vars(self).items()
+                     if key not in ('_batch_depth', '_recompute_counts')}
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                vars(self).update(saved)
+            raise
+        self._batch_depth -= 1
+
+    def update(self, **fields):
+        """Validate and apply several inputs at once; the next read recomputes each derived value once."""
+        for name, value in fields.items():
+            self.validate_field(name, value)
+        with self.batch():
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    @staticmethod
+    def validate_field(name, value):
+        if name not in MASS_BALANCE_FIELDS + YEAST_FIELDS:
+            raise TypeError(f"'{name}' is not a recipe field.")
+        if name == 'yeast_type':
+            if value not in PizzaRecipe.get_yeast_types():
+                raise ValueError(f"{value} is not one of the yeast types {PizzaRecipe.get_yeast_types()}.")
+            return
+        if name == 'pre_stages':
+            try:
+                stages = parse_stages(value)
+            except (KeyError, ValueError, TypeError) as e:
+                raise ValueError(f"Invalid fermentation stages {value!r}: {e}")
+            for stage in stages:
+                PizzaRecipe.validate_field('room_temp', stage.temp)
+                PizzaRecipe.validate_field('room_fermentation', stage.hours)
+            return
+        if isinstance(value, bool) or not isinstance(value, Real):
+            raise TypeError(f"{name} must be a number, got {value!r}.")
+        if name in ('room_temp', 'fridge_temp'):
+            if PizzaRecipe.current_snapshot().yeast_table.find_row(value) is None:
+                raise ValueError(f"{value} is not in the list of temperature options.")
+        elif name in ('ball_weight', 'num_balls', 'room_fermentation', 'fridge_fermentation'):
+            if value <= 0:
+                raise ValueError(f"{name} must be positive, got {value}.")
+        elif value < 0:
+            raise ValueError(f"{name} must not be negative, got {value}.")
+
+    def snapshot(self):
+        """Independent copy of this recipe, safe to compute on another thread."""
+        clone = copy.copy(self)
+        clone._recompute_counts = dict(self._recompute_counts)
+        clone._batch_depth = 0
+        return clone
+
+    @property
+    def recompute_counts(self):
+        """Number of mass-balance passes and yeast table lookups run by this recipe so far."""
+        return dict(self._recompute_counts)
 
     # Class Methods
 
     @classmethod
     def initialize(cls):
-        cls._recipe_defaults = Configuration.get_recipe_defaults()
-        cls._yeast_table_data = Configuration.get_yeast_table_data()
-        cls._xlsx_defaults = Configuration.get_yeast_table_params()
-        row_range_temp = slice(cls._xlsx_defaults['temp_row_range_l'], cls._xlsx_defaults['temp_row_range_r'])
-        cls._temperature_options = cls._yeast_table_data.iloc[
-            row_range_temp, cls._xlsx_defaults['temp_row_range_offset']].dropna().tolist()
-
-    # Static Methods
+        """Load the config defaults and the yeast table into a new snapshot and swap it in.
+
+        The new table is built before anything is replaced, so calculations running on other threads keep
+        using the previous snapshot until they next read current_snapshot().
+        """
+        with cls._reload_lock:
+            recipe_defaults = Configuration.get_recipe_defaults()
+            recipe_defaults['yeast_types'] = tuple(recipe_defaults['yeast_types'])
+            xlsx_defaults = Configuration.get_yeast_table_params()
+            table = YeastTable(Configuration.get_yeast_table_array(), xlsx_defaults, recipe_defaults['yeast_types'])
+            lookup = None
+            if Configuration.get_yeast_lookup_enabled():
+                lookup = YeastLookup.load(Configuration.get_yeast_lookup_path(), table)
+            version = 1 if cls._snapshot is None else cls._snapshot.version + 1
+            snapshot = TableSnapshot(version, MappingProxyType(recipe_defaults), MappingProxyType(xlsx_defaults),
+                                     table, lookup)
+            cls._install(snapshot)
+        return snapshot
 
-    @staticmethod
-    def get_temp_range():
-        if PizzaRecipe._yeast_table_data is None:
-            PizzaRecipe.initialize()
-        return PizzaRecipe._temperature_options
+    @classmethod
+    def adopt_snapshot(cls, snapshot):
+        """Swap in a snapshot built elsewhere, e.g. attached from another process's shared memory.
 
-    @staticmethod
-    def get_hour_range_by_temp(temp):
-        if PizzaRecipe._yeast_table_data is None:
-            PizzaRecipe.initialize()
-        try:
-            row_index = PizzaRecipe._temperature_options.index(temp) + PizzaRecipe._xlsx_defaults['temp_row_range_l']
-        except ValueError:
-            print(f"{temp} is not in the list.")
-            row_index = PizzaRecipe._xlsx_defaults['temp_row_range_l']
-
-        s_index = PizzaRecipe._xlsx_defaults['start_hour_index']
-        e_index = PizzaRecipe._xlsx_defaults['end_hour_index']
-        return [
-            value for value in PizzaRecipe._yeast_table_data.iloc[row_index, s_index:e_index].dropna().tolist()
-            if value not in (None, 0)
-        ]
-
-    def calculate_yeast_percentage_dual(self):
-        if PizzaRecipe._yeast_table_data is None:
-            PizzaRecipe.initialize()
+        Versions only move forward: an older snapshot than the current one is ignored. Returns the current one.
+        """
+        with cls._reload_lock:
+            if cls._snapshot is None or snapshot.version >= cls._snapshot.version:
+                cls._install(snapshot)
+            return cls._snapshot
 
-        try:
-            row_room = PizzaRecipe._temperature_options.index(self._room_temp) + PizzaRecipe._xlsx_defaults[
-                'temp_row_range_l']
-            row_fridge = PizzaRecipe._temperature_options.index(self._fridge_temp) + PizzaRecipe._xlsx_defaults[
-                'temp_row_range_l']
-        except ValueError:
-            raise ValueError(f"{self._room_temp} or {self._fridge_temp} is not in the list of temperature options.")
+    @classmethod
+    def _install(cls, snapshot):
+        cls._snapshot = snapshot
+        # Kept for code that reads the individual attributes
+        cls._recipe_defaults = snapshot.recipe_defaults
+        cls._xlsx_defaults = snapshot.xlsx_defaults
+        cls._yeast_table = snapshot.yeast_table
+        cls._temperature_options = snapshot.temperature_options
 
-        yeast_data_row_room = PizzaRecipe._yeast_table_data.iloc[row_room]
+    @classmethod
+    def current_snapshot(cls):
+        snapshot = cls._snapshot
+        return cls.initialize() if snapshot is None else snapshot
 
-        closest_diff = min(
-            abs(yeast_data_row_room[col] - self._room_fermentation) for col in yeast_data_row_room.index)
+    @classmethod
+    def is_loaded(cls):
+        """True once a snapshot is in place. Unlike current_snapshot() this never loads anything."""
+        return cls._snapshot is not None
 
-        col_room = [col for col in yeast_data_row_room.index[2:] if
-                    abs(yeast_data_row_room[col] - self._room_fermentation) == closest_diff][-1]
+    @classmethod
+    def table_version(cls):
+        """Increases every time the config defaults and yeast table are reloaded."""
+        return cls.current_snapshot().version
 
-        yeast_data_row_fridge = PizzaRecipe._yeast_table_data.iloc[row_fridge]
-        time_combined = yeast_data_row_fridge[col_room] + self._fridge_fermentation
+    # Static Methods
 
-        col_fridge = min(
-            (col for col in yeast_data_row_fridge.index[2:] if not math.isnan(yeast_data_row_fridge[col])),
-            key=lambda x: abs(yeast_data_row_fridge[x] - time_combined)
-        )
+    @staticmethod
+    def get_temp_range():
+        return PizzaRecipe.current_snapshot().temperature_options
 
-        self._yeast_percentage = PizzaRecipe._yeast_table_data.iloc[
-            PizzaRecipe._recipe_defaults['yeast_types'].index(self._yeast_type), col_fridge]
+    @staticmethod
+    def get_hour_range_by_temp(temp):
+        return PizzaRecipe.current_snapshot().yeast_table.hour_range(temp)
 
-        self._yeast_weight = self.calculate_yeast_weight()
+    @staticmethod
+    def mass_balance(salt, oil, hydration, ball_weight, num_balls):
+        """Flour, water, salt and oil weights, rounded like the properties; needs no yeast table."""
+        total = num_balls * ball_weight
+        flour = total / (1 + (hydration + (0 if oil is None else oil) + (0 if salt is None else salt)) / 100)
+        salt_weight = 0 if salt is None else (flour * salt) / 100
+        oil_weight = 0 if oil is None else (flour * oil) / 100
+        water = total - flour - salt_weight - math.floor(oil_weight)  # As calculate_water_weight
+        return math.ceil(flour), math.ceil(water), math.floor(salt_weight), math.floor(oil_weight)
+
+    def calculate_yeast_percentage_dual(self, table=None, lookup=None):
+        """With a lookup (the yeast_lookup mode), a plain cold + room proof is one index into the precomputed
+        array; chains with earlier stages, and anything the array has no answer for, use the live table."""
+        if table is None:
+            snapshot = PizzaRecipe.current_snapshot()
+            table, lookup = snapshot.yeast_table, snapshot.lookup
+
+        self._recompute_counts['yeast'] += 1
+
+        percentage = None
+        if lookup is not None and not self._pre_stages:
+            percentage = lookup.percentage(self._yeast_type, self._fridge_temp, self._fridge_fermentation,
+                                           self._room_temp, self._room_fermentation)
+        if percentage is None:
+            percentage = table.yeast_percentage_chain(
+                self._yeast_type, [(stage.temp, stage.hours) for stage in self._pre_stages] +
+                [(self._fridge_temp, self._fridge_fermentation), (self._room_temp, self._room_fermentation)])
+        self._yeast_percentage = percentage
+        self._yeast_dirty = False
+        self._yeast_weight_dirty = True
 
     def calculate_salt_weight(self):
         return 0 if self._salt is None else (self._flour * self._salt) / 100
@@ -144,16 +313,19 @@ class PizzaRecipe:
         return 0 if self._oil is None else (self._flour * self._oil) / 100
 
     def calculate_yeast_weight(self):
+        self._ensure_mass_balance()
         return (self._flour * self._yeast_percentage) / 100
 
     # Getters and Setters
 
     @property
     def flour(self):
+        self._ensure_mass_balance()
         return math.ceil(self._flour)
 
     @property
     def water(self):
+        self._ensure_mass_balance()
         return math.ceil(self._water)
 
     @property
@@ -163,11 +335,11 @@ class PizzaRecipe:
     @salt.setter
     def salt(self, value):
         self._salt = value
-        self.recalculate()
-        self.recalculate_yeast()
+        self._invalidate(mass_balance=True)
 
     @property
     def salt_weight(self):
+        self._ensure_mass_balance()
         return math.floor(self._salt_weight)
 
     @property
@@ -177,11 +349,11 @@ class PizzaRecipe:
     @oil.setter
     def oil(self, value):
         self._oil = value
-        self.recalculate()
-        self.recalculate_yeast()
+        self._invalidate(mass_balance=True)
 
     @property
     def oil_weight(self):
+        self._ensure_mass_balance()
         return math.floor(self._oil_weight)
 
     @property
@@ -191,8 +363,7 @@ class PizzaRecipe:
     @hydration.setter
     def hydration(self, value):
         self._hydration = value
-        self.recalculate()
-        self.recalculate_yeast()
+        self._invalidate(mass_balance=True)
 
     @property
     def ball_weight(self):
@@ -201,8 +372,7 @@ class PizzaRecipe:
     @ball_weight.setter
     def ball_weight(self, value):
         self._ball_weight = value
-        self.recalculate()
-        self.recalculate_yeast()
+        self._invalidate(mass_balance=True)
 
     @property
     def num_balls(self):
@@ -211,8 +381,7 @@ class PizzaRecipe:
     @num_balls.setter
     def num_balls(self, value):
         self._num_balls = value
-        self.recalculate()
-        self.recalculate_yeast()
+        self._invalidate(mass_balance=True)
 
     @property
     def yeast_type(self):
@@ -221,12 +390,21 @@ class PizzaRecipe:
     @yeast_type.setter
     def yeast_type(self, value):
         self._yeast_type = value
-        self.recalculate_yeast()
+        self._invalidate(yeast=True)
 
     @property
     def yeast_weight(self):
+        self._ensure_yeast()
+        if self._yeast_weight_dirty:
+            self._yeast_weight = self.calculate_yeast_weight()
+            self._yeast_weight_dirty = False
         return self._yeast_weight
 
+    @property
+    def yeast_percentage(self):
+        self._ensure_yeast()
+        return self._yeast_percentage
+
     @property
     def room_temp(self):
         return self._room_temp
@@ -234,7 +412,7 @@ class PizzaRecipe:
     @room_temp.setter
     def room_temp(self, value):
         self._room_temp = value
-        self.recalculate_yeast()
+        self._invalidate(yeast=True)
 
     @property
     def fridge_temp(self):
@@ -243,29 +421,48 @@ class PizzaRecipe:
     @fridge_temp.setter
     def fridge_temp(self, value):
         self._fridge_temp = value
-        self.recalculate_yeast()
+        self._invalidate(yeast=True)
 
     @property
     def room_fermentation(self):
+        self._ensure_hours()
         return self._room_fermentation
 
     @room_fermentation.setter
     def room_fermentation(self, value):
         self._room_fermentation = value
-        self.recalculate_yeast()
+        self._invalidate(yeast=True)
 
     @property
     def fridge_fermentation(self):
+        self._ensure_hours()
         return self._fridge_fermentation
 
     @fridge_fermentation.setter
     def fridge_fermentation(self, value):
         self._fridge_fermentation = value
-        self.recalculate_yeast()
+        self._invalidate(yeast=True)
+
+    @property
+    def pre_stages(self):
+        """Stages before the cold proof, in order, as FermentationStage values."""
+        self._ensure_hours()
+        return self._pre_stages
+
+    @pre_stages.setter
+    def pre_stages(self, value):
+        self._pre_stages = parse_stages(value)
+        self._invalidate(yeast=True)
+
+    @property
+    def stages(self):
+        """Every stage in order, ending with the cold and room proofs."""
+        return self.pre_stages + (FermentationStage("Cold Proof", self.fridge_temp, self.fridge_fermentation),
+                                  FermentationStage("Room Proof", self.room_temp, self.room_fermentation))
 
     @staticmethod
     def get_yeast_types():
-        return PizzaRecipe._recipe_defaults['yeast_types']
+        return PizzaRecipe.current_snapshot().recipe_defaults['yeast_types']
 
     def to_string(self):
         return (f"Flour: {self.flour}g\n"
@@ -273,6 +470,7 @@ class PizzaRecipe:
                 f"Salt: {self.salt_weight}g\n"
                 f"Oil: {self.oil_weight}g\n"
                 f"Yeast: {self.yeast_weight:.3f}g of {self.yeast_type}\n"
+                f"{format_pre_stages(self.pre_stages)}"
                 f"Cold Proof: {round(self.fridge_fermentation)} hours at {self.fridge_temp:.1f}°C\n"
                 f"Room Proof: {round(self.room_fermentation)} hours at {self.room_temp:.1f}°C\n"
                 f"Total: {self.num_balls} dough balls, each weighing {self.ball_weight}g")
@@ -0,0 +1,268 @@
+# recipe_export.py
+#
+# Headless bulk export of the saved recipes, and the matching import:
+#   python recipe_export.py export -o recipes.parquet       # or .feather / .csv; reads the recipe store
+#   python recipe_export.py export -o all.csv --legacy-folder data   # plus per-save JSON files not yet imported
+#   python recipe_export.py import recipes.parquet
+
+import argparse
+import csv
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from recipe_spec import as_number
+from recipe_store import RECIPE_FIELDS
+
+EXPORT_COLUMNS = RECIPE_FIELDS + ("source",)
+TEXT_COLUMNS = ("yeast_type", "pre_stages", "source")
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("Parquet and Feather need pyarrow (pip install pyarrow); use a .csv file instead.")
+    return pyarrow
+
+
+def detect_format(path, fmt=None):
+    fmt = fmt or FORMATS.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of {path}; use .csv, .parquet or .feather.")
+    return fmt
+
+
+# Export
+
+def spec_row(data, defaults, source):
+    """One export row from a saved recipe dict, normalized through RecipeSpec whichever source it came from."""
+    from recipe_spec import RecipeSpec
+    row = RecipeSpec.from_dict(data, defaults).to_dict()
+    row["pre_stages"] = json.dumps(row["pre_stages"]) if row["pre_stages"] else None
+    row["source"] = source
+    return row
+
+
+def scan_store(store, batch_size=500):
+    """Yield lists of export rows for every recipe in the store, in id order."""
+    from batch import default_inputs
+    defaults = default_inputs()
+    for batch in store.iter_batches(batch_size):
+        yield [spec_row(data, defaults, data.get("source") or f"{store.path}#{data['id']}") for data in batch]
+
+
+def read_recipe_file(path, defaults):
+    """One export row from a saved recipe JSON file, or None if it is not a recipe."""
+    try:
+        with open(path, 'r') as file:
+            data = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Skipping {path}: {e}")
+        return None
+    if not isinstance(data, dict) or not any(field in data for field in RECIPE_FIELDS):
+        return None
+    try:
+        return spec_row(data, defaults, str(path))
+    except (KeyError, TypeError, ValueError) as e:
+        logging.warning(f"Skipping {path}: {e}")
+        return None
+
+
+def read_recipe_files(paths, defaults):
+    return [row for row in (read_recipe_file(path, defaults) for path in paths) if row is not None]
+
+
+def scan_recipes(folder, workers=None, batch_size=500):
+    """Yield lists of export rows for the *.json files in folder, parsed on a thread pool.
+
+    Files are listed lazily and at most 2 * workers batches are in flight, so memory stays bounded however
+    large the folder is. Batches come out in directory order.
+    """
+    from batch import default_inputs
+    defaults = default_inputs()
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)  # File reads are I/O bound
+    paths = (entry.path for entry in os.scandir(folder) if entry.name.endswith(".json") and entry.is_file())
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while batch := list(islice(paths, batch_size)):
+            pending.append(executor.submit(read_recipe_files, batch, defaults))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _values(values):
+    """A column as a plain list; NumPy arrays are converted to Python scalars first."""
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+class CsvRecipeWriter:
+    """Writes batches of rows (dicts) or of columns (one sequence per column) to CSV as they arrive."""
+
+    def __init__(self, path, columns=EXPORT_COLUMNS, text_columns=TEXT_COLUMNS):
+        self.columns = columns
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows([row[name] for name in self.columns] for row in rows)
+
+    def write_columns(self, columns):
+        self._writer.writerows(zip(*(_values(columns[name]) for name in self.columns)))
+
+    def close(self):
+        self._file.close()
+
+
+class ArrowRecipeWriter:
+    """Writes each batch of rows or columns as one Parquet row group or Feather record batch as it arrives."""
+
+    def __init__(self, path, fmt, columns=EXPORT_COLUMNS, text_columns=TEXT_COLUMNS):
+        pa = require_pyarrow()
+        self._pa = pa
+        self.columns = columns
+        self.text_columns = text_columns
+        self.schema = pa.schema([(name, pa.string() if name in text_columns else pa.float64()) for name in columns])
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)  # Feather v2 is the Arrow IPC file format
+
+    def write(self, rows):
+        if rows:
+            self.write_columns({name: [row[name] for row in rows] for name in self.columns})
+
+    def write_columns(self, columns):
+        columns = {name: columns[name] for name in self.columns}
+        for name, values in columns.items():
+            if hasattr(values, "astype"):  # NumPy columns: str for text, float64 for the rest, as in the schema
+                columns[name] = values.astype(str if name in self.text_columns else "float64")
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_writer(path, fmt=None, columns=EXPORT_COLUMNS, text_columns=TEXT_COLUMNS):
+    """A CSV, Parquet or Feather writer for path with the given columns (the recipe export's by default)."""
+    fmt = detect_format(path, fmt)
+    if fmt == "csv":
+        return CsvRecipeWriter(path, columns, text_columns)
+    return ArrowRecipeWriter(path, fmt, columns, text_columns)
+
+
+def export_recipes(out_path, fmt=None, store=None, legacy_folder=None, workers=None, batch_size=500):
+    """Export the recipe store (RecipeStore.default() unless given) to out_path; returns the rows written.
+
+    With legacy_folder, per-save JSON files from before the store are appended too, skipping files the store
+    already imported. Pass store=False to export only the folder.
+    """
+    if store is None:
+        from recipe_store import RecipeStore
+        store = RecipeStore.default()
+    writer = open_writer(out_path, fmt)
+    count = 0
+    imported = set()
+    try:
+        if store:
+            for rows in scan_store(store, batch_size):
+                writer.write(rows)
+                imported.update(row["source"] for row in rows)
+                count += len(rows)
+        if legacy_folder is not None:
+            for rows in scan_recipes(legacy_folder, workers, batch_size):
+                rows = [row for row in rows if str(Path(row["source"]).resolve()) not in imported]
+                writer.write(rows)
+                count += len(rows)
+    finally:
+        writer.close()
+    return count
+
+
+def export_folder(folder, out_path, fmt=None, workers=None, batch_size=500):
+    """Export only the per-save JSON files in folder (the legacy save format); returns the rows written."""
+    return export_recipes(out_path, fmt, store=False, legacy_folder=folder, workers=workers, batch_size=batch_size)
+
+
+# Import
+
+def read_export(path, fmt=None, batch_size=5000):
+    """Yield lists of row dicts (RecipeManager's JSON keys) from an exported file, batch_size at a time."""
+    fmt = detect_format(path, fmt)
+    if fmt == "csv":
+        with open(path, 'r', newline='') as file:
+            reader = csv.DictReader(file)
+            while batch := list(islice(reader, batch_size)):
+                yield [_typed_row(row) for row in batch]
+        return
+
+    pa = require_pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+    else:
+        reader = pa.ipc.open_file(path)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        yield [_typed_row(row) for row in batch.to_pylist()]
+
+
+def _typed_row(row):
+    return {name: (row.get(name) or None) if name in TEXT_COLUMNS else as_number(row.get(name))
+            for name in EXPORT_COLUMNS}
+
+
+def iter_recipes(path, fmt=None):
+    """PizzaRecipe objects recreated from an exported file, one at a time."""
+    from manager import RecipeManager
+    for rows in read_export(path, fmt):
+        for row in rows:
+            yield RecipeManager.from_dict(row)
+
+
+def iter_specs(path, fmt=None, batch_size=5000):
+    """Lists of RecipeSpec from an exported file, ready for batch.compute_specs."""
+    from batch import default_inputs
+    from recipe_spec import RecipeSpec
+    defaults = default_inputs()
+    for rows in read_export(path, fmt, batch_size):
+        yield [RecipeSpec.from_dict(row, defaults) for row in rows]
+
+
+if __name__ == "__main__":
+    from config import Configuration, configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Bulk export and import of saved recipe JSON files.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help="write the saved recipes to CSV, Parquet or Feather")
+    export_parser.add_argument('-o', '--output', required=True, help="output file (.csv, .parquet or .feather)")
+    export_parser.add_argument('--store', default=str(Configuration.get_recipe_store_path()),
+                               help="recipe store to export (default: the configured one)")
+    export_parser.add_argument('--legacy-folder', nargs='?', const=str(Configuration.get_recipe_folder_path()),
+                               metavar='FOLDER', help="also export per-save JSON files (default: the recipe folder)")
+    export_parser.add_argument('--format', choices=('csv', 'parquet', 'feather'))
+    export_parser.add_argument('--workers', type=int, default=None, help="reader threads for the JSON folder")
+    import_parser = commands.add_parser('import', help="read an export back and compute every recipe")
+    import_parser.add_argument('input')
+    import_parser.add_argument('--format', choices=('csv', 'parquet', 'feather'))
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        from recipe_store import RecipeStore
+        written = export_recipes(args.output, args.format, RecipeStore(args.store), args.legacy_folder, args.workers)
+        print(f"Exported {written} recipes to {args.output}")
+    else:
+        from batch import compute_specs
+        total = 0
+        for specs in iter_specs(args.input, args.format):
+            total += len(compute_specs(specs))
+        print(f"Imported and computed {total} recipes from {args.input}")
@@ -0,0 +1,151 @@
+# recipe_spec.py
+
+from dataclasses import dataclass, fields
+import json
+
+# RecipeManager's JSON keys for the RecipeSpec fields
+JSON_KEYS = {
+    "salt": "salt_percentage",
+    "oil": "oil_percentage",
+    "hydration": "hydration",
+    "ball_weight": "ball_weight",
+    "num_balls": "num_balls",
+    "yeast_type": "yeast_type",
+    "fridge_temp": "fridge_temp",
+    "fridge_fermentation": "fridge_fer",
+    "room_temp": "room_temp",
+    "room_fermentation": "room_fer",
+    "pre_stages": "pre_stages",
+}
+
+
+def as_number(value):
+    """Numbers and numeric strings (CSV cells) as int when integral, else float; None for empty cells.
+
+    Raises ValueError or TypeError for anything else.
+    """
+    if value is None or value == '':
+        return None
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+@dataclass(frozen=True, slots=True)
+class FermentationStage:
+    """A proofing stage that runs before the cold proof, e.g. a bulk ferment at room temperature."""
+    name: str
+    temp: float
+    hours: float
+
+    @classmethod
+    def from_value(cls, value):
+        """From a {"name", "temp", "hours"} dict, a (name, temp, hours) or (temp, hours) sequence, or a stage."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls(str(value.get("name") or "Stage"), as_number(value["temp"]), as_number(value["hours"]))
+        if len(value) == 2:
+            return cls("Stage", as_number(value[0]), as_number(value[1]))
+        name, temp, hours = value
+        return cls(str(name), as_number(temp), as_number(hours))
+
+    def to_dict(self):
+        return {"name": self.name, "temp": self.temp, "hours": self.hours}
+
+
+def parse_stages(value):
+    """Tuple of FermentationStage from a list (or its JSON text, as stored in CSV cells and the recipe store)."""
+    if value is None or value == '':
+        return ()
+    if isinstance(value, str):
+        value = json.loads(value)
+    return tuple(FermentationStage.from_value(stage) for stage in value)
+
+
+def format_pre_stages(stages):
+    """The to_string lines for the stages before the cold proof (empty if there are none)."""
+    return "".join(f"{stage.name}: {round(stage.hours)} hours at {stage.temp:.1f}°C\n" for stage in stages)
+
+
+@dataclass(frozen=True, slots=True)
+class RecipeSpec:
+    """Immutable recipe inputs. Field names and order match batch.RECIPE_COLUMNS, then the earlier stages."""
+    salt: float
+    oil: float
+    hydration: float
+    ball_weight: float
+    num_balls: float
+    yeast_type: str
+    fridge_temp: float
+    fridge_fermentation: float
+    room_temp: float
+    room_fermentation: float
+    pre_stages: tuple = ()  # FermentationStage values before the cold proof, in order
+
+    @classmethod
+    def from_recipe(cls, recipe):
+        return cls(*(getattr(recipe, field.name) for field in fields(cls)))
+
+    @classmethod
+    def from_dict(cls, data, defaults=None):
+        """Build from RecipeManager's JSON schema (or RecipeSpec field names); missing keys use defaults."""
+        if defaults is None:
+            from batch import default_inputs
+            defaults = default_inputs()
+        values = {}
+        for field in fields(cls):
+            value = data.get(JSON_KEYS[field.name], data.get(field.name))
+            if field.name == 'pre_stages':
+                values[field.name] = parse_stages(value)
+                continue
+            if value is None or value == '':
+                value = defaults[field.name]
+            values[field.name] = value if field.name == 'yeast_type' else as_number(value)
+        return cls(**values)
+
+    def to_dict(self):
+        """RecipeManager's JSON schema."""
+        data = {JSON_KEYS[field.name]: getattr(self, field.name) for field in fields(self)}
+        data["pre_stages"] = [stage.to_dict() for stage in self.pre_stages]
+        return data
+
+    def to_recipe(self):
+        """A PizzaRecipe with these inputs; raises TypeError or ValueError if one is invalid."""
+        from recipe import PizzaRecipe
+
+        recipe = PizzaRecipe()
+        recipe.update(**{field.name: getattr(self, field.name) for field in fields(self)})  # Validates every field
+        return recipe
+
+
+@dataclass(frozen=True, slots=True)
+class RecipeResult:
+    """Immutable computed recipe: the inputs (temperatures and hours as snapped) and the weights."""
+    spec: RecipeSpec
+    flour: int
+    water: int
+    salt_weight: int
+    oil_weight: int
+    yeast_percentage: float
+    yeast_weight: float
+
+    @classmethod
+    def from_recipe(cls, recipe):
+        return cls(RecipeSpec.from_recipe(recipe), recipe.flour, recipe.water, recipe.salt_weight,
+                   recipe.oil_weight, recipe.yeast_percentage, recipe.yeast_weight)
+
+    def to_recipe(self):
+        return self.spec.to_recipe()
+
+    def to_string(self):
+        """Same text as PizzaRecipe.to_string."""
+        spec = self.spec
+        return (f"Flour: {self.flour}g\n"
+                f"Water: {self.water}g\n"
+                f"Salt: {self.salt_weight}g\n"
+                f"Oil: {self.oil_weight}g\n"
+                f"Yeast: {self.yeast_weight:.3f}g of {spec.yeast_type}\n"
+                f"{format_pre_stages(spec.pre_stages)}"
+                f"Cold Proof: {round(spec.fridge_fermentation)} hours at {spec.fridge_temp:.1f}°C\n"
+                f"Room Proof: {round(spec.room_fermentation)} hours at {spec.room_temp:.1f}°C\n"
+                f"Total: {spec.num_balls} dough balls, each weighing {spec.ball_weight}g")
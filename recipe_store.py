@@ -0,0 +1,168 @@
+# recipe_store.py
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+RECIPE_FIELDS = ("salt_percentage", "oil_percentage", "yeast_type", "hydration", "ball_weight", "num_balls",
+                 "room_fer", "fridge_fer", "room_temp", "fridge_temp", "pre_stages")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    salt_percentage NUMERIC,
+    oil_percentage NUMERIC,
+    yeast_type TEXT,
+    hydration NUMERIC,
+    ball_weight NUMERIC,
+    num_balls NUMERIC,
+    room_fer REAL,
+    fridge_fer REAL,
+    room_temp REAL,
+    fridge_temp REAL,
+    pre_stages TEXT,
+    source TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS idx_recipes_hydration ON recipes (hydration);
+CREATE INDEX IF NOT EXISTS idx_recipes_yeast_type ON recipes (yeast_type);
+CREATE INDEX IF NOT EXISTS idx_recipes_schedule ON recipes (fridge_fer, room_fer, fridge_temp, room_temp);
+"""
+
+
+class RecipeStore:
+    """All saved recipes in one indexed SQLite file."""
+    _default = None
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+            columns = {row['name'] for row in self._connection.execute("PRAGMA table_info(recipes)")}
+            if 'pre_stages' not in columns:  # Stores created before multi-stage schedules
+                self._connection.execute("ALTER TABLE recipes ADD COLUMN pre_stages TEXT")
+
+    @classmethod
+    def default(cls):
+        """The store at the configured recipe_store_path, opened once per process."""
+        if cls._default is None:
+            from config import Configuration
+            cls._default = cls(Configuration.get_recipe_store_path())
+        return cls._default
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def add(self, data, created_at=None, source=None):
+        """Insert a recipe dict (RecipeManager's JSON schema) and return its id."""
+        created_at = (created_at or datetime.now()).isoformat(timespec='seconds')
+        values = [data.get(field) for field in RECIPE_FIELDS]
+        values[RECIPE_FIELDS.index("pre_stages")] = self._encode_stages(data.get("pre_stages"))
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                f"INSERT OR IGNORE INTO recipes (created_at, {', '.join(RECIPE_FIELDS)}, source) "
+                f"VALUES (?, {', '.join('?' for _ in RECIPE_FIELDS)}, ?)",
+                [created_at, *values, source])
+            return cursor.lastrowid if cursor.rowcount else None
+
+    @staticmethod
+    def _encode_stages(stages):
+        """pre_stages as JSON text, or NULL for the plain cold + room schedule."""
+        if not stages:
+            return None
+        return stages if isinstance(stages, str) else json.dumps(stages)
+
+    @staticmethod
+    def _row(row):
+        data = dict(row)
+        data['pre_stages'] = json.loads(data['pre_stages']) if data.get('pre_stages') else []
+        return data
+
+    def get(self, recipe_id):
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM recipes WHERE id = ?", (recipe_id,)).fetchone()
+        return None if row is None else self._row(row)
+
+    def count(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    def query(self, limit=None, **filters):
+        """Recipes matching every filter, newest first.
+
+        Filters are column names from RECIPE_FIELDS; a value matches exactly, a (low, high) tuple
+        matches the inclusive range. hydration, yeast_type and the fermentation schedule are indexed.
+        """
+        clauses, params = [], []
+        for field, value in filters.items():
+            if field not in RECIPE_FIELDS:
+                raise ValueError(f"Unknown recipe field: {field}")
+            if isinstance(value, tuple):
+                clauses.append(f"{field} BETWEEN ? AND ?")
+                params.extend(value)
+            else:
+                clauses.append(f"{field} = ?")
+                params.append(value)
+        sql = "SELECT * FROM recipes"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [self._row(row) for row in self._connection.execute(sql, params)]
+
+    def iter_batches(self, batch_size=5000):
+        """Every recipe in id order, batch_size rows at a time; each batch is one short query."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._connection.execute("SELECT * FROM recipes WHERE id > ? ORDER BY id LIMIT ?",
+                                                (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            yield [self._row(row) for row in rows]
+
+    def import_json_folder(self, folder):
+        """One-time import of the per-save JSON files; files already imported are skipped."""
+        imported = 0
+        for file_path in sorted(Path(folder).glob("*.json")):
+            try:
+                with open(file_path, 'r') as file:
+                    data = json.load(file)
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"Skipping {file_path}: {e}")
+                continue
+            if not isinstance(data, dict) or not any(field in data for field in RECIPE_FIELDS):
+                continue
+            created_at = datetime.fromtimestamp(file_path.stat().st_mtime)
+            if self.add(data, created_at=created_at, source=str(file_path.resolve())) is not None:
+                imported += 1
+        logging.info(f"Imported {imported} recipes from {folder}.")
+        return imported
+
+
+if __name__ == "__main__":
+    from config import Configuration, configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Manage the saved recipe store.")
+    parser.add_argument('--import-json', nargs='?', const=str(Configuration.get_recipe_folder_path()),
+                        metavar='FOLDER', help="import per-save JSON recipe files (default: the recipe folder)")
+    args = parser.parse_args()
+
+    store = RecipeStore.default()
+    if args.import_json:
+        store.import_json_folder(args.import_json)
+    print(f"{store.count()} recipes in {store.path}")
@@ -0,0 +1,107 @@
+# result_cache.py
+
+import threading
+from collections import OrderedDict
+from recipe import PizzaRecipe
+from recipe_spec import FermentationStage, RecipeSpec, RecipeResult
+
+
+class RecipeResultCache:
+    """Bounded LRU cache of computed recipes, keyed by the normalized RecipeSpec.
+
+    Temperatures are snapped to the nearest table option (those outside the options are rejected) and hours
+    to the nearest selectable value for that temperature before lookup, so every spec that computes to the
+    same recipe shares one entry.
+    The cache empties itself when PizzaRecipe reloads the yeast table.
+    """
+    _default = None
+
+    def __init__(self, maxsize=None):
+        if maxsize is None:
+            from config import Configuration
+            maxsize = Configuration.get_result_cache_size()
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._hits = self._misses = self._evictions = self._invalidations = 0
+
+    @classmethod
+    def default(cls):
+        """Process-wide cache sized by the result_cache_size config key."""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    @staticmethod
+    def normalize(spec, snapshot=None):
+        table = (PizzaRecipe.current_snapshot() if snapshot is None else snapshot).yeast_table
+        table.check_temperatures([spec.fridge_temp, spec.room_temp] + [stage.temp for stage in spec.pre_stages])
+        fridge_temp = table.nearest_temperature(spec.fridge_temp)
+        room_temp = table.nearest_temperature(spec.room_temp)
+        pre_stages = tuple(FermentationStage(stage.name, temp, table.snap_hours(temp, stage.hours))
+                           for stage in spec.pre_stages
+                           for temp in (table.nearest_temperature(stage.temp),))
+        return RecipeSpec(spec.salt, spec.oil, spec.hydration, spec.ball_weight, spec.num_balls, spec.yeast_type,
+                          fridge_temp, table.snap_hours(fridge_temp, spec.fridge_fermentation),
+                          room_temp, table.snap_hours(room_temp, spec.room_fermentation), pre_stages)
+
+    def _check_version(self, version):
+        """Drop every entry if the yeast table was reloaded since they were computed. Call with the lock held.
+
+        Returns False if version is older than the entries, i.e. the caller's snapshot is already stale.
+        """
+        if self._version is not None and version < self._version:
+            return False
+        if self._version != version:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+            self._version = version
+        return True
+
+    def get(self, spec):
+        """RecipeResult for spec, computed on a miss."""
+        snapshot = PizzaRecipe.current_snapshot()
+        key = self.normalize(spec, snapshot)
+        with self._lock:
+            current = self._check_version(snapshot.version)
+            result = self._entries.get(key) if current else None
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return result
+            self._misses += 1
+
+        result = RecipeResult.from_recipe(key.to_recipe())
+
+        with self._lock:
+            # Only keep results computed entirely against the table the entries belong to
+            if PizzaRecipe.current_snapshot() is snapshot and self._check_version(snapshot.version) \
+                    and self.maxsize > 0:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return result
+
+    def get_recipe(self, recipe):
+        return self.get(RecipeSpec.from_recipe(recipe))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,265 @@
+# server.py
+#
+# Local HTTP/JSON recipe service, so every station shares one warm engine:
+#   python server.py --port 8765
+#   curl -d '{"hydration": 65, "num_balls": 6}' http://127.0.0.1:8765/calculate
+#
+# POST /calculate     one recipe (RecipeManager's JSON keys or RecipeSpec field names)
+# POST /batch         {"recipes": [...]}, computed in worker processes; an invalid recipe gets its own "error"
+# GET  /temperatures  the temperature options
+# GET  /hours?temp=T  the hour options for temperature T
+# GET  /stats         request counts, latency and throughput per endpoint
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from config import configure_logging
+from recipe import PizzaRecipe
+from recipe_spec import RecipeSpec
+from result_cache import RecipeResultCache
+from cli import format_result, process_chunk
+from hot_reload import start_hot_reload
+from shared_table import worker_pool_setup
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceStats:
+    """Per-endpoint request counters and latencies, over the whole run and the last latency_window requests."""
+
+    def __init__(self, latency_window=1000):
+        self.started = time.monotonic()
+        self.latency_window = latency_window
+        self._endpoints = {}
+
+    def record(self, endpoint, seconds, ok, items=1):
+        entry = self._endpoints.get(endpoint)
+        if entry is None:
+            entry = self._endpoints[endpoint] = {"requests": 0, "errors": 0, "items": 0, "total_s": 0.0,
+                                                 "latencies": deque(maxlen=self.latency_window)}
+        entry["requests"] += 1
+        entry["errors"] += 0 if ok else 1
+        entry["items"] += items if ok else 0
+        entry["total_s"] += seconds
+        entry["latencies"].append(seconds)
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        endpoints = {}
+        for name, entry in self._endpoints.items():
+            latencies = sorted(entry["latencies"])
+            endpoints[name] = {
+                "requests": entry["requests"],
+                "errors": entry["errors"],
+                "items": entry["items"],
+                "requests_per_s": entry["requests"] / uptime if uptime else 0.0,
+                "items_per_s": entry["items"] / uptime if uptime else 0.0,
+                "mean_ms": entry["total_s"] / entry["requests"] * 1e3,
+                "p50_ms": latencies[len(latencies) // 2] * 1e3,
+                "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1e3,
+                "max_ms": latencies[-1] * 1e3,
+            }
+        return {"uptime_s": uptime, "table_version": PizzaRecipe.table_version(),
+                "result_cache": RecipeResultCache.default().stats(), "endpoints": endpoints}
+
+
+class RecipeServer:
+    """asyncio HTTP/1.1 server; scalar requests are answered on the event loop, batches in worker processes."""
+
+    def __init__(self, host="127.0.0.1", port=8765, workers=None, chunk_size=2000):
+        self.host = host
+        self.port = port
+        self.chunk_size = chunk_size
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.stats = ServiceStats()
+        self._executor = None
+        self._server = None
+        self.routes = {
+            ("POST", "/calculate"): self.calculate,
+            ("POST", "/batch"): self.batch,
+            ("GET", "/temperatures"): self.temperatures,
+            ("GET", "/hours"): self.hours,
+            ("GET", "/stats"): self.get_stats,
+        }
+
+    async def start(self):
+        PizzaRecipe.current_snapshot()  # Load config and the yeast table before accepting connections
+        initializer, initargs = worker_pool_setup()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=initializer, initargs=initargs)
+        # Start the workers now: forked later, from inside a request, they would inherit open client sockets
+        await asyncio.get_running_loop().run_in_executor(self._executor, os.getpid)
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # The real port when started with port 0
+        logging.info(f"Recipe server listening on http://{self.host}:{self.port}")
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    # Endpoints
+
+    async def calculate(self, query, body):
+        spec = RecipeSpec.from_dict(self.parse_json(body, dict))
+        return format_result(RecipeResultCache.default().get(spec)), 1
+
+    async def batch(self, query, body):
+        recipes = self.parse_json(body, dict).get("recipes")
+        if not isinstance(recipes, list) or not all(isinstance(recipe, dict) for recipe in recipes):
+            raise HttpError(400, "Expected {\"recipes\": [{...}, ...]}.")
+        loop = asyncio.get_running_loop()
+        chunks = [recipes[i:i + self.chunk_size] for i in range(0, len(recipes), self.chunk_size)]
+        results = await asyncio.gather(*(loop.run_in_executor(self._executor, process_chunk, chunk)
+                                         for chunk in chunks))
+        return {"results": [format_result(result) for chunk in results for result in chunk]}, len(recipes)
+
+    async def temperatures(self, query, body):
+        return {"temperatures": PizzaRecipe.get_temp_range()}, 1
+
+    async def hours(self, query, body):
+        try:
+            temp = float(query["temp"][0])
+        except (KeyError, ValueError):
+            raise HttpError(400, "Expected a numeric temp query parameter, e.g. /hours?temp=23.88888889")
+        table = PizzaRecipe.current_snapshot().yeast_table
+        if table.find_row(temp) is None:
+            raise HttpError(404, f"{temp} is not in the list of temperature options.")
+        return {"temp": temp, "hours": table.hour_range(temp)}, 1
+
+    async def get_stats(self, query, body):
+        return self.stats.snapshot(), 1
+
+    @staticmethod
+    def parse_json(body, expected_type):
+        try:
+            data = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            raise HttpError(400, f"Invalid JSON: {e}")
+        if not isinstance(data, expected_type):
+            raise HttpError(400, f"Expected a JSON {expected_type.__name__}.")
+        return data
+
+    # HTTP
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload = await self.dispatch(method, target, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self.write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HttpError as e:
+            self.write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_request(reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line.")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise HttpError(400, "Malformed Content-Length header.")
+        if length < 0:
+            raise HttpError(400, "Negative Content-Length header.")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Request body too large.")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        start = time.perf_counter()
+        items = 0
+        try:
+            if handler is None:
+                if any(path == url.path for _, path in self.routes):
+                    raise HttpError(405, f"{method} is not allowed on {url.path}.")
+                raise HttpError(404, f"No endpoint {url.path}.")
+            payload, items = await handler(parse_qs(url.query), body)
+            status = 200
+        except HttpError as e:
+            status, payload = e.status, {"error": str(e)}
+        except (ValueError, TypeError, IndexError) as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            logging.exception(f"{method} {url.path} failed")
+            status, payload = 500, {"error": str(e)}
+        if handler is not None:
+            self.stats.record(url.path, time.perf_counter() - start, status == 200, items)
+        return status, payload
+
+    @staticmethod
+    def write_response(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body)
+
+
+async def serve(host, port, workers, chunk_size):
+    server = await RecipeServer(host, port, workers, chunk_size).start()
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Serve recipe calculations over HTTP/JSON.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help="processes for /batch (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=2000, help="recipes per worker task in /batch")
+    args = parser.parse_args()
+
+    start_hot_reload()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.chunk_size))
+    except KeyboardInterrupt:
+        pass
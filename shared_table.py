@@ -0,0 +1,241 @@
+# shared_table.py
+#
+# The yeast table of the parent process in shared memory, so pool workers attach to it instead of each loading
+# config.json and the sheet and building their own copy of the lookup indexes.
+
+import atexit
+import logging
+import os
+import pickle
+import struct
+import threading
+from multiprocessing import shared_memory
+from types import MappingProxyType
+import numpy as np
+from config import Configuration
+from hot_reload import HotReloader, start_hot_reload
+from recipe import PizzaRecipe, TableSnapshot
+from yeast_lookup import YeastLookup
+from yeast_table import YeastTable
+
+ALIGNMENT = 64
+HEADER = struct.Struct("<Q")  # Length of the pickled layout at the start of a table segment
+SEQUENCE = struct.Struct("<Q")
+CONTROL = struct.Struct("<QQ64s")  # Sequence number, snapshot version, segment name
+CONTROL_RETRIES = 1000
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_segment(snapshot):
+    """Copy a snapshot's table into a new shared memory segment; returns the segment, closed but not unlinked.
+
+    The segment starts with a pickled layout (version, defaults, table metadata and each array's dtype, shape
+    and offset after the layout), followed by the arrays themselves.
+    """
+    arrays, meta = snapshot.yeast_table.to_arrays()
+    layout = {"version": snapshot.version, "recipe_defaults": dict(snapshot.recipe_defaults),
+              "xlsx_defaults": dict(snapshot.xlsx_defaults), "table": meta, "arrays": [],
+              "lookup": None if snapshot.lookup is None else snapshot.lookup.path}
+    size = 0
+    for name, array in arrays.items():
+        layout["arrays"].append((name, array.dtype.str, array.shape, size))
+        size = _aligned(size + array.nbytes)
+    header = pickle.dumps(layout)
+    start = _aligned(HEADER.size + len(header))
+
+    segment = shared_memory.SharedMemory(create=True, size=start + size)
+    HEADER.pack_into(segment.buf, 0, len(header))
+    segment.buf[HEADER.size:HEADER.size + len(header)] = header
+    for name, dtype, shape, offset in layout["arrays"]:
+        view = np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=start + offset)
+        view[...] = arrays[name]
+        del view  # No views may outlive close()
+    segment.close()
+    return segment
+
+
+def read_segment(segment):
+    """TableSnapshot whose table arrays are read-only views into segment (no copies)."""
+    length, = HEADER.unpack_from(segment.buf, 0)
+    layout = pickle.loads(segment.buf[HEADER.size:HEADER.size + length])
+    start = _aligned(HEADER.size + length)
+    arrays = {}
+    for name, dtype, shape, offset in layout["arrays"]:
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=start + offset)
+        arrays[name].flags.writeable = False
+    recipe_defaults = layout["recipe_defaults"]
+    recipe_defaults['yeast_types'] = tuple(recipe_defaults['yeast_types'])
+    table = YeastTable.from_arrays(arrays, layout["table"])
+    # The lookup artifact is a file, so each worker maps it itself; the page cache shares it between them
+    lookup = None if layout["lookup"] is None else YeastLookup.load(layout["lookup"], table)
+    return TableSnapshot(layout["version"], MappingProxyType(recipe_defaults),
+                         MappingProxyType(layout["xlsx_defaults"]), table, lookup)
+
+
+class SharedTablePublisher:
+    """Parent side: keeps the current snapshot in a shared memory segment and announces it in a control block.
+
+    The control block is a small fixed segment holding the version and name of the current table segment,
+    written under a sequence number so readers never see half an update. Each reload publishes a new segment
+    and unlinks the previous one; workers that still map it keep a valid mapping until they move on.
+    Segments are unlinked on stop() and at exit, and if the process dies without either, the multiprocessing
+    resource tracker unlinks them once the last process holding them is gone.
+    """
+    _default = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._control = None
+        self._segment = None
+        self._sequence = 0
+        self.version = None
+
+    @classmethod
+    def default(cls):
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    @property
+    def control_name(self):
+        return self._control.name
+
+    def start(self):
+        """Publish the current snapshot and every later hot reload. Idempotent."""
+        with self._lock:
+            if self._control is not None:
+                return self
+            self._control = shared_memory.SharedMemory(create=True, size=CONTROL.size)
+            atexit.register(self.stop)
+        self.publish(PizzaRecipe.current_snapshot())
+
+        HotReloader.default().add_listener(self.publish)
+        start_hot_reload()
+        return self
+
+    def publish(self, snapshot):
+        segment = write_segment(snapshot)
+        with self._lock:
+            if self._control is None or (self.version is not None and snapshot.version <= self.version):
+                segment.unlink()  # Stopped meanwhile, or a newer snapshot got here first
+                return
+            previous, self._segment, self.version = self._segment, segment, snapshot.version
+            SEQUENCE.pack_into(self._control.buf, 0, self._sequence + 1)  # Odd while the update is in progress
+            CONTROL.pack_into(self._control.buf, 0, self._sequence + 1, snapshot.version, segment.name.encode())
+            self._sequence += 2
+            SEQUENCE.pack_into(self._control.buf, 0, self._sequence)
+        if previous is not None:
+            previous.unlink()
+        logging.info(f"Published yeast table version {snapshot.version} in shared memory ({segment.size} bytes).")
+
+    def stop(self):
+        with self._lock:
+            control, segment = self._control, self._segment
+            self._control = self._segment = None
+            self.version = None
+        for shm in (segment, control):
+            if shm is not None:
+                try:
+                    shm.close()
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def read_control(control):
+    """(version, segment name) from a control block, retried until a consistent read."""
+    for _ in range(CONTROL_RETRIES):
+        sequence, version, name = CONTROL.unpack_from(control.buf, 0)
+        if sequence % 2 == 0 and sequence > 0 and SEQUENCE.unpack_from(control.buf, 0)[0] == sequence:
+            return version, name.rstrip(b"\0").decode()
+    raise RuntimeError("No consistent yeast table announcement in the shared control block.")
+
+
+class SharedTableFollower:
+    """Worker side: attaches to the parent's published snapshot and follows its reloads.
+
+    If the parent dies without shutting the pool down, the worker exits on the next poll instead of lingering
+    as an orphan, so the resource tracker can unlink the segments.
+    """
+    _default = None
+
+    def __init__(self, control_name, interval=None):
+        self.interval = Configuration.get_hot_reload_interval() if interval is None else interval
+        self._control = shared_memory.SharedMemory(name=control_name)
+        self._segments = []  # Attached segments, newest last; older ones are closed once nothing uses them
+        self.version = None
+        self._parent_pid = os.getppid()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check(self):
+        """Adopt the published snapshot if it is newer than ours; returns True if it was."""
+        version, name = read_control(self._control)
+        if self.version is not None and version <= self.version:
+            return False
+        try:
+            segment = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return False  # Replaced again before we got to it; the next check sees the newer one
+        snapshot = read_segment(segment)
+        self._segments.append(segment)
+        self.version = version
+        PizzaRecipe.adopt_snapshot(snapshot)
+        self.release_unused()
+        return True
+
+    def release_unused(self):
+        """Unmap older segments once no recipe, cache entry or array view in this process still uses them."""
+        keep = []
+        for segment in self._segments[:-1]:
+            try:
+                segment.close()
+            except BufferError:
+                keep.append(segment)  # Still exported to arrays that are alive; try again after the next reload
+        self._segments[:-1] = keep
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if os.getppid() != self._parent_pid:
+                logging.error("The process that published the yeast table is gone; exiting worker.")
+                os._exit(1)
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"Following the shared yeast table failed: {e}")
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="shared-table", daemon=True)
+            self._thread.start()
+        return self
+
+
+def attach_shared_table(control_name):
+    """Pool initializer: use the parent's shared table instead of loading one, and follow its reloads."""
+    follower = SharedTableFollower(control_name)
+    for _ in range(CONTROL_RETRIES):
+        if follower.check():  # Fails only if a reload replaced the segment between reading its name and opening it
+            SharedTableFollower._default = follower.start()
+            return
+    raise RuntimeError(f"Could not attach to the yeast table published in {control_name}.")
+
+
+def warm_worker():
+    """Pool initializer without the shared table: load the engine once and keep it current."""
+    PizzaRecipe.current_snapshot()
+    start_hot_reload()
+
+
+def worker_pool_setup():
+    """(initializer, initargs) for a process pool that computes recipes, per the shared_worker_table setting.
+
+    With the setting on (the default) workers attach to this process's table in shared memory; otherwise each
+    loads its own and watches the files itself.
+    """
+    if not Configuration.get_shared_worker_table():
+        return warm_worker, ()
+    return attach_shared_table, (SharedTablePublisher.default().start().control_name,)
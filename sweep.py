@@ -0,0 +1,287 @@
+# sweep.py
+#
+# Evaluate the Cartesian product of ranges of recipe inputs on a process pool, streaming rows to disk and
+# collecting summary tables as it goes:
+#   python sweep.py --set hydration=60:80:5 --set room_temp=all --set room_fermentation=all -o sweep.csv
+#   python sweep.py --set fridge_temp=all --set fridge_fermentation=all --pivot fridge_temp,fridge_fermentation
+# A range is a comma-separated list, start:stop:step (stop included) or "all": every yeast type, every
+# temperature option, or every selectable hour at each swept temperature. Unset inputs take the recipe defaults.
+
+import argparse
+import csv
+import logging
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+from batch import RECIPE_COLUMNS, compute_recipes, default_inputs
+from recipe import PizzaRecipe
+from recipe_export import open_writer
+from shared_table import worker_pool_setup
+
+OUTPUT_COLUMNS = RECIPE_COLUMNS + ("flour", "water", "salt_weight", "oil_weight", "yeast_percentage", "yeast_weight")
+HOUR_TEMPERATURES = {"fridge_fermentation": "fridge_temp", "room_fermentation": "room_temp"}
+DEFAULT_PIVOTS = (("room_temp", "room_fermentation", "yeast_percentage"),)
+
+
+def parse_range(text):
+    """A range argument as a list of values, or "all"."""
+    text = text.strip()
+    if text == "all":
+        return "all"
+    if ":" in text:
+        start, stop, step = (float(part) for part in text.split(":"))
+        if step <= 0:
+            raise ValueError(f"The step of {text} must be positive.")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        return [round(start + i * step, 9) for i in range(count)]
+    return [value.strip() for value in text.split(",") if value.strip()]
+
+
+def build_axes(ranges, snapshot=None):
+    """The product's axes as (names, values) pairs, where values is a list of tuples, one entry per name.
+
+    Hours swept with "all" depend on the temperature, so each one forms a joint axis with its temperature
+    (every temperature paired with each of its hours) instead of an axis of its own.
+    """
+    snapshot = PizzaRecipe.current_snapshot() if snapshot is None else snapshot
+    table = snapshot.yeast_table
+    defaults = default_inputs(snapshot)
+    unknown = set(ranges) - set(RECIPE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Cannot sweep {sorted(unknown)}; choose from {list(RECIPE_COLUMNS)}.")
+
+    def values(name):
+        spec = ranges.get(name)
+        if spec is None:
+            return [defaults[name]]
+        if spec == "all":
+            if name == "yeast_type":
+                return list(table.yeast_types)
+            if name in ("fridge_temp", "room_temp"):
+                return list(table.temperature_options)
+            raise ValueError(f"{name} cannot be swept over all values; give a list or start:stop:step.")
+        return [str(value) for value in spec] if name == "yeast_type" else [float(value) for value in spec]
+
+    joint = {temp for hours, temp in HOUR_TEMPERATURES.items() if ranges.get(hours) == "all"}
+    axes = [((name,), [(value,) for value in values(name)]) for name in RECIPE_COLUMNS
+            if name not in HOUR_TEMPERATURES and name not in joint]
+    for hours_name, temp_name in HOUR_TEMPERATURES.items():
+        if temp_name in joint:
+            temps = dict.fromkeys(table.nearest_temperature(temp) for temp in values(temp_name))
+            pairs = [(temp, hours) for temp in temps for hours in sorted(set(table.hour_range(temp)))]
+            axes.append(((temp_name, hours_name), pairs))
+        else:
+            axes.append(((hours_name,), [(value,) for value in values(hours_name)]))
+    return axes
+
+
+def sweep_size(axes):
+    return math.prod(len(values) for _, values in axes)
+
+
+def sweep_chunk(axes, start, stop):
+    """Worker entry point: inputs and results for the flat product indexes start..stop, as columns."""
+    shape = tuple(len(values) for _, values in axes)
+    indexes = np.unravel_index(np.arange(start, stop), shape)
+    params = {}
+    for (names, values), index in zip(axes, indexes):
+        for position, name in enumerate(names):
+            column = [value[position] for value in values]
+            params[name] = np.asarray(column, dtype=str if name == "yeast_type" else np.float64)[index]
+    results = compute_recipes(params)
+    # Temperatures and hours as actually used, i.e. snapped to the table
+    return {name: results[name] if name in results else params[name] for name in OUTPUT_COLUMNS}
+
+
+def iter_sweep(axes, workers=None, chunk_size=50000, max_pending=None):
+    """Yield result chunks in product order; at most max_pending chunks are in memory at once."""
+    total = sweep_size(axes)
+    bounds = ((start, min(start + chunk_size, total)) for start in range(0, total, chunk_size))
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    if workers <= 1:
+        for start, stop in bounds:
+            yield sweep_chunk(axes, start, stop)
+        return
+
+    max_pending = max_pending or 2 * workers
+    initializer, initargs = worker_pool_setup()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        for start, stop in bounds:
+            pending.append(executor.submit(sweep_chunk, axes, start, stop))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Output
+
+def _label(value):
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+class PivotSummary:
+    """Count, mean, min and max of one output column for every (row value, column value) cell, built up chunk
+    by chunk so the sweep itself is never held in memory."""
+
+    def __init__(self, row_field, col_field, value_field="yeast_percentage"):
+        for name in (row_field, col_field, value_field):
+            if name not in OUTPUT_COLUMNS:
+                raise ValueError(f"Unknown sweep column {name}; choose from {list(OUTPUT_COLUMNS)}.")
+        self.row_field, self.col_field, self.value_field = row_field, col_field, value_field
+        self._cells = {}  # (row value, column value) -> [count, sum, min, max]
+
+    @property
+    def name(self):
+        return f"{self.value_field}_by_{self.row_field}_x_{self.col_field}"
+
+    def add(self, chunk):
+        row_values, row_inverse = np.unique(chunk[self.row_field], return_inverse=True)
+        col_values, col_inverse = np.unique(chunk[self.col_field], return_inverse=True)
+        codes = row_inverse.reshape(-1) * len(col_values) + col_inverse.reshape(-1)
+        present, inverse = np.unique(codes, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        cells = [(row_values[code // len(col_values)].item(), col_values[code % len(col_values)].item())
+                 for code in present.tolist()]
+        values = chunk[self.value_field].astype(np.float64)
+        counts = np.bincount(inverse, minlength=len(cells))
+        sums = np.bincount(inverse, weights=values, minlength=len(cells))
+        mins = np.full(len(cells), np.inf)
+        maxs = np.full(len(cells), -np.inf)
+        np.minimum.at(mins, inverse, values)
+        np.maximum.at(maxs, inverse, values)
+        for (row, col), count, total, low, high in zip(cells, counts, sums, mins, maxs):
+            cell = self._cells.get((row, col))
+            if cell is None:
+                self._cells[(row, col)] = [int(count), float(total), float(low), float(high)]
+            else:
+                cell[0] += int(count)
+                cell[1] += float(total)
+                cell[2] = min(cell[2], float(low))
+                cell[3] = max(cell[3], float(high))
+
+    def table(self, statistic="mean"):
+        """(row values, column values, 2-D array of the statistic; NaN where a cell never occurred)."""
+        rows = sorted({row for row, _ in self._cells})
+        cols = sorted({col for _, col in self._cells})
+        grid = np.full((len(rows), len(cols)), np.nan)
+        row_index = {row: i for i, row in enumerate(rows)}
+        col_index = {col: i for i, col in enumerate(cols)}
+        for (row, col), (count, total, low, high) in self._cells.items():
+            grid[row_index[row], col_index[col]] = {"mean": total / count, "min": low, "max": high,
+                                                    "count": count}[statistic]
+        return rows, cols, grid
+
+    def write_csv(self, path, statistic="mean"):
+        rows, cols, grid = self.table(statistic)
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([f"{self.row_field} \\ {self.col_field}"] + cols)
+            for row, values in zip(rows, grid.tolist()):
+                writer.writerow([row] + ["" if value != value else value for value in values])
+
+    def write_heatmap(self, path, statistic="mean"):
+        try:
+            import matplotlib
+            matplotlib.use("Agg")
+            import matplotlib.pyplot as plt
+        except ImportError:
+            raise RuntimeError("Heatmaps need matplotlib (pip install matplotlib); the CSV tables are written anyway.")
+        rows, cols, grid = self.table(statistic)
+        figure, axes = plt.subplots(figsize=(max(6, len(cols) * 0.4), max(4, len(rows) * 0.25)))
+        image = axes.imshow(np.ma.masked_invalid(grid), aspect="auto", origin="lower", cmap="viridis")
+        axes.set_xticks(range(len(cols)), [_label(col) for col in cols], rotation=90)
+        axes.set_yticks(range(len(rows)), [_label(row) for row in rows])
+        axes.set_xlabel(self.col_field)
+        axes.set_ylabel(self.row_field)
+        axes.set_title(f"{statistic} {self.value_field}")
+        figure.colorbar(image, ax=axes)
+        figure.tight_layout()
+        figure.savefig(path)
+        plt.close(figure)
+
+
+class ColumnSummary:
+    """Running count, min, mean and max of every numeric output column."""
+
+    def __init__(self):
+        self.count = 0
+        self._stats = {}
+
+    def add(self, chunk):
+        self.count += len(chunk["flour"])
+        for name in OUTPUT_COLUMNS:
+            if name == "yeast_type":
+                continue
+            values = chunk[name].astype(np.float64)
+            total, low, high = self._stats.get(name, (0.0, np.inf, -np.inf))
+            self._stats[name] = (total + float(values.sum()), min(low, float(values.min())),
+                                 max(high, float(values.max())))
+
+    def to_string(self):
+        lines = [f"{'column':<22}{'min':>14}{'mean':>14}{'max':>14}"]
+        for name, (total, low, high) in self._stats.items():
+            lines.append(f"{name:<22}{low:>14.4f}{total / self.count:>14.4f}{high:>14.4f}")
+        return "\n".join(lines)
+
+
+def run_sweep(ranges, out_path=None, fmt=None, pivots=DEFAULT_PIVOTS, workers=None, chunk_size=50000):
+    """Evaluate the sweep, writing rows to out_path (if given) as they arrive. Returns (columns, pivot summaries)."""
+    axes = build_axes(ranges)
+    columns = ColumnSummary()
+    summaries = [PivotSummary(*pivot) for pivot in pivots]
+    writer = None if out_path is None else open_writer(out_path, fmt, OUTPUT_COLUMNS, text_columns=("yeast_type",))
+    total = sweep_size(axes)
+    logging.info(f"Sweeping {total} recipes over {', '.join('+'.join(names) for names, _ in axes)}.")
+    try:
+        for chunk in iter_sweep(axes, workers, chunk_size):
+            if writer is not None:
+                writer.write_columns(chunk)
+            columns.add(chunk)
+            for summary in summaries:
+                summary.add(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return columns, summaries
+
+
+if __name__ == "__main__":
+    from config import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Sweep recipe inputs over ranges and summarize the results.")
+    parser.add_argument('--set', dest='ranges', action='append', default=[], metavar='NAME=RANGE',
+                        help="values of one input: a,b,c or start:stop:step or all (repeatable)")
+    parser.add_argument('-o', '--output', help="stream every row to this .csv, .parquet or .feather file")
+    parser.add_argument('--format', choices=('csv', 'parquet', 'feather'))
+    parser.add_argument('--pivot', action='append', metavar='ROW,COLUMN[,VALUE]',
+                        help="summary table of VALUE (default yeast_percentage) by ROW x COLUMN (repeatable)")
+    parser.add_argument('--summary-dir', default='.', help="folder for the pivot tables and heatmaps")
+    parser.add_argument('--heatmaps', action='store_true', help="also draw each pivot as a PNG (needs matplotlib)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="recipes per worker task")
+    args = parser.parse_args()
+
+    ranges = {}
+    for item in args.ranges:
+        name, _, spec = item.partition("=")
+        ranges[name.strip()] = parse_range(spec)
+    pivots = DEFAULT_PIVOTS if not args.pivot else [tuple(pivot.split(",")) for pivot in args.pivot]
+
+    columns, summaries = run_sweep(ranges, args.output, args.format, pivots, args.workers, args.chunk_size)
+    print(f"{columns.count} recipes")
+    print(columns.to_string())
+    summary_dir = Path(args.summary_dir)
+    summary_dir.mkdir(parents=True, exist_ok=True)
+    for summary in summaries:
+        path = summary_dir / f"{summary.name}.csv"
+        summary.write_csv(path)
+        print(f"Wrote {path}")
+        if args.heatmaps:
+            summary.write_heatmap(summary_dir / f"{summary.name}.png")
+            print(f"Wrote {summary_dir / f'{summary.name}.png'}")
@@ -0,0 +1,9 @@
+# tests/conftest.py
+
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)  # config.json paths are relative to the project root
@@ -0,0 +1,102 @@
+# tests/test_batch.py
+
+import numpy as np
+import pytest
+from batch import compute_recipes, compute_specs, default_inputs
+from cli import process_chunk
+from planner import FermentationPlanner
+from recipe import PizzaRecipe
+from recipe_spec import FermentationStage, RecipeResult, RecipeSpec
+from result_cache import RecipeResultCache
+
+
+def test_temperatures_outside_the_table_are_rejected_on_every_path():
+    spec = RecipeSpec.from_dict({"room_temp": 1000})
+    with pytest.raises(ValueError, match="temperature range"):
+        compute_specs([spec])
+    with pytest.raises(ValueError, match="temperature range"):
+        RecipeResultCache.normalize(spec)
+    with pytest.raises(ValueError, match="temperature range"):
+        compute_recipes({"fridge_temp": [4, -40]})
+    with pytest.raises(ValueError, match="temperature range"):
+        compute_recipes({"pre_stages": [[FermentationStage("bulk", 90, 2)]]})
+    with pytest.raises(ValueError, match="temperature range"):
+        FermentationPlanner.default().candidates(10, 48, fridge_temp=4, room_temp=1000)
+
+
+def test_in_range_temperatures_are_still_snapped():
+    defaults = default_inputs()
+    result, = compute_specs([RecipeSpec.from_dict({"room_temp": 22.1, "fridge_temp": 4}, defaults)])
+    assert result.spec == RecipeResultCache.normalize(RecipeSpec.from_dict({"room_temp": 22.1, "fridge_temp": 4}))
+
+
+def test_out_of_range_rows_fail_individually():
+    rows = [{"num_balls": "4"}, {"room_temp": "1000"}, {"fridge_temp": "-40"}, {"num_balls": "6"}]
+    results = process_chunk(rows)
+    assert isinstance(results[0], RecipeResult) and isinstance(results[3], RecipeResult)
+    assert "temperature range" in results[1] and "temperature range" in results[2]
+    assert results[3].spec.num_balls == 6
+
+
+def random_inputs(rng, n):
+    temps = PizzaRecipe.get_temp_range()
+    return [{
+        "salt": round(float(rng.uniform(0, 4)), 1),
+        "oil": round(float(rng.uniform(0, 5)), 1),
+        "hydration": round(float(rng.uniform(55, 80)), 1),
+        "ball_weight": int(rng.integers(150, 350)),
+        "num_balls": int(rng.integers(1, 30)),
+        "yeast_type": str(rng.choice(PizzaRecipe.get_yeast_types())),
+        "fridge_temp": temps[int(rng.integers(0, 12))],
+        "fridge_fermentation": float(rng.integers(1, 120)),
+        "room_temp": temps[int(rng.integers(20, len(temps)))],
+        "room_fermentation": float(rng.integers(1, 24)),
+    } for _ in range(n)]
+
+
+def recipe_or_error(inputs):
+    recipe = PizzaRecipe()
+    recipe.update(**inputs)
+    try:
+        return (recipe.flour, recipe.water, recipe.salt_weight, recipe.oil_weight, recipe.yeast_percentage,
+                recipe.yeast_weight, recipe.fridge_fermentation, recipe.room_fermentation)
+    except (IndexError, ValueError):
+        return None
+
+
+def test_compute_recipes_matches_pizza_recipe_row_for_row():
+    rows = random_inputs(np.random.default_rng(3), 300)
+    expected = [recipe_or_error(inputs) for inputs in rows]
+    rows = [inputs for inputs, values in zip(rows, expected) if values is not None]
+    expected = [values for values in expected if values is not None]
+    assert len(rows) > 250
+
+    results = compute_recipes({name: [inputs[name] for inputs in rows] for name in rows[0]})
+    names = ("flour", "water", "salt_weight", "oil_weight", "yeast_percentage", "yeast_weight",
+             "fridge_fermentation", "room_fermentation")
+    for i, values in enumerate(expected):
+        assert tuple(results[name][i].item() for name in names) == values, rows[i]
+
+
+def test_multi_stage_chains_match_pizza_recipe_row_for_row():
+    rng = np.random.default_rng(19)
+    temps = PizzaRecipe.get_temp_range()
+    rows = random_inputs(rng, 200)
+    for inputs in rows:
+        inputs["pre_stages"] = tuple(FermentationStage(f"Stage {i}", temps[int(rng.integers(0, len(temps)))],
+                                                       float(rng.integers(1, 12)))
+                                     for i in range(int(rng.integers(0, 4))))
+    expected = [recipe_or_error(inputs) for inputs in rows]
+    rows = [inputs for inputs, values in zip(rows, expected) if values is not None]
+    expected = [values for values in expected if values is not None]
+    assert len(rows) > 100 and sum(len(inputs["pre_stages"]) > 1 for inputs in rows) > 20
+
+    table = PizzaRecipe.current_snapshot().yeast_table
+    results = compute_recipes({name: [inputs[name] for inputs in rows] for name in rows[0]})
+    for i, (inputs, values) in enumerate(zip(rows, expected)):
+        assert results["yeast_percentage"][i].item() == values[4], inputs
+        recipe = PizzaRecipe()
+        recipe.update(**inputs)
+        assert results["pre_stages"][i] == recipe.pre_stages
+        chain = [(stage.temp, stage.hours) for stage in recipe.stages]
+        assert table.yeast_percentage_chain(inputs["yeast_type"], chain) == values[4]
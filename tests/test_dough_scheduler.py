@@ -0,0 +1,109 @@
+# tests/test_dough_scheduler.py
+
+from dataclasses import replace
+from datetime import datetime, timedelta
+import pytest
+from dough_scheduler import BatchStore, DoughScheduler
+from recipe_spec import FermentationStage
+
+START = datetime(2026, 10, 16, 18, 0)
+STAGES = (FermentationStage("Cold proof", 4, 24), FermentationStage("Room proof", 22, 4))
+
+
+def hours(n):
+    return START + timedelta(hours=n)
+
+
+def test_schedulers_sharing_a_store_see_each_others_changes(tmp_path):
+    ui = DoughScheduler(BatchStore(tmp_path / "batches.db"), grace_minutes=15)
+    cli = DoughScheduler(BatchStore(tmp_path / "batches.db"), grace_minutes=15)
+    events = []
+    ui.add_listener(lambda event, batch: events.append((event, batch.id, batch.stage)))
+
+    batch = cli.start("Friday", STAGES, now=START)
+    assert ui.get(batch.id) is not None
+    assert ui.next_deadline() == hours(24)
+
+    cli.advance(batch.id, now=hours(25))
+    # The cold proof's overdue event is stale: only the room proof's events fire, on its own clock
+    assert ui.fire_due(hours(26)) == []
+    assert [event for event, _ in ui.fire_due(hours(29))] == ["due"]
+    assert ("advanced", batch.id, 1) in events
+
+    cli.advance(batch.id, now=hours(29))
+    assert ui.get(batch.id) is None
+    assert ("finished", batch.id, 2) in events
+
+
+def test_advance_from_a_stale_copy_is_refused(tmp_path):
+    store = BatchStore(tmp_path / "batches.db")
+    first = DoughScheduler(store, grace_minutes=15)
+    batch = first.start("Friday", STAGES, now=START)
+    second = DoughScheduler(store, grace_minutes=15)
+    stale = second._batches[batch.id]
+
+    first.advance(batch.id, now=hours(25))
+    with pytest.raises(ValueError, match="moved on"):
+        store.set_stage(replace(stale, stage=1, stage_started_at=hours(30)), stale.stage)
+    assert store.get(batch.id).stage_started_at == hours(25)
+    # Through the scheduler the copy is reloaded first, so the batch moves on from where it really is
+    assert second.advance(batch.id, now=hours(29)).finished
+
+
+def test_restart_reports_only_overdue_once_the_grace_period_passed(tmp_path):
+    store_path = tmp_path / "batches.db"
+    scheduler = DoughScheduler(BatchStore(store_path), grace_minutes=15)
+    late = scheduler.start("Late", STAGES, now=START)
+    due = scheduler.start("Due", STAGES, now=hours(0.5))
+    scheduler.store.close()
+
+    restarted = DoughScheduler(BatchStore(store_path), grace_minutes=15)
+    fired = restarted.fire_due(hours(24.6))
+    assert [(event, batch.id) for event, batch in fired] == [("overdue", late.id), ("due", due.id)]
+    assert [(event, batch.id) for event, batch in restarted.fire_due(hours(24.8))] == [("overdue", due.id)]
+    assert restarted.fire_due(hours(30)) == []
+
+
+def test_advance_through_every_stage_to_finished(tmp_path):
+    scheduler = DoughScheduler(BatchStore(tmp_path / "batches.db"), grace_minutes=15)
+    batch = scheduler.start("Friday", STAGES, now=START)
+    assert (batch.current.name, batch.next_name, batch.due_at) == ("Cold proof", "Room proof", hours(24))
+
+    batch = scheduler.advance(batch.id, now=hours(23))
+    assert (batch.current.name, batch.next_name, batch.due_at) == ("Room proof", "Bake", hours(27))
+    assert scheduler.fire_due(hours(25)) == []  # The cold proof's events went with it
+
+    batch = scheduler.advance(batch.id, now=hours(27))
+    assert batch.finished and batch.status(hours(27), scheduler.grace) == "finished"
+    assert scheduler.batches() == [] and scheduler.next_deadline() is None
+    with pytest.raises(ValueError):
+        scheduler.advance(batch.id, now=hours(28))
+
+
+def test_removed_batches_leave_only_skipped_heap_entries(tmp_path):
+    scheduler = DoughScheduler(BatchStore(tmp_path / "batches.db"), grace_minutes=15)
+    removed = scheduler.start("Mistake", STAGES, now=START)
+    kept = scheduler.start("Friday", STAGES, now=hours(2))
+    scheduler.remove(removed.id)
+
+    assert len(scheduler._heap) == 4
+    assert scheduler.next_deadline() == kept.due_at
+    assert [(event, batch.id) for event, batch in scheduler.fire_due(hours(40))] == [("overdue", kept.id)]
+    assert scheduler.store.get(removed.id) is None
+
+
+def test_reload_from_the_store(tmp_path):
+    store_path = tmp_path / "batches.db"
+    scheduler = DoughScheduler(BatchStore(store_path), grace_minutes=15)
+    recipe = {"hydration": 65, "num_balls": 6}
+    first = scheduler.start("Friday", STAGES, recipe=recipe, now=START)
+    second = scheduler.advance(scheduler.start("Saturday", STAGES, now=hours(1)).id, now=hours(20))
+    finished = scheduler.start("Done", STAGES[1:], now=hours(1))
+    scheduler.advance(finished.id, now=hours(5))
+    scheduler.store.close()
+
+    reloaded = DoughScheduler(BatchStore(store_path), grace_minutes=15)
+    assert reloaded.batches() == [first, second]
+    assert reloaded.get(first.id).recipe == recipe
+    assert reloaded.get(finished.id) is None
+    assert BatchStore(store_path).get(finished.id).finished
@@ -0,0 +1,64 @@
+# tests/test_hot_reload.py
+
+import json
+import os
+import shutil
+import pytest
+from config import Configuration
+from hot_reload import HotReloader
+from recipe import PizzaRecipe
+
+
+@pytest.fixture
+def config_copy(tmp_path, monkeypatch):
+    """config.json and the yeast sheet copied to tmp_path, with the current settings reloaded from there."""
+    data = json.loads(Configuration.config_path().read_text())
+    sheet = tmp_path / "yeast.xlsx"
+    shutil.copy(Configuration.get_yeast_table_path(), sheet)
+    data.update(xlsx_yeast_table_path=str(sheet), yeast_cache_path=str(tmp_path / "yeast_cache.npy"),
+                yeast_lookup=False)
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(data))
+    monkeypatch.setattr(Configuration, "_json_config_full_path", path)
+    Configuration.reload()
+    PizzaRecipe.initialize()
+    yield path, sheet, data
+    monkeypatch.undo()
+    Configuration.reload()
+    PizzaRecipe.initialize()
+
+
+def settle(reloader):
+    """Two polls: the first sees the change, the second acts on it once the file stayed the same."""
+    return reloader.check(), reloader.check()
+
+
+def test_config_change_swaps_in_a_new_snapshot(config_copy):
+    path, _, data = config_copy
+    reloader = HotReloader(interval=0)
+    snapshots = []
+    reloader.add_listener(snapshots.append)
+    version = PizzaRecipe.table_version()
+    assert reloader.check() is False
+
+    path.write_text(json.dumps({**data, "hydration": 61}))
+    os.utime(path, ns=(1, 1))  # A different stamp even on a coarse clock
+    assert settle(reloader) == (False, True)
+    assert PizzaRecipe.table_version() > version
+    assert snapshots and snapshots[-1].version == PizzaRecipe.table_version()
+    assert PizzaRecipe().hydration == 61
+
+
+def test_sheet_change_reloads_and_a_broken_config_keeps_the_current_snapshot(config_copy):
+    path, sheet, _ = config_copy
+    reloader = HotReloader(interval=0)
+
+    version = PizzaRecipe.table_version()
+    os.utime(sheet, ns=(2, 2))
+    assert settle(reloader) == (False, True)
+    assert PizzaRecipe.table_version() > version
+
+    snapshot = PizzaRecipe.current_snapshot()
+    path.write_text("{ not json")
+    assert settle(reloader) == (False, False)
+    assert PizzaRecipe.current_snapshot() is snapshot
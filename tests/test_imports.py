@@ -0,0 +1,12 @@
+# tests/test_imports.py
+
+import pytest
+from benchmark import FORBIDDEN_IMPORTS, HEADLESS_MODULES, IMPORT_BUDGET_MS, import_profile
+
+
+@pytest.mark.parametrize("module", HEADLESS_MODULES)
+def test_headless_module_imports_stay_lean(module):
+    ms, forbidden, handlers = import_profile(module)
+    assert forbidden == [], f"{module} imports {', '.join(forbidden)} (forbidden: {', '.join(FORBIDDEN_IMPORTS)})"
+    assert handlers == 0, f"{module} configures logging at import time"
+    assert ms <= IMPORT_BUDGET_MS, f"{module} took {ms:.1f} ms to import (budget {IMPORT_BUDGET_MS} ms)"
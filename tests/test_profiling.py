@@ -0,0 +1,20 @@
+# tests/test_profiling.py
+
+import batch
+import cli
+from profiling import Profiler
+
+
+def test_profiler_records_functions_imported_by_name():
+    original = cli.compute_specs
+    Profiler.reset()
+    Profiler.enable()
+    try:
+        cli.process_chunk([{"num_balls": "4"}, {"hydration": "70"}])
+        stats = Profiler.snapshot()
+    finally:
+        Profiler.disable()
+        Profiler.reset()
+    assert stats["cli.process_chunk"]["calls"] == 1
+    assert stats["batch.compute_specs"]["calls"] == 1
+    assert cli.compute_specs is original and batch.compute_specs is original
@@ -0,0 +1,46 @@
+# tests/test_recipe.py
+
+import pytest
+from recipe import PizzaRecipe
+
+
+def read_all(recipe):
+    return (recipe.flour, recipe.water, recipe.salt_weight, recipe.oil_weight,
+            recipe.yeast_percentage, recipe.yeast_weight)
+
+
+def test_update_recomputes_each_derived_value_once():
+    recipe = PizzaRecipe()
+    read_all(recipe)
+    before = recipe.recompute_counts
+
+    temps = PizzaRecipe.get_temp_range()
+    room_temp = next(temp for temp in temps if temp != recipe.room_temp)
+    recipe.update(hydration=70, salt=3, num_balls=8, ball_weight=250, room_temp=room_temp, fridge_fermentation=48)
+    assert recipe.recompute_counts == before
+    read_all(recipe)
+    read_all(recipe)
+
+    after = recipe.recompute_counts
+    assert after['mass_balance'] == before['mass_balance'] + 1
+    assert after['yeast'] == before['yeast'] + 1
+
+
+def test_batch_restores_values_and_counts_when_the_block_raises():
+    recipe = PizzaRecipe()
+    expected = read_all(recipe)
+    inputs = (recipe.hydration, recipe.num_balls, recipe.room_temp, recipe.room_fermentation)
+    counts = recipe.recompute_counts
+
+    with pytest.raises(RuntimeError):
+        with recipe.batch():
+            recipe.hydration = 80
+            recipe.num_balls = 12
+            recipe.room_fermentation = 1
+            raise RuntimeError("abandon the edit")
+
+    assert (recipe.hydration, recipe.num_balls, recipe.room_temp, recipe.room_fermentation) == inputs
+    assert recipe.recompute_counts == counts
+    # The restored derived values are still valid, so reading them recomputes nothing
+    assert read_all(recipe) == expected
+    assert recipe.recompute_counts == counts
@@ -0,0 +1,55 @@
+# tests/test_recipe_export.py
+
+import csv
+import json
+from manager import RecipeManager
+from recipe import PizzaRecipe
+from recipe_export import export_recipes, iter_specs
+from recipe_store import RecipeStore
+
+
+def test_export_reads_the_recipe_store_and_legacy_files(tmp_path):
+    store = RecipeStore(tmp_path / "recipes.db")
+    RecipeStore._default = store
+    try:
+        recipe = PizzaRecipe()
+        recipe.update(hydration=68, num_balls=5)
+        RecipeManager.save_recipe(recipe)
+
+        legacy = tmp_path / "legacy"
+        legacy.mkdir()
+        imported = RecipeManager.to_dict(PizzaRecipe(num_balls=7))
+        (legacy / "imported.json").write_text(json.dumps(imported))
+        store.import_json_folder(legacy)
+        (legacy / "older.json").write_text(json.dumps(RecipeManager.to_dict(PizzaRecipe(num_balls=9))))
+
+        out = tmp_path / "export.csv"
+        assert export_recipes(out, store=store, legacy_folder=legacy) == 3
+        with open(out, newline='') as file:
+            rows = list(csv.DictReader(file))
+        assert sorted(float(row["num_balls"]) for row in rows) == [5, 7, 9]
+        specs = [spec for batch in iter_specs(out) for spec in batch]
+        assert specs[0].hydration == 68
+    finally:
+        RecipeStore._default = None
+        store.close()
+
+
+def test_store_and_legacy_rows_are_normalized_the_same_way(tmp_path):
+    store = RecipeStore(tmp_path / "recipes.db")
+    partial = {"hydration": 66, "num_balls": 3, "pre_stages": [{"name": "Bulk", "temp": 22, "hours": 2}]}
+    try:
+        store.add(partial)
+        legacy = tmp_path / "legacy"
+        legacy.mkdir()
+        (legacy / "partial.json").write_text(json.dumps(partial))
+
+        out = tmp_path / "export.csv"
+        assert export_recipes(out, store=store, legacy_folder=legacy) == 2
+        with open(out, newline='') as file:
+            from_store, from_file = list(csv.DictReader(file))
+    finally:
+        store.close()
+    assert from_store.pop("source") != from_file.pop("source")
+    assert from_store == from_file
+    assert from_file["room_temp"] != "" and from_file["fridge_fer"] != ""
@@ -0,0 +1,53 @@
+# tests/test_recipe_store.py
+
+import json
+from manager import RecipeManager
+from recipe import PizzaRecipe
+from recipe_spec import FermentationStage, RecipeSpec
+from recipe_store import RecipeStore
+
+
+def sample_recipes():
+    temps = PizzaRecipe.get_temp_range()
+    plain = PizzaRecipe(salt_percentage=2.5, hydration=68, num_balls=4)
+    staged = PizzaRecipe(yeast_type="CY", ball_weight=260)
+    staged.update(room_temp=temps[40], pre_stages=[FermentationStage("Bulk", temps[38], 3)])
+    return [plain, staged, PizzaRecipe(oil_percentage=0)]
+
+
+def test_recipes_round_trip_through_the_store(tmp_path):
+    recipes = sample_recipes()
+    store = RecipeStore(tmp_path / "recipes.db")
+    ids = [store.add(RecipeManager.to_dict(recipe)) for recipe in recipes]
+    store.close()
+
+    reopened = RecipeStore(tmp_path / "recipes.db")
+    try:
+        assert reopened.count() == len(recipes)
+        for recipe_id, recipe in zip(ids, recipes):
+            loaded = RecipeManager.from_dict(reopened.get(recipe_id))
+            assert RecipeSpec.from_recipe(loaded) == RecipeSpec.from_recipe(recipe)
+            assert loaded.to_string() == recipe.to_string()
+        assert [row["id"] for batch in reopened.iter_batches(batch_size=2) for row in batch] == ids
+        assert [row["id"] for row in reopened.query(hydration=(60, 70))] == [ids[0]]
+        assert [row["id"] for row in reopened.query(yeast_type="CY")] == [ids[1]]
+        assert reopened.get(ids[1])["pre_stages"] == [stage.to_dict() for stage in recipes[1].pre_stages]
+    finally:
+        reopened.close()
+
+
+def test_json_folder_import_runs_once(tmp_path):
+    folder = tmp_path / "saved"
+    folder.mkdir()
+    for i, recipe in enumerate(sample_recipes()):
+        (folder / f"recipe_{i}.json").write_text(json.dumps(RecipeManager.to_dict(recipe)))
+    (folder / "settings.json").write_text(json.dumps({"theme": "dark"}))  # Not a recipe
+    (folder / "broken.json").write_text("{")
+
+    store = RecipeStore(tmp_path / "recipes.db")
+    try:
+        assert store.import_json_folder(folder) == 3
+        assert store.import_json_folder(folder) == 0
+        assert store.count() == 3
+    finally:
+        store.close()
@@ -0,0 +1,76 @@
+# tests/test_server.py
+
+import asyncio
+import json
+from server import RecipeServer
+
+
+async def request(port, raw):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def post(path, body):
+    if isinstance(body, dict):
+        body = json.dumps(body).encode()
+    return (f"POST {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+
+def run_against_server(*raw_requests):
+    async def main():
+        server = await RecipeServer("127.0.0.1", 0, workers=1).start()
+        try:
+            return [await request(server.port, raw) for raw in raw_requests]
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_calculate_and_batch():
+    (status, single), (batch_status, batch) = run_against_server(
+        post("/calculate", {"hydration": 65, "num_balls": 6}),
+        post("/batch", {"recipes": [{"hydration": 65, "num_balls": 6}, {"num_balls": 2}]}))
+    assert status == 200
+    assert single["flour"] > 0 and single["yeast"] > 0 and single["error"] == ""
+    assert batch_status == 200
+    assert len(batch["results"]) == 2
+    assert batch["results"][0] == single
+
+
+def test_malformed_requests_get_400():
+    responses = run_against_server(
+        post("/calculate", b"{not json"),
+        b"POST /calculate HTTP/1.1\r\nContent-Length: abc\r\nConnection: close\r\n\r\n",
+        b"POST /calculate HTTP/1.1\r\nContent-Length: -5\r\nConnection: close\r\n\r\n")
+    for status, payload in responses:
+        assert status == 400
+        assert "error" in payload
+
+
+def test_temperatures_outside_the_table_get_400():
+    (inside, snapped), (too_hot, hot), (too_cold, cold), (stage, early) = run_against_server(
+        post("/calculate", {"room_temp": 22.1, "fridge_temp": 4}),
+        post("/calculate", {"room_temp": 1000}),
+        post("/calculate", {"fridge_temp": -40}),
+        post("/calculate", {"pre_stages": [{"name": "bulk", "temp": 90, "hours": 2}]}))
+    assert inside == 200 and snapped["error"] == ""
+    assert too_hot == too_cold == stage == 400
+    assert all("temperature range" in payload["error"] for payload in (hot, cold, early))
+
+
+def test_batch_reports_invalid_recipes_per_row():
+    (single_status, single), (status, batch) = run_against_server(
+        post("/calculate", {"room_temp": 1000}),
+        post("/batch", {"recipes": [{"num_balls": 4}, {"room_temp": 1000}, {"num_balls": 6}]}))
+    assert single_status == 400
+    assert status == 200
+    ok, bad, other = batch["results"]
+    assert ok["error"] == "" and other["error"] == "" and other["num_balls"] == 6
+    assert bad["error"] == single["error"] and bad["flour"] == ""
@@ -0,0 +1,86 @@
+# tests/test_sweep.py
+
+import csv
+import itertools
+import numpy as np
+import pytest
+from batch import compute_recipes, default_inputs
+from recipe import PizzaRecipe
+from sweep import (OUTPUT_COLUMNS, ColumnSummary, PivotSummary, build_axes, iter_sweep, parse_range, run_sweep,
+                   sweep_size)
+
+RANGES = {"hydration": [60, 70], "yeast_type": "all", "room_temp": [18, 24], "room_fermentation": "all"}
+
+
+def test_parse_range():
+    assert parse_range("all") == "all"
+    assert parse_range("60:70:5") == [60.0, 65.0, 70.0]
+    assert parse_range("0.1:0.3:0.1") == [0.1, 0.2, 0.3]  # The stop is included despite float steps
+    assert parse_range(" IDY, ADY ,") == ["IDY", "ADY"]
+    with pytest.raises(ValueError):
+        parse_range("60:70:0")
+
+
+def test_build_axes():
+    table = PizzaRecipe.current_snapshot().yeast_table
+    defaults = default_inputs()
+    axes = dict(build_axes(RANGES))
+
+    assert axes[("hydration",)] == [(60.0,), (70.0,)]
+    assert axes[("yeast_type",)] == [(name,) for name in table.yeast_types]
+    assert axes[("salt",)] == [(defaults["salt"],)]
+    # "all" hours pair each (snapped) temperature with its own hour options
+    temps = [table.nearest_temperature(18), table.nearest_temperature(24)]
+    assert axes[("room_temp", "room_fermentation")] == [
+        (temp, hours) for temp in temps for hours in sorted(set(table.hour_range(temp)))]
+    with pytest.raises(ValueError):
+        build_axes({"flour": [1]})
+    with pytest.raises(ValueError):
+        build_axes({"hydration": "all"})
+
+
+def test_chunks_come_out_in_product_order():
+    axes = build_axes(RANGES)
+    whole = next(iter_sweep(axes, workers=1, chunk_size=sweep_size(axes)))
+    chunks = list(iter_sweep(axes, workers=2, chunk_size=7, max_pending=2))
+    assert [len(chunk["flour"]) for chunk in chunks[:-1]] == [7] * (len(chunks) - 1)
+    for name in OUTPUT_COLUMNS:
+        assert np.concatenate([chunk[name] for chunk in chunks]).tolist() == whole[name].tolist()
+
+    # The same rows as the product of the axes, computed in one go
+    rows = [sum(values, ()) for values in itertools.product(*(values for _, values in axes))]
+    names = sum((names for names, _ in axes), ())
+    expected = compute_recipes({name: [row[i] for row in rows] for i, name in enumerate(names)})
+    assert whole["yeast_percentage"].tolist() == expected["yeast_percentage"].tolist()
+
+
+def test_summaries_match_the_full_table(tmp_path):
+    axes = build_axes(RANGES)
+    whole = next(iter_sweep(axes, workers=1, chunk_size=sweep_size(axes)))
+    columns, (pivot,) = run_sweep(RANGES, tmp_path / "sweep.csv", workers=1, chunk_size=5,
+                                  pivots=[("room_temp", "hydration", "yeast_weight")])
+
+    assert columns.count == sweep_size(axes)
+    rows, cols, grid = pivot.table("mean")
+    for i, temp in enumerate(rows):
+        for j, hydration in enumerate(cols):
+            cell = (whole["room_temp"] == temp) & (whole["hydration"] == hydration)
+            assert grid[i, j] == pytest.approx(whole["yeast_weight"][cell].mean())
+    assert pivot.table("count")[2].sum() == sweep_size(axes)
+
+    with open(tmp_path / "sweep.csv", newline='') as file:
+        written = list(csv.DictReader(file))
+    assert len(written) == sweep_size(axes)
+    assert [float(row["yeast_weight"]) for row in written] == whole["yeast_weight"].tolist()
+
+
+def test_column_summary_over_chunks():
+    summary = ColumnSummary()
+    chunk = {name: np.array([1.0, 3.0]) for name in OUTPUT_COLUMNS if name != "yeast_type"}
+    summary.add(chunk)
+    summary.add({name: values + 1 for name, values in chunk.items()})
+    assert summary.count == 4
+    assert "flour" in summary.to_string()
+    assert summary._stats["flour"] == (10.0, 1.0, 4.0)
+    with pytest.raises(ValueError):
+        PivotSummary("room_temp", "not_a_column")
@@ -0,0 +1,56 @@
+# tests/test_write_behind.py
+
+import json
+import subprocess
+import sys
+import threading
+from write_behind import WriteBehindSaver, atomic_write_json
+
+
+def test_saves_with_the_same_key_coalesce_to_the_latest():
+    saver = WriteBehindSaver(coalesce_s=0.2)
+    ran, outcomes = [], []
+    done = threading.Event()
+    try:
+        for value in range(5):
+            saver.submit(lambda value=value: ran.append(value) or value, key="recipe",
+                         on_done=lambda result, error: outcomes.append((result, error)))
+        saver.submit(lambda: ran.append("other"), on_done=lambda result, error: done.set())
+        assert saver.pending_count() == 2
+        assert saver.flush(timeout=5)
+    finally:
+        saver.close(timeout=5)
+    assert done.is_set()
+    assert ran == [4, "other"]  # Only the latest operation of the key ran, in first-submit order
+    assert outcomes == [(4, None)] * 5
+
+
+def test_failed_save_reports_its_error_and_later_saves_still_run():
+    saver = WriteBehindSaver(coalesce_s=0)
+    outcomes = []
+    try:
+        saver.submit(lambda: 1 / 0, on_done=lambda result, error: outcomes.append(type(error)))
+        saver.submit(lambda: "ok", on_done=lambda result, error: outcomes.append(result))
+        assert saver.flush(timeout=5)
+    finally:
+        saver.close(timeout=5)
+    assert outcomes == [ZeroDivisionError, "ok"]
+
+
+def test_queued_saves_are_flushed_at_exit(tmp_path):
+    target = tmp_path / "recipe.json"
+    code = ("from pathlib import Path\n"
+            "from write_behind import WriteBehindSaver, atomic_write_json\n"
+            "saver = WriteBehindSaver.default()\n"
+            "saver.coalesce_s = 60\n"  # Far longer than the process lives
+            f"saver.submit(lambda: atomic_write_json(Path({str(target)!r}), {{'hydration': 70}}), key='r')\n")
+    subprocess.run([sys.executable, "-c", code], check=True, timeout=30)  # Run from the project root
+    assert json.loads(target.read_text()) == {"hydration": 70}
+
+
+def test_atomic_write_json_replaces_without_leaving_temp_files(tmp_path):
+    path = tmp_path / "nested" / "recipe.json"
+    atomic_write_json(path, {"hydration": 65})
+    atomic_write_json(path, {"hydration": 70})
+    assert json.loads(path.read_text()) == {"hydration": 70}
+    assert [file.name for file in path.parent.iterdir()] == ["recipe.json"]
@@ -0,0 +1,63 @@
+# tests/test_yeast_lookup.py
+
+import json
+import numpy as np
+import pytest
+from recipe import PizzaRecipe
+from yeast_lookup import YeastLookup, build
+
+
+@pytest.fixture(scope="module")
+def built_lookup(tmp_path_factory):
+    path = tmp_path_factory.mktemp("lookup") / "yeast_lookup.npy"
+    build(path, workers=1)
+    return path
+
+
+def yeast_percentage(inputs, table, lookup):
+    recipe = PizzaRecipe()
+    recipe.update(**inputs)
+    recipe.snap_fermentation_hours(table)
+    try:
+        recipe.calculate_yeast_percentage_dual(table, lookup)
+    except (IndexError, ValueError):
+        return None
+    return recipe._yeast_percentage
+
+
+def test_lookup_mode_matches_the_live_table(built_lookup):
+    table = PizzaRecipe.current_snapshot().yeast_table
+    lookup = YeastLookup.load(built_lookup, table)
+    assert lookup is not None
+
+    rng = np.random.default_rng(23)
+    temps = PizzaRecipe.get_temp_range()
+    served = 0
+    for _ in range(1000):
+        inputs = {
+            "yeast_type": str(rng.choice(PizzaRecipe.get_yeast_types())),
+            "fridge_temp": temps[int(rng.integers(0, len(temps)))],
+            "fridge_fermentation": float(rng.integers(1, 120)),
+            "room_temp": temps[int(rng.integers(0, len(temps)))],
+            "room_fermentation": float(rng.integers(1, 24)),
+        }
+        live = yeast_percentage(inputs, table, None)
+        assert yeast_percentage(inputs, table, lookup) == live, inputs
+        recipe = PizzaRecipe()
+        recipe.update(**inputs)
+        if lookup.percentage(recipe.yeast_type, recipe.fridge_temp, recipe.fridge_fermentation,
+                             recipe.room_temp, recipe.room_fermentation) is not None:
+            served += 1
+    assert served > 700  # Most answers came from the artifact, not the fallback
+
+
+def test_artifact_from_another_table_is_not_used(built_lookup, tmp_path):
+    path = built_lookup
+    assert sorted(file.name for file in path.parent.iterdir()) == ["yeast_lookup.json", "yeast_lookup.npy"]
+    meta = json.loads(YeastLookup.meta_path(path).read_text())
+    meta["table_hash"] = "0" * 64
+    stale = tmp_path / "stale.npy"
+    stale.write_bytes(path.read_bytes())
+    YeastLookup.meta_path(stale).write_text(json.dumps(meta))
+    assert YeastLookup.load(stale, PizzaRecipe.current_snapshot().yeast_table) is None
+    assert YeastLookup.load(tmp_path / "missing.npy", PizzaRecipe.current_snapshot().yeast_table) is None
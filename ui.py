@@ -1,12 +1,325 @@
+import copy
+import logging
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk, PhotoImage
-from recipe import PizzaRecipe
+from datetime import datetime
+from tkinter import ttk, messagebox, PhotoImage
+from recipe import PizzaRecipe, MASS_BALANCE_FIELDS
 from manager import RecipeManager
 from config import Configuration
-
-
-def load_recipe(root):
-    build_ui(root, pizza_recipe=RecipeManager.load_recipe())
+from write_behind import WriteBehindSaver
+from profiling import Profiler
+from result_cache import RecipeResultCache
+from recipe_spec import FermentationStage, parse_stages
+from dough_scheduler import DoughScheduler
+
+
+class RecalculationScheduler:
+    """Coalesces recipe edits from the UI and computes the output text off the Tk main loop.
+
+    Edits are debounced with after(); the recipe is then snapshotted and computed on a worker
+    thread, and a result is only rendered if no newer edit arrived in the meantime.
+    """
+
+    def __init__(self, root, recipe, output_widget, delay_ms=150, poll_ms=15):
+        self.root = root
+        self.recipe = recipe
+        self.output_widget = output_widget
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+        self._pending = {}
+        self._after_id = None
+        self._poll_id = None
+        self._generation = 0
+        self._lines = []
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+        output_widget.bind('<Destroy>', lambda _: self.close(), add='+')
+
+    def request(self, field=None, variable=None, delay_ms=None):
+        if field is not None:
+            try:
+                self._pending[field] = variable.get()
+            except (tk.TclError, ValueError):
+                return  # Partially typed value; wait for the next keystroke
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay_ms if delay_ms is None else delay_ms, self._dispatch)
+
+    def _dispatch(self):
+        self._after_id = None
+        fields, self._pending = self._pending, {}
+        for name, value in fields.items():
+            setattr(self.recipe, name, value)
+        self._generation += 1
+        self._jobs.put((self._generation, self.recipe.snapshot()))
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            while not self._jobs.empty():  # Only the newest snapshot matters
+                job = self._jobs.get_nowait()
+            if job is None:
+                return
+            generation, snapshot = job
+            try:
+                if isinstance(snapshot, PizzaRecipe):
+                    text = RecipeResultCache.default().get_recipe(snapshot).to_string()
+                else:
+                    text = snapshot.to_string()
+            except Exception as e:
+                text = f"Error calculating recipe: {e}"
+            self._results.put((generation, text))
+
+    def _poll(self):
+        self._poll_id = None
+        latest = None
+        while not self._results.empty():
+            latest = self._results.get_nowait()
+        if latest is not None and latest[0] == self._generation:
+            self.render(latest[1])
+        else:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def render(self, text):
+        """Rewrite only the output lines whose text changed."""
+        lines = text.split('\n')
+        self.output_widget.config(state='normal')
+        if len(lines) != len(self._lines):
+            self.output_widget.delete(1.0, tk.END)
+            self.output_widget.insert(tk.END, text)
+        else:
+            for i, (old, new) in enumerate(zip(self._lines, lines), start=1):
+                if old != new:
+                    self.output_widget.delete(f"{i}.0", f"{i}.end")
+                    self.output_widget.insert(f"{i}.0", new)
+        self.output_widget.config(state='disabled')
+        self._lines = lines
+
+    def set_recipe(self, recipe):
+        """Switch to another recipe, discarding queued edits and in-flight results for the old one."""
+        for after_id in (self._after_id, self._poll_id):
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+        self._after_id = self._poll_id = None
+        self._pending = {}
+        self._generation += 1
+        self.recipe = recipe
+        self.render(recipe.to_string())
+
+    def close(self):
+        for after_id in (self._after_id, self._poll_id):
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+        self._after_id = self._poll_id = None
+        self._jobs.put(None)
+
+
+class RecipeDraft:
+    """Stands in for the PizzaRecipe while the yeast table loads: holds the inputs and shows the mass balance."""
+    FIELDS = MASS_BALANCE_FIELDS + ('yeast_type',)
+
+    def __init__(self, recipe_defaults):
+        self.salt = recipe_defaults['salt_percentage']
+        self.oil = recipe_defaults['oil_percentage']
+        self.hydration = recipe_defaults['hydration']
+        self.ball_weight = recipe_defaults['ball_weight']
+        self.num_balls = recipe_defaults['num_balls']
+        self.yeast_type = recipe_defaults['yeast_types'][1]
+        self.yeast_status = "loading the yeast table..."
+
+    def snapshot(self):
+        return copy.copy(self)
+
+    def inputs(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def to_string(self):
+        flour, water, salt_weight, oil_weight = PizzaRecipe.mass_balance(
+            self.salt, self.oil, self.hydration, self.ball_weight, self.num_balls)
+        return (f"Flour: {flour}g\n"
+                f"Water: {water}g\n"
+                f"Salt: {salt_weight}g\n"
+                f"Oil: {oil_weight}g\n"
+                f"Yeast: {self.yeast_status}\n"
+                f"Total: {self.num_balls} dough balls, each weighing {self.ball_weight}g")
+
+
+class ProfilerPanel:
+    """Debug window listing the profiler counters, refreshed while it is open."""
+
+    def __init__(self, root, refresh_ms=1000):
+        self.refresh_ms = refresh_ms
+        self.window = tk.Toplevel(root)
+        self.window.title("Profiler")
+        self.text = tk.Text(self.window, height=24, width=80, font=("Courier", 10), state='disabled')
+        self.text.pack(padx=10, pady=(10, 5))
+        tk.Button(self.window, text="Reset", command=self.reset).pack(pady=(0, 10))
+        self.refresh()
+
+    def reset(self):
+        Profiler.reset()
+        self.show()
+
+    def show(self):
+        self.text.config(state='normal')
+        self.text.delete(1.0, tk.END)
+        stats = RecipeResultCache.default().stats()
+        self.text.insert(tk.END, Profiler.format_table() +
+                         f"\n\nResult cache: {stats['hits']} hits, {stats['misses']} misses, "
+                         f"{stats['evictions']} evictions, {stats['size']}/{stats['maxsize']} entries")
+        self.text.config(state='disabled')
+
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        self.show()
+        self.window.after(self.refresh_ms, self.refresh)
+
+
+class BatchTimerPump:
+    """Drives a DoughScheduler from the Tk event loop: one after() call, set for the next due event or the next
+    look at the store (for batches changed by another process), whichever comes first."""
+
+    def __init__(self, root, scheduler):
+        self.root = root
+        self.scheduler = scheduler
+        self._after_id = None
+        scheduler.add_listener(self.on_event)
+        self.arm()
+
+    def on_event(self, event, batch):
+        if event not in ("due", "overdue"):
+            self.arm()  # A batch started, moved on or was removed: the next deadline may have changed
+
+    def arm(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._after_id = self.root.after(int(self.scheduler.seconds_until_wake() * 1000) + 1, self.fire)
+
+    def fire(self):
+        self._after_id = None
+        self.scheduler.fire_due()
+        self.arm()
+
+
+class BatchPanel:
+    """Window listing the dough batches being proofed, soonest due first; due and overdue ones are highlighted.
+
+    It only redraws when the scheduler reports a change or event, so an open panel costs nothing while idle.
+    """
+
+    def __init__(self, root, scheduler, current_recipe):
+        self.scheduler = scheduler
+        self.current_recipe = current_recipe
+        self._redraw_id = None
+        self.window = tk.Toplevel(root)
+        self.window.title("Dough Batches")
+        columns = ("batch", "stage", "due", "status")
+        self.tree = ttk.Treeview(self.window, columns=columns, show="headings", height=16)
+        for column, width in zip(columns, (200, 110, 110, 150)):
+            self.tree.heading(column, text=column.capitalize())
+            self.tree.column(column, width=width)
+        self.tree.tag_configure("due", background="#fff2cc")
+        self.tree.tag_configure("overdue", background="#f8cbad")
+        self.tree.pack(padx=10, pady=(10, 5), fill='both', expand=True)
+
+        buttons = tk.Frame(self.window)
+        buttons.pack(pady=(0, 10))
+        tk.Button(buttons, text="Start current recipe", command=self.start_batch).pack(side='left', padx=5)
+        tk.Button(buttons, text="Moved on", command=self.advance_selected).pack(side='left', padx=5)
+        tk.Button(buttons, text="Remove", command=self.remove_selected).pack(side='left', padx=5)
+
+        scheduler.add_listener(self.on_event)
+        self.window.bind('<Destroy>', self.on_destroy)
+        self.redraw()
+
+    def on_event(self, event, batch):
+        # Coalesce: a burst of events (e.g. everything that fell due during a restart) redraws once
+        if self._redraw_id is None:
+            self._redraw_id = self.window.after_idle(self.redraw)
+
+    def on_destroy(self, event):
+        if event.widget is self.window:
+            self.scheduler.remove_listener(self.on_event)
+
+    def redraw(self):
+        self._redraw_id = None
+        now = datetime.now()
+        self.tree.delete(*self.tree.get_children())
+        for batch in self.scheduler.batches():
+            status = batch.status(now, self.scheduler.grace)
+            text = status if status == "proofing" else f"{status}: {batch.next_name}"
+            self.tree.insert("", tk.END, iid=str(batch.id), tags=(status,),
+                             values=(f"#{batch.id} {batch.name}", batch.current.name,
+                                     f"{batch.due_at:%a %H:%M}", text))
+
+    def selected_ids(self):
+        return [int(iid) for iid in self.tree.selection()]
+
+    def start_batch(self):
+        recipe = self.current_recipe()
+        if recipe is None:
+            messagebox.showerror("Start Batch", "The yeast table is not loaded yet.")
+            return
+        self.scheduler.start_recipe(recipe)
+
+    def advance_selected(self):
+        for batch_id in self.selected_ids():
+            try:
+                self.scheduler.advance(batch_id)
+            except ValueError as e:
+                messagebox.showerror("Moved On", str(e), parent=self.window)
+
+    def remove_selected(self):
+        ids = self.selected_ids()
+        if ids and messagebox.askyesno("Remove Batches", f"Remove {len(ids)} batch(es)?", parent=self.window):
+            for batch_id in ids:
+                try:
+                    self.scheduler.remove(batch_id)
+                except ValueError as e:
+                    messagebox.showerror("Remove Batches", str(e), parent=self.window)
+
+
+_icon_cache = {}
+_formatted_temperatures = None
+
+
+def get_icon(path):
+    """PhotoImage for path, decoded once per process."""
+    if path not in _icon_cache:
+        _icon_cache[path] = PhotoImage(file=path)
+    return _icon_cache[path]
+
+
+def get_formatted_temperatures():
+    global _formatted_temperatures
+    if _formatted_temperatures is None:
+        _formatted_temperatures = [round(value, 1) for value in PizzaRecipe.get_temp_range()]  # For dropdown display
+    return _formatted_temperatures
+
+
+def get_stage_presets():
+    """The configured schedules as FermentationStage tuples snapped to the current yeast table."""
+    table = PizzaRecipe.current_snapshot().yeast_table
+    presets = {}
+    for name, stages in Configuration.get_stage_presets().items():
+        snapped = []
+        for stage in parse_stages(stages):
+            temp = table.nearest_temperature(stage.temp)
+            snapped.append(FermentationStage(stage.name, temp, table.snap_hours(temp, stage.hours)))
+        presets[name] = tuple(snapped)
+    return presets
+
+
+def get_time_options(temp):
+    return [str(int(value)) for value in sorted(set(PizzaRecipe.get_hour_range_by_temp(temp)))]
 
 
 def clear_ui(root):
@@ -14,161 +327,323 @@ def clear_ui(root):
         widget.destroy()  # Destroy existing widgets
 
 
+class RecipeView:
+    """The recipe window. Widgets are built once; loading a recipe only rebinds the variables."""
+
+    def __init__(self, root, pizza_recipe=None):
+        self.root = root
+        self._table_errors = queue.Queue()
+        self._table_failed = False
+        if pizza_recipe is None and not PizzaRecipe.is_loaded():
+            # Show the window now; the proofing inputs come alive once the table has loaded in the background
+            pizza_recipe = RecipeDraft(Configuration.get_recipe_defaults())
+            threading.Thread(target=self.load_table, name="table-loader", daemon=True).start()
+        self.recipe = PizzaRecipe() if pizza_recipe is None else pizza_recipe
+
+        root.title("Pizza Recipe")
+        root.geometry("440x400")
+
+        self.num_balls = tk.IntVar()
+        self.ball_weight = tk.IntVar()
+        self.hydration = tk.IntVar()
+        self.yeast_type = tk.StringVar()
+        self.oil = tk.IntVar()
+        self.salt = tk.IntVar()
+        self.schedule = tk.StringVar()
+
+        # Actual temperature variables
+        self.cold_proof_temp = tk.DoubleVar()
+        self.cold_proof_hours = tk.IntVar()
+        self.room_proof_temp = tk.DoubleVar()
+        self.room_proof_hours = tk.IntVar()
+
+        self._save_results = queue.Queue()
+        self._save_poll_id = None
+        self._table_version = None
+
+        self.build_widgets()
+        self.scheduler = RecalculationScheduler(root, self.recipe, self.output_text_widget)
+        if self.table_ready:
+            self.show_table_options()
+        else:
+            self.set_proofing_enabled(False)
+            self.status_label.config(text="Loading...")
+        self.bind_recipe(self.recipe)
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
+        root.after(1000 if self.table_ready else 50, self.watch_table_version)
+        if Profiler.enabled():
+            root.bind('<F12>', lambda _: ProfilerPanel(root))
+        self.batch_panel = None
+        root.after_idle(self.start_batch_scheduler)  # Reads the batch store; not needed for the first paint
+
+    @property
+    def table_ready(self):
+        return isinstance(self.recipe, PizzaRecipe)
+
+    def build_widgets(self):
+        """Build every widget; the options that come from the yeast table are filled in by show_table_options."""
+        root = self.root
+
+        tk.Label(root, text="Main Recipe Inputs", font=("Helvetica", 16, "bold")).grid(row=0, column=0, columnspan=4,
+                                                                                       sticky='W', padx=(20, 0))
+
+        tk.Label(root, text="Number of Balls").grid(row=1, column=0, sticky='W', padx=(20, 0))
+        balls_dropdown = ttk.Combobox(root, textvariable=self.num_balls, values=list(range(1, 11)), state="readonly",
+                                      width=10)
+        balls_dropdown.grid(row=1, column=1)
+        balls_dropdown.bind('<<ComboboxSelected>>', lambda _: self.general_update('num_balls', self.num_balls))
+
+        tk.Label(root, text="Ball Weight (g)").grid(row=1, column=2, sticky='W', padx=(5, 0))
+        ball_weight_entry = tk.Entry(root, textvariable=self.ball_weight, width=12)
+        ball_weight_entry.grid(row=1, column=3)
+        ball_weight_entry.bind('<KeyRelease>', lambda _: self.scheduler.request('ball_weight', self.ball_weight))
+
+        # Yeast type dropdown
+        tk.Label(root, text="Yeast Type").grid(row=2, column=0, sticky='W', padx=(20, 0))
+        self.yeast_dropdown = ttk.Combobox(root, textvariable=self.yeast_type, state="readonly", width=10)
+        self.yeast_dropdown.grid(row=2, column=1)
+        self.yeast_dropdown.bind('<<ComboboxSelected>>', lambda _: self.general_update('yeast_type', self.yeast_type))
+
+        # Hydration, salt and oil percentage
+        tk.Label(root, text="Hydration (%)").grid(row=2, column=2, sticky='W', padx=(5, 0))
+        hydration_spinpox = tk.Spinbox(root, from_=0, to=100, textvariable=self.hydration, width=10)
+        hydration_spinpox.grid(row=2, column=3)
+        self.bind_spinbox(hydration_spinpox, 'hydration', self.hydration)
+
+        tk.Label(root, text="Salt (%)").grid(row=3, column=2, sticky='W', padx=(5, 0))
+        salt_percentage_spinbox = tk.Spinbox(root, from_=0, to=100, textvariable=self.salt, width=10)
+        salt_percentage_spinbox.grid(row=3, column=3)
+        self.bind_spinbox(salt_percentage_spinbox, 'salt', self.salt)
+
+        tk.Label(root, text="Oil (%)").grid(row=3, column=0, sticky='W', padx=(20, 0))
+        oil_percentage_spinbox = tk.Spinbox(root, from_=0, to=100, textvariable=self.oil, width=11)
+        oil_percentage_spinbox.grid(row=3, column=1)
+        self.bind_spinbox(oil_percentage_spinbox, 'oil', self.oil)
+
+        # Fermentation schedule: stages before the cold proof
+        tk.Label(root, text="Schedule").grid(row=4, column=0, sticky='W', padx=(20, 0))
+        self.schedule_dropdown = ttk.Combobox(root, textvariable=self.schedule, state="readonly", width=37)
+        self.schedule_dropdown.grid(row=4, column=1, columnspan=3, sticky='W', padx=(9, 0))
+        self.schedule_dropdown.bind('<<ComboboxSelected>>', lambda _: self.update_schedule())
+
+        # Section 2: Proofing Details
+        tk.Label(root, text="Proofing Details", font=("Helvetica", 16, "bold")).grid(row=5, column=0, columnspan=4,
+                                                                                     sticky='W', padx=(20, 0))
+        tk.Button(root, text="Batches", command=self.show_batches).grid(row=5, column=3, sticky='E')
+
+        # Cold proof temp and hours
+        tk.Label(root, text="Cold Proof Temp (°C)").grid(row=6, column=0, sticky='W', padx=(20, 0))
+        self.cold_proof_temp_entry = ttk.Combobox(root, textvariable=self.cold_proof_temp, state="readonly", width=11)
+        self.cold_proof_temp_entry.grid(row=6, column=1)
+        self.cold_proof_temp_entry.bind('<<ComboboxSelected>>', lambda _: self.update_cold_temp())
+
+        tk.Label(root, text="Cold Proof Hours").grid(row=6, column=2, sticky='W', padx=(5, 0))
+        self.cold_proof_hours_entry = ttk.Combobox(root, textvariable=self.cold_proof_hours, state="readonly",
+                                                   width=11)
+        self.cold_proof_hours_entry.grid(row=6, column=3)
+        self.cold_proof_hours_entry.bind('<<ComboboxSelected>>',
+                                         lambda _: self.general_update('fridge_fermentation', self.cold_proof_hours))
+
+        # Room proof temp and hours
+        tk.Label(root, text="Room Proof Temp (°C)").grid(row=7, column=0, sticky='W', padx=(20, 0))
+        self.room_proof_temp_entry = ttk.Combobox(root, textvariable=self.room_proof_temp, state="readonly", width=11)
+        self.room_proof_temp_entry.grid(row=7, column=1)
+        self.room_proof_temp_entry.bind('<<ComboboxSelected>>', lambda _: self.update_room_temp())
+
+        tk.Label(root, text="Room Proof Hours").grid(row=7, column=2, sticky='W', padx=(5, 0))
+        self.room_proof_hours_entry = ttk.Combobox(root, textvariable=self.room_proof_hours, state="readonly",
+                                                   width=11)
+        self.room_proof_hours_entry.grid(row=7, column=3)
+        self.room_proof_hours_entry.bind('<<ComboboxSelected>>',
+                                         lambda _: self.general_update('room_fermentation', self.room_proof_hours))
+
+        # Section 3: Output Instructions
+        tk.Label(root, text="Ingredients and Proofing Instructions", font=("Helvetica", 16, "bold")).grid(
+            row=8, column=0, columnspan=4, sticky='W', padx=(20, 0))
+
+        self.output_text_widget = tk.Text(root, height=10, width=50, state='disabled')
+        self.output_text_widget.grid(row=9, column=0, columnspan=4, pady=(0, 20), padx=(20, 0))
+
+        self.save_button = tk.Button(root, image=get_icon(Configuration.get_save_icon_path()),
+                                     command=self.save_recipe, bd=1)
+        self.save_button.place(x=415, y=10)
+
+        self.load_button = tk.Button(root, image=get_icon(Configuration.get_load_icon_path()),
+                                     command=self.load_recipe, bd=1)
+        self.load_button.place(x=395, y=10)
+
+        self.status_label = tk.Label(root, text="", fg="gray")
+        self.status_label.place(x=385, y=14, anchor='ne')
+
+    def set_proofing_enabled(self, enabled):
+        """Everything that needs the yeast table: the yeast and proofing inputs, saving and loading."""
+        for combobox in (self.yeast_dropdown, self.schedule_dropdown, self.cold_proof_temp_entry,
+                         self.cold_proof_hours_entry, self.room_proof_temp_entry, self.room_proof_hours_entry):
+            combobox.config(state="readonly" if enabled else "disabled")
+        for button in (self.save_button, self.load_button):
+            button.config(state="normal" if enabled else "disabled")
+
+    def show_table_options(self):
+        """Fill the dropdowns whose options come from the yeast table and config."""
+        self._table_version = PizzaRecipe.table_version()
+        self.yeast_dropdown['values'] = PizzaRecipe.get_yeast_types()
+        self.cold_proof_temp_entry['values'] = get_formatted_temperatures()
+        self.room_proof_temp_entry['values'] = get_formatted_temperatures()
+        self.schedule_dropdown['values'] = list(get_stage_presets())
+
+    def bind_recipe(self, recipe):
+        """Show another recipe in the existing widgets."""
+        self.recipe = recipe
+        self.num_balls.set(recipe.num_balls)
+        self.ball_weight.set(recipe.ball_weight)
+        self.hydration.set(recipe.hydration)
+        self.yeast_type.set(recipe.yeast_type)
+        self.oil.set(recipe.oil)
+        self.salt.set(recipe.salt)
+        if not self.table_ready:
+            self.scheduler.set_recipe(recipe)
+            return
+        self.cold_proof_temp.set(round(recipe.fridge_temp, 1))
+        self.cold_proof_hours.set(int(recipe.fridge_fermentation))
+        self.room_proof_temp.set(round(recipe.room_temp, 1))
+        self.room_proof_hours.set(int(recipe.room_fermentation))
+        self.cold_proof_hours_entry['values'] = get_time_options(recipe.fridge_temp)
+        self.room_proof_hours_entry['values'] = get_time_options(recipe.room_temp)
+        presets = get_stage_presets()
+        self.schedule.set(next((name for name, stages in presets.items() if stages == recipe.pre_stages), "Custom"))
+        self.scheduler.set_recipe(recipe)
+
+    def bind_spinbox(self, spinbox, field_name, variable):
+        spinbox.bind('<KeyRelease>', lambda _: self.scheduler.request(field_name, variable))
+        spinbox.bind('<ButtonRelease>', lambda _: self.scheduler.request(field_name, variable, delay_ms=0))
+
+    def update_output(self):
+        self.scheduler.request(delay_ms=0)
+
+    def update_cold_temp(self):
+        self.recipe.fridge_temp = min(self.recipe.get_temp_range(), key=lambda x: abs(x - self.cold_proof_temp.get()))
+        self.cold_proof_hours_entry['values'] = get_time_options(self.recipe.fridge_temp)
+        self.update_output()
+
+    def update_room_temp(self):
+        self.recipe.room_temp = min(self.recipe.get_temp_range(), key=lambda x: abs(x - self.room_proof_temp.get()))
+        self.room_proof_hours_entry['values'] = get_time_options(self.recipe.room_temp)
+        self.update_output()
+
+    def update_schedule(self):
+        stages = get_stage_presets().get(self.schedule.get())
+        if stages is not None:
+            self.recipe.pre_stages = stages
+            self.update_output()
+
+    def general_update(self, attribute, value):
+        self.scheduler.request(attribute, value, delay_ms=0)
+
+    def start_batch_scheduler(self):
+        """Resume the persisted dough batches and wake for their next due stage; announce due ones here."""
+        self.batch_scheduler = DoughScheduler.default()
+        self.batch_scheduler.add_listener(self.on_batch_event)
+        self.batch_pump = BatchTimerPump(self.root, self.batch_scheduler)
+        self.batch_pump.fire()  # Whatever fell due while the app was closed
+
+    def on_batch_event(self, event, batch):
+        if event in ("due", "overdue") and self.root.winfo_exists():
+            self.status_label.config(text=f"#{batch.id} {event}: {batch.next_name}",
+                                     fg="red" if event == "overdue" else "darkorange")
+
+    def show_batches(self):
+        if self.batch_panel is not None and self.batch_panel.window.winfo_exists():
+            self.batch_panel.window.lift()
+            return
+        self.batch_panel = BatchPanel(self.root, DoughScheduler.default(),
+                                      lambda: self.recipe if self.table_ready else None)
+
+    def load_table(self):
+        """Background thread: load the config and yeast table. Failures are reported to the Tk side."""
+        try:
+            PizzaRecipe.current_snapshot()
+        except Exception as e:
+            logging.error(f"Loading the yeast table failed: {e}")
+            self._table_errors.put(e)
+
+    def on_table_loaded(self):
+        """Swap the draft for a real recipe, keeping the inputs edited while the table loaded."""
+        recipe = PizzaRecipe()
+        try:
+            recipe.update(**self.recipe.inputs())
+        except (ValueError, TypeError):
+            pass  # A half-typed value; keep the defaults
+        self.show_table_options()
+        self.set_proofing_enabled(True)
+        self.status_label.config(text="", fg="gray")
+        self.bind_recipe(recipe)
+
+    def on_table_failed(self, error):
+        """Error state: the mass balance stays live, the yeast output says what went wrong.
+
+        The hot reloader keeps watching config.json and the sheet, so fixing either brings the window to life.
+        """
+        self._table_failed = True
+        self.status_label.config(text="Yeast table unavailable", fg="red")
+        self.recipe.yeast_status = f"unavailable.\n\n{error}\nFix the file or xlsx_yeast_table_path in config.json."
+        self.update_output()
+
+    def watch_table_version(self):
+        """Refresh the options and the output after the hot reloader swapped in a new yeast table."""
+        if not self.root.winfo_exists():
+            return
+        if not self.table_ready:
+            if PizzaRecipe.is_loaded():
+                self.on_table_loaded()
+            while not self._table_errors.empty():
+                self.on_table_failed(self._table_errors.get_nowait())
+            self.root.after(1000 if self.table_ready or self._table_failed else 50,
+                            self.watch_table_version)
+            return
+        version = PizzaRecipe.table_version()
+        if version != self._table_version:
+            global _formatted_temperatures
+            self._table_version = version
+            _formatted_temperatures = None
+            table = PizzaRecipe.current_snapshot().yeast_table
+            with self.recipe.batch():
+                self.recipe.fridge_temp = table.nearest_temperature(self.recipe.fridge_temp)
+                self.recipe.room_temp = table.nearest_temperature(self.recipe.room_temp)
+                self.recipe.pre_stages = [FermentationStage(stage.name, table.nearest_temperature(stage.temp),
+                                                            stage.hours) for stage in self.recipe.pre_stages]
+            self.show_table_options()
+            self.bind_recipe(self.recipe)
+        self.root.after(1000, self.watch_table_version)
+
+    def save_recipe(self):
+        self.status_label.config(text="Saving...")
+        RecipeManager.save_recipe_async(self.recipe, on_done=lambda *result: self._save_results.put(result))
+        if self._save_poll_id is None:
+            self._save_poll_id = self.root.after(50, self.poll_saves)
+
+    def poll_saves(self):
+        """Report finished background saves; polls only while a save is outstanding."""
+        self._save_poll_id = None
+        while not self._save_results.empty():
+            recipe_id, error = self._save_results.get_nowait()
+            if error is not None:
+                self.status_label.config(text="Save failed")
+                messagebox.showerror("Error Saving Recipe", f"An error occurred: {error}")
+            else:
+                self.status_label.config(text=f"Saved #{recipe_id}")
+        if WriteBehindSaver.default().pending_count():
+            self._save_poll_id = self.root.after(50, self.poll_saves)
+
+    def on_close(self):
+        WriteBehindSaver.default().flush(timeout=10)
+        self.root.destroy()
+
+    def load_recipe(self):
+        recipe = RecipeManager.load_recipe()
+        if recipe is not None:
+            self.bind_recipe(recipe)
+
+
 def build_ui(root, pizza_recipe=None):
     clear_ui(root)
-    pzr = PizzaRecipe() if pizza_recipe is None else pizza_recipe
-    formatted_temp = [round(value, 1) for value in pzr.get_temp_range()]  # For display in dropdown
-
-    root.title("Pizza Recipe")
-    root.geometry("440x345")
-
-    num_balls = tk.IntVar(value=pzr.num_balls)
-    ball_weight = tk.IntVar(value=pzr.ball_weight)
-
-    hydration = tk.IntVar(value=pzr.hydration)
-
-    yeast_type = tk.StringVar(value=pzr.yeast_type)
-
-    oil = tk.IntVar(value=pzr.oil)
-    salt = tk.IntVar(value=pzr.salt)
-
-    # Actual temperature variables
-    cold_proof_temp = tk.DoubleVar(value=round(pzr.fridge_temp, 1))
-    cold_proof_hours = tk.IntVar(value=int(pzr.fridge_fermentation))
-    room_proof_temp = tk.DoubleVar(value=round(pzr.room_temp, 1))
-    room_proof_hours = tk.IntVar(value=int(pzr.room_fermentation))
-
-    def get_time_options(temp):
-        return [str(int(value)) for value in sorted(set(pzr.get_hour_range_by_temp(temp)))]
-
-    def bind_spinbox(spinbox, field_name, variable):
-        def on_change():
-            root.after_idle(lambda: general_update(field_name, variable))
-
-        spinbox.bind('<KeyRelease>', lambda _: on_change())
-        spinbox.bind('<ButtonRelease>', lambda _: on_change())
-
-    def update_output():
-        output_text_widget.config(state='normal')
-        output_text_widget.delete(1.0, tk.END)
-        output_text_widget.insert(tk.END, pzr.to_string())
-        output_text_widget.config(state='disabled')
-
-    def update_cold_temp():
-        pzr.fridge_temp = min(pzr.get_temp_range(), key=lambda x: abs(x - cold_proof_temp.get()))
-        # cold_proof_hours_entry['values'] = pzr.get_hour_range_by_temp(pzr.fridge_temp)
-        cold_proof_hours_entry['values'] = get_time_options(pzr.fridge_temp)
-
-        update_output()
-
-    def update_room_temp():
-        pzr.room_temp = min(pzr.get_temp_range(), key=lambda x: abs(x - room_proof_temp.get()))
-        # room_proof_hours_entry['values'] = pzr.get_hour_range_by_temp(pzr.room_temp)
-        room_proof_hours_entry['values'] = get_time_options(pzr.room_temp)
-        update_output()
-
-    def general_update(attribute, value):
-        setattr(pzr, attribute, value.get())
-        update_output()
-
-    def save_recipe():
-        RecipeManager.save_recipe(pzr)
-
-    tk.Label(root, text="Main Recipe Inputs", font=("Helvetica", 16, "bold")).grid(row=0, column=0, columnspan=4,
-                                                                                   sticky='W', padx=(20, 0))
-
-    tk.Label(root, text="Number of Balls").grid(row=1, column=0, sticky='W', padx=(20, 0))
-    balls_dropdown = ttk.Combobox(root, textvariable=num_balls, values=list(range(1, 11)), state="readonly", width=10)
-    balls_dropdown.grid(row=1, column=1)
-    balls_dropdown.bind('<<ComboboxSelected>>', lambda _: general_update('num_balls', num_balls))
-
-    tk.Label(root, text="Ball Weight (g)").grid(row=1, column=2, sticky='W', padx=(5, 0))
-    ball_weight_entry = tk.Entry(root, textvariable=ball_weight, width=12)
-    ball_weight_entry.grid(row=1, column=3)
-    ball_weight_entry.bind('<KeyRelease>', lambda _: general_update('ball_weight', ball_weight))
-
-    # Yeast type dropdown
-    tk.Label(root, text="Yeast Type").grid(row=2, column=0, sticky='W', padx=(20, 0))
-    yeast_dropdown = ttk.Combobox(root, textvariable=yeast_type, values=pzr.get_yeast_types(), state="readonly",
-                                  width=10)
-    yeast_dropdown.grid(row=2, column=1)
-    yeast_dropdown.bind('<<ComboboxSelected>>', lambda _: general_update('yeast_type', yeast_type))
-
-    # Hydration, salt and oil percentage
-    tk.Label(root, text="Hydration (%)").grid(row=2, column=2, sticky='W', padx=(5, 0))
-    hydration_spinpox = tk.Spinbox(root, from_=0, to=100, textvariable=hydration, width=10)
-    hydration_spinpox.grid(row=2, column=3)
-    bind_spinbox(hydration_spinpox, 'hydration', hydration)
-
-    tk.Label(root, text="Salt (%)").grid(row=3, column=2, sticky='W', padx=(5, 0))
-    salt_percentage_spinbox = tk.Spinbox(root, from_=0, to=100, textvariable=salt, width=10)
-    salt_percentage_spinbox.grid(row=3, column=3)
-    bind_spinbox(salt_percentage_spinbox, 'salt', salt)
-
-    tk.Label(root, text="Oil (%)").grid(row=3, column=0, sticky='W', padx=(20, 0))
-    oil_percentage_spinbox = tk.Spinbox(root, from_=0, to=100, textvariable=oil, width=11)
-    oil_percentage_spinbox.grid(row=3, column=1)
-    bind_spinbox(oil_percentage_spinbox, 'oil', oil)
-
-    # Section 2: Proofing Details
-    tk.Label(root, text="Proofing Details", font=("Helvetica", 16, "bold")).grid(row=5, column=0, columnspan=4,
-                                                                                 sticky='W', padx=(20, 0))
-
-    # Cold proof temp and hours
-    tk.Label(root, text="Cold Proof Temp (°C)").grid(row=6, column=0, sticky='W', padx=(20, 0))
-    cold_proof_temp_entry = ttk.Combobox(root, textvariable=cold_proof_temp, values=formatted_temp, state="readonly",
-                                         width=11)
-    cold_proof_temp_entry.grid(row=6, column=1)
-    cold_proof_temp_entry.bind('<<ComboboxSelected>>', lambda _: update_cold_temp())
-
-    tk.Label(root, text="Cold Proof Hours").grid(row=6, column=2, sticky='W', padx=(5, 0))
-    # cold_proof_hours_entry = ttk.Combobox(root, textvariable=cold_proof_hours,
-    #                                       values=pzr.get_hour_range_by_temp(pzr.fridge_temp), state="readonly",
-    #                                       width=11)
-    cold_proof_hours_entry = ttk.Combobox(root, textvariable=cold_proof_hours,
-                                          values=get_time_options(pzr.fridge_temp),
-                                          state="readonly", width=11)
-    cold_proof_hours_entry.grid(row=6, column=3)
-    cold_proof_hours_entry.bind('<<ComboboxSelected>>',
-                                lambda _: general_update('fridge_fermentation', cold_proof_hours))
-
-    # Room proof temp and hours
-    tk.Label(root, text="Room Proof Temp (°C)").grid(row=7, column=0, sticky='W', padx=(20, 0))
-    room_proof_temp_entry = ttk.Combobox(root, textvariable=room_proof_temp, values=formatted_temp, state="readonly",
-                                         width=11)
-    room_proof_temp_entry.grid(row=7, column=1)
-    room_proof_temp_entry.bind('<<ComboboxSelected>>', lambda _: update_room_temp())
-
-    tk.Label(root, text="Room Proof Hours").grid(row=7, column=2, sticky='W', padx=(5, 0))
-    # room_proof_hours_entry = ttk.Combobox(root, textvariable=room_proof_hours, values=pzr.get_hour_range_by_temp(
-    # pzr.room_temp), state="readonly", width=11)
-    room_proof_hours_entry = ttk.Combobox(root, textvariable=room_proof_hours,
-                                          values=get_time_options(pzr.room_temp), state="readonly", width=11)
-    room_proof_hours_entry.grid(row=7, column=3)
-    room_proof_hours_entry.bind('<<ComboboxSelected>>',
-                                lambda _: general_update('room_fermentation', room_proof_hours))
-
-    # Section 3: Output Instructions
-    tk.Label(root, text="Ingredients and Proofing Instructions", font=("Helvetica", 16, "bold")).grid(row=8, column=0,
-                                                                                                      columnspan=4,
-                                                                                                      sticky='W',
-                                                                                                      padx=(20, 0))
-
-    output_text_widget = tk.Text(root, height=8, width=50, state='disabled')
-    output_text_widget.grid(row=9, column=0, columnspan=4, pady=(0, 20), padx=(20, 0))
-    output_text_widget.config(state='normal')
-    output_text_widget.delete(1.0, tk.END)
-    output_text_widget.insert(tk.END, pzr.to_string())
-    output_text_widget.config(state='disabled')
-
-    save_icon = PhotoImage(file=Configuration.get_save_icon_path())
-    save_button = tk.Button(root, image=save_icon, command=save_recipe, bd=1)
-    save_button.place(x=415, y=10)
-    save_button.image = save_icon
-
-    load_icon = PhotoImage(file=Configuration.get_load_icon_path())
-    load_button = tk.Button(root, image=load_icon, command=lambda: load_recipe(root), bd=1)
-    load_button.place(x=395, y=10)
-    load_button.image = load_icon
-
-    return root
+    return RecipeView(root, pizza_recipe)
@@ -0,0 +1,145 @@
+# write_behind.py
+
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+def atomic_write_json(path, data):
+    """Write JSON so that path holds either the old or the new content, even after a crash."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as file:
+            json.dump(data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return  # Directories cannot be opened on every platform; the rename itself is still atomic
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+class WriteBehindSaver:
+    """Runs save operations on a background thread.
+
+    Saves submitted with the same key within coalesce_s of each other are merged: only the latest
+    operation runs, and every submitter's on_done(result, error) callback is called with its outcome.
+    Callbacks run on the writer thread.
+    """
+    _default = None
+
+    def __init__(self, coalesce_s=0.3):
+        self.coalesce_s = coalesce_s
+        self._pending = OrderedDict()  # key -> (operation, callbacks, first submit time)
+        self._condition = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def default(cls):
+        """Process-wide saver, flushed automatically at interpreter exit."""
+        if cls._default is None:
+            cls._default = cls()
+            atexit.register(cls._default.close)
+        return cls._default
+
+    def submit(self, operation, key=None, on_done=None):
+        """Queue operation() to run on the writer thread."""
+        key = object() if key is None else key
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("WriteBehindSaver is closed.")
+            # Replacing an existing key keeps its queue position and coalescing deadline
+            _, callbacks, submitted = self._pending.get(key, (None, [], time.monotonic()))
+            if on_done is not None:
+                callbacks.append(on_done)
+            self._pending[key] = (operation, callbacks, submitted)
+            self._condition.notify()
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending) + (1 if self._busy else 0)
+
+    def _next_due(self):
+        """Pop the oldest entry once its coalescing window has passed, waiting as needed."""
+        with self._condition:
+            while True:
+                if self._pending:
+                    key = next(iter(self._pending))
+                    wait = self._pending[key][2] + self.coalesce_s - time.monotonic()
+                    if wait <= 0 or self._closed:
+                        self._busy = True
+                        return self._pending.pop(key)
+                    self._condition.wait(wait)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            entry = self._next_due()
+            if entry is None:
+                return
+            operation, callbacks, _ = entry
+            result = error = None
+            try:
+                result = operation()
+            except Exception as e:
+                error = e
+                logging.error(f"Background save failed: {e}")
+            for callback in callbacks:
+                try:
+                    callback(result, error)
+                except Exception as e:
+                    logging.error(f"Save completion callback failed: {e}")
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Block until every queued save has been written, skipping the coalescing delay."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            saved_delay, self.coalesce_s = self.coalesce_s, 0
+            self._condition.notify_all()
+            try:
+                while self._pending or self._busy:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+                return True
+            finally:
+                self.coalesce_s = saved_delay
+
+    def close(self, timeout=None):
+        """Write everything still queued, then stop the writer thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
@@ -0,0 +1,137 @@
+# yeast_cache.py
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+from write_behind import atomic_write_json
+
+CACHE_FORMAT_VERSION = 1
+
+
+class YeastTableCache:
+    """Compiled .npy sidecar of the yeast spreadsheet, so warm starts skip the xlsx parser."""
+
+    @staticmethod
+    def meta_path(cache_path):
+        return Path(cache_path).with_suffix('.json')
+
+    @staticmethod
+    def file_hash(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 16), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def parse_xlsx(xlsx_path):
+        import pandas as pd  # Only needed when the sidecar is missing or stale
+
+        yeast_data = pd.read_excel(xlsx_path, header=None)
+        # Text cells (headers, units) become NaN; every lookup only reads numeric cells
+        return yeast_data.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+
+    @classmethod
+    def read_meta(cls, cache_path):
+        try:
+            with open(cls.meta_path(cache_path), 'r') as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    @classmethod
+    def write_meta(cls, cache_path, meta):
+        atomic_write_json(cls.meta_path(cache_path), meta)
+
+    @staticmethod
+    def write_array(cache_path, table):
+        """np.save through a temp file of our own, so processes rebuilding at the same time never share one."""
+        fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, prefix=f".{cache_path.stem}.", suffix=".tmp.npy")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                np.save(file, table)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def is_fresh(cls, xlsx_path, cache_path):
+        """Return True if the sidecar still matches the spreadsheet, refreshing its mtime key if only that moved."""
+        meta = cls.read_meta(cache_path)
+        if meta is None or meta.get('format') != CACHE_FORMAT_VERSION or not Path(cache_path).exists():
+            return False
+        if meta.get('source') != str(Path(xlsx_path).resolve()):
+            return False
+
+        stat = Path(xlsx_path).stat()
+        if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+            return True
+
+        # The file was touched (copy, checkout) but may be byte-identical
+        if meta.get('size') == stat.st_size and meta.get('sha256') == cls.file_hash(xlsx_path):
+            meta['mtime_ns'] = stat.st_mtime_ns
+            try:
+                cls.write_meta(cache_path, meta)
+            except OSError:
+                pass
+            return True
+        return False
+
+    @classmethod
+    def rebuild(cls, xlsx_path, cache_path):
+        """Parse the spreadsheet and (re)write the sidecar. Returns the parsed table."""
+        xlsx_path = Path(xlsx_path).resolve()
+        cache_path = Path(cache_path).resolve()
+        table = cls.parse_xlsx(xlsx_path)
+        stat = xlsx_path.stat()
+
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cls.write_array(cache_path, table)
+            cls.write_meta(cache_path, {
+                "format": CACHE_FORMAT_VERSION,
+                "source": str(xlsx_path),
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": cls.file_hash(xlsx_path),
+                "shape": list(table.shape)
+            })
+            logging.info(f"Yeast table cache written to {cache_path}.")
+        except OSError as e:
+            logging.warning(f"Failed to write yeast table cache: {e}")
+        return table
+
+    @classmethod
+    def load(cls, xlsx_path, cache_path):
+        """Return the yeast table as a float array, memory-mapped from the sidecar when it is fresh."""
+        if cls.is_fresh(xlsx_path, cache_path):
+            try:
+                return np.load(cache_path, mmap_mode='r')
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable yeast table cache: {e}")
+        return cls.rebuild(xlsx_path, cache_path)
+
+
+if __name__ == "__main__":
+    from config import Configuration, configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Manage the compiled yeast table cache.")
+    parser.add_argument('--rebuild', action='store_true', help="rebuild the cache even if it is fresh")
+    args = parser.parse_args()
+
+    xlsx = Configuration.get_yeast_table_path()
+    cache = Configuration.get_yeast_cache_path()
+    if args.rebuild or not YeastTableCache.is_fresh(xlsx, cache):
+        YeastTableCache.rebuild(xlsx, cache)
+    else:
+        print(f"Yeast table cache at {cache} is up to date.")
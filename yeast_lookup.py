@@ -0,0 +1,224 @@
+# yeast_lookup.py
+#
+# Dense, precomputed yeast percentages for every cold + room proof the sheet offers:
+#   python yeast_lookup.py build --workers 8    # enumerate the whole domain into data/yeast_lookup.npy
+#   python yeast_lookup.py verify               # prove the artifact matches the live table lookups
+# With "yeast_lookup": true in config.json, PizzaRecipe answers those lookups by indexing into the artifact.
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+import numpy as np
+from write_behind import atomic_write_json
+from yeast_cache import YeastTableCache
+from yeast_table import quantize_temp
+
+LOOKUP_FORMAT_VERSION = 1
+MAX_REPORTED_MISMATCHES = 10
+
+
+def table_hash(table):
+    """Fingerprint of everything the lookups depend on; an artifact is only used with a table that matches it."""
+    digest = hashlib.sha256(np.ascontiguousarray(table.data, dtype=np.float64).tobytes())
+    digest.update(json.dumps([list(table.yeast_types), list(table.temperature_options)]).encode())
+    return digest.hexdigest()
+
+
+def lookup_domain(table):
+    """The distinct table rows (by their first temperature option) and the sorted distinct hours of each.
+
+    Snapped fermentation hours are always one of these values, so they index the artifact exactly.
+    """
+    temps, rows = [], []
+    for temp in table.temperature_options:
+        row = table.find_row(temp)
+        if row not in rows:
+            rows.append(row)
+            temps.append(temp)
+    hours = [sorted(set(table.hour_range(temp))) for temp in temps]
+    return {"temperatures": temps, "rows": rows, "hours": hours, "yeast_types": list(table.yeast_types)}
+
+
+class YeastLookup:
+    """Memory-mapped percentages indexed [yeast type, fridge temp, fridge hours, room temp, room hours].
+
+    Combinations the live lookup rejects, and the padding of rows with fewer hour values, hold NaN.
+    """
+
+    def __init__(self, path, array, meta):
+        self.path = str(path)
+        self.array = array
+        self.meta = meta
+        self._type_index = {name: i for i, name in enumerate(meta["yeast_types"])}
+        self._temp_index = {quantize_temp(temp): i for i, temp in enumerate(meta["temperatures"])}
+        self._hour_index = [{hour: i for i, hour in enumerate(hours)} for hours in meta["hours"]]
+
+    @staticmethod
+    def meta_path(path):
+        return Path(path).with_suffix('.json')
+
+    @classmethod
+    def load(cls, path, table):
+        """The artifact at path if it was built from this table, else None (logged, so callers fall back)."""
+        try:
+            with open(cls.meta_path(path), 'r') as file:
+                meta = json.load(file)
+            array = np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logging.warning(f"Yeast lookup artifact unavailable, using the live table: {e}")
+            return None
+        if meta.get("format") != LOOKUP_FORMAT_VERSION or meta.get("table_hash") != table_hash(table):
+            logging.warning(f"Yeast lookup artifact {path} does not match the yeast table; rebuild it.")
+            return None
+        # Temperature options that share a row (same quantized value) reuse its slice
+        lookup = cls(path, array, meta)
+        for temp in table.temperature_options:
+            row = table.find_row(temp)
+            lookup._temp_index.setdefault(quantize_temp(temp), meta["rows"].index(row))
+        return lookup
+
+    def percentage(self, yeast_type, fridge_temp, fridge_hours, room_temp, room_hours):
+        """Percentage for snapped inputs, or None when the artifact has no answer (unknown value or rejected)."""
+        try:
+            fridge = self._temp_index[quantize_temp(fridge_temp)]
+            room = self._temp_index[quantize_temp(room_temp)]
+            value = self.array[self._type_index[yeast_type], fridge, self._hour_index[fridge][fridge_hours],
+                               room, self._hour_index[room][room_hours]]
+        except KeyError:
+            return None
+        return None if value != value else float(value)
+
+
+# Build and verify; the work is split by fridge temperature across a process pool
+
+def _worker_table(expected_hash):
+    from recipe import PizzaRecipe
+    table = PizzaRecipe.current_snapshot().yeast_table
+    if table_hash(table) != expected_hash:
+        raise RuntimeError("The yeast table changed while the lookup was being built or verified; run it again.")
+    return table
+
+
+def build_slice(fridge, domain, expected_hash):
+    """Percentages [yeast type, fridge hours, room temp, room hours] for one fridge temperature."""
+    table = _worker_table(expected_hash)
+    rows, hours = domain["rows"], domain["hours"]
+    width = max(map(len, hours))
+    data = table.data
+
+    room_cols = np.full((len(rows), width), -1, dtype=np.int64)
+    for room, row in enumerate(rows):
+        for i, room_hours in enumerate(hours[room]):
+            try:
+                room_cols[room, i] = table.room_column(row, room_hours)
+            except IndexError:
+                pass  # The live lookup rejects this room proof too; left as NaN
+    valid = room_cols >= 0
+
+    fridge_row = rows[fridge]
+    type_rows = table.yeast_type_indexes(domain["yeast_types"])
+    result = np.full((len(type_rows), width, len(rows), width), np.nan)
+    cols = room_cols[valid]
+    for i, fridge_hours in enumerate(hours[fridge]):
+        combined = data[fridge_row, cols] + fridge_hours
+        fridge_cols = table.fridge_columns(np.full(len(cols), fridge_row), combined)
+        result[:, i][:, valid] = data[type_rows[:, None], fridge_cols[None, :]]
+    return result
+
+
+def verify_slice(fridge, path, expected_hash):
+    """(checked, mismatch count, first mismatches) for one fridge temperature, against yeast_percentage_chain."""
+    table = _worker_table(expected_hash)
+    lookup = YeastLookup.load(path, table)
+    if lookup is None:
+        raise RuntimeError(f"{path} is missing or was built from another yeast table.")
+    meta = lookup.meta
+    fridge_temp = meta["temperatures"][fridge]
+    checked, count, examples = 0, 0, []
+    for yeast_type in meta["yeast_types"]:
+        for fridge_hours in meta["hours"][fridge]:
+            for room_temp, room_hours_list in zip(meta["temperatures"], meta["hours"]):
+                for room_hours in room_hours_list:
+                    try:
+                        live = table.yeast_percentage_chain(
+                            yeast_type, [(fridge_temp, fridge_hours), (room_temp, room_hours)])
+                    except (IndexError, ValueError):
+                        live = None
+                    stored = lookup.percentage(yeast_type, fridge_temp, fridge_hours, room_temp, room_hours)
+                    checked += 1
+                    if stored != live:
+                        count += 1
+                        if len(examples) < MAX_REPORTED_MISMATCHES:
+                            examples.append((yeast_type, fridge_temp, fridge_hours, room_temp, room_hours,
+                                             stored, live))
+    return checked, count, examples
+
+
+def _map_fridge_slices(func, count, args, workers):
+    """func(fridge, *args) for every fridge temperature, in order; in this process when workers <= 1."""
+    if workers <= 1:
+        return [func(fridge, *args) for fridge in range(count)]
+    from concurrent.futures import ProcessPoolExecutor
+    from shared_table import worker_pool_setup
+    initializer, initargs = worker_pool_setup()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        return list(executor.map(func, range(count), *[[arg] * count for arg in args]))
+
+
+def build(path, workers=None):
+    """Enumerate every yeast type and cold + room proof of the current table into the artifact at path."""
+    from recipe import PizzaRecipe
+    table = PizzaRecipe.current_snapshot().yeast_table
+    domain = lookup_domain(table)
+    expected_hash = table_hash(table)
+    workers = workers or os.cpu_count() or 1
+
+    slices = _map_fridge_slices(build_slice, len(domain["rows"]), (domain, expected_hash), workers)
+    array = np.stack(slices, axis=1)
+
+    path = Path(path).resolve()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {"format": LOOKUP_FORMAT_VERSION, "table_hash": expected_hash, "shape": list(array.shape), **domain}
+    # The meta goes last: a reader that sees the new hash also sees the new array
+    YeastTableCache.write_array(path, array)
+    atomic_write_json(YeastLookup.meta_path(path), meta)
+    logging.info(f"Yeast lookup written to {path} ({array.nbytes} bytes, shape {array.shape}).")
+    return array.shape
+
+
+def verify(path, workers=None):
+    """(checked, mismatch count, first mismatches) over the whole domain."""
+    from recipe import PizzaRecipe
+    table = PizzaRecipe.current_snapshot().yeast_table
+    if YeastLookup.load(path, table) is None:
+        raise RuntimeError(f"{path} is missing or was built from another yeast table.")
+    workers = workers or os.cpu_count() or 1
+    results = _map_fridge_slices(verify_slice, len(lookup_domain(table)["rows"]),
+                                 (str(Path(path).resolve()), table_hash(table)), workers)
+    examples = [example for _, _, found in results for example in found]
+    return sum(r[0] for r in results), sum(r[1] for r in results), examples[:MAX_REPORTED_MISMATCHES]
+
+
+if __name__ == "__main__":
+    from config import Configuration, configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Build or verify the precomputed yeast lookup artifact.")
+    parser.add_argument('command', choices=('build', 'verify'))
+    parser.add_argument('--path', default=str(Configuration.get_yeast_lookup_path()))
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        shape = build(args.path, args.workers)
+        print(f"Built {args.path} with shape {shape}")
+    else:
+        checked, count, examples = verify(args.path, args.workers)
+        for example in examples:
+            print("Mismatch (type, fridge temp, hours, room temp, hours, artifact, live):", example)
+        print(f"Checked {checked} lookups: {count} mismatches")
+        sys.exit(1 if count else 0)
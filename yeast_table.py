@@ -0,0 +1,306 @@
+# yeast_table.py
+
+from bisect import bisect_left
+import numpy as np
+
+FIRST_LOOKUP_COLUMN = 2  # Columns 0 and 1 hold the °C / °F labels of each row
+# Everything a table needs that is a plain array; the per-row indexes are views or small lists derived from these
+ARRAY_ATTRIBUTES = ('_data', '_pad_hours', '_pad_values', '_pad_first', '_pad_last', '_pad_first_valid',
+                    '_options_array', '_option_rows')
+
+
+def quantize_temp(temp):
+    return round(float(temp), 6)
+
+
+class YeastTable:
+    """Array-backed view of the yeast sheet with per-row lookup indexes.
+
+    Lookups reproduce the column-selection rules of the original pandas scans exactly:
+    the room column is the last one at the closest hour value, the fridge column the first.
+    """
+
+    def __init__(self, data, xlsx_params, yeast_types):
+        self._data = np.ascontiguousarray(data, dtype=np.float64)
+        self._yeast_types = list(yeast_types)
+        self._row_l = xlsx_params['temp_row_range_l']
+        row_r = xlsx_params['temp_row_range_r']
+        offset = xlsx_params['temp_row_range_offset']
+        s_index = xlsx_params['start_hour_index']
+        e_index = xlsx_params['end_hour_index']
+
+        temps = self._data[self._row_l:row_r, offset]
+        self._temperature_options = [float(t) for t in temps[~np.isnan(temps)]]
+        self._build_row_index()
+
+        self._hour_ranges = {}
+        self._hour_vectors = {}
+        self._sorted_hours = {}
+        self._snap_indexes = {}
+        for row in set(self._row_index.values()):
+            hours = self._data[row, s_index:e_index]
+            hours = hours[~np.isnan(hours) & (hours != 0)]
+            self._hour_ranges[row] = hours.tolist()
+            self._hour_vectors[row] = hours
+            self._snap_indexes[row] = self._build_snap_index(self._hour_ranges[row])
+            self._sorted_hours[row] = self._build_sorted_columns(self._data[row])
+
+        self._build_padded_indexes()
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        """Rebuild a table around the arrays of to_arrays() without copying them, e.g. views into shared memory.
+
+        Only the small per-row lists are rebuilt; the data and the padded lookup indexes are used as given.
+        """
+        table = cls.__new__(cls)
+        for name in ARRAY_ATTRIBUTES:
+            setattr(table, name, arrays[name])
+        table._yeast_types = list(meta['yeast_types'])
+        table._row_l = meta['row_l']
+        table._temperature_options = table._options_array.tolist()
+        table._build_row_index()
+
+        table._hour_ranges = {}
+        table._hour_vectors = {}
+        table._sorted_hours = {}
+        table._snap_indexes = {}
+        for row in set(table._row_index.values()):
+            hours = table._pad_hours[row, :np.count_nonzero(~np.isnan(table._pad_hours[row]))]
+            table._hour_ranges[row] = hours.tolist()
+            table._hour_vectors[row] = hours
+            table._snap_indexes[row] = cls._build_snap_index(table._hour_ranges[row])
+            count = np.count_nonzero(np.isfinite(table._pad_values[row]))
+            first_valid = int(table._pad_first_valid[row])
+            table._sorted_hours[row] = (table._pad_values[row, :count], table._pad_first[row, :count],
+                                        table._pad_last[row, :count], None if first_valid < 0 else first_valid)
+        return table
+
+    def to_arrays(self):
+        """The table's arrays and the metadata from_arrays needs to rebuild it around them."""
+        return ({name: getattr(self, name) for name in ARRAY_ATTRIBUTES},
+                {'yeast_types': list(self._yeast_types), 'row_l': self._row_l})
+
+    def _build_row_index(self):
+        self._row_index = {}
+        for i, temp in enumerate(self._temperature_options):
+            self._row_index.setdefault(quantize_temp(temp), self._row_l + i)
+
+    def _build_padded_indexes(self):
+        """Stack the per-row indexes into NaN/inf padded 2-D arrays, indexed by table row, for batch lookups."""
+        n_rows = self._data.shape[0]
+        width = self._data.shape[1]
+        self._options_array = np.array(self._temperature_options, dtype=np.float64)
+        self._option_rows = self._row_l + np.arange(len(self._temperature_options))
+        self._pad_hours = np.full((n_rows, width), np.nan)
+        self._pad_values = np.full((n_rows, width), np.inf)
+        self._pad_first = np.zeros((n_rows, width), dtype=np.int64)
+        self._pad_last = np.zeros((n_rows, width), dtype=np.int64)
+        self._pad_first_valid = np.zeros(n_rows, dtype=np.int64)
+        for row, hours in self._hour_vectors.items():
+            self._pad_hours[row, :len(hours)] = hours
+            values, first_col, last_col, first_valid = self._sorted_hours[row]
+            self._pad_values[row, :len(values)] = values
+            self._pad_first[row, :len(values)] = first_col
+            self._pad_last[row, :len(values)] = last_col
+            self._pad_first_valid[row] = -1 if first_valid is None else first_valid
+
+    @staticmethod
+    def _build_snap_index(hours):
+        """Distinct selectable hours in ascending order, with the position each first appears at in the list."""
+        first_position = {}
+        for i, value in enumerate(hours):
+            first_position.setdefault(value, i)
+        values = sorted(first_position)
+        return values, [first_position[value] for value in values]
+
+    @staticmethod
+    def _build_sorted_columns(row):
+        """Distinct hour values of a row in ascending order, with the first and last column holding each."""
+        cols = np.flatnonzero(~np.isnan(row[FIRST_LOOKUP_COLUMN:])) + FIRST_LOOKUP_COLUMN
+        values, inverse = np.unique(row[cols], return_inverse=True)
+        first_col = np.full(len(values), np.iinfo(np.int64).max, dtype=np.int64)
+        last_col = np.full(len(values), -1, dtype=np.int64)
+        np.minimum.at(first_col, inverse, cols)
+        np.maximum.at(last_col, inverse, cols)
+        return values, first_col, last_col, cols[0] if len(cols) else None
+
+    @staticmethod
+    def _nearest(values, target):
+        """Indices into the sorted distinct values that are closest to target (one, or two on an exact tie)."""
+        pos = int(np.searchsorted(values, target))
+        candidates = [i for i in (pos - 1, pos) if 0 <= i < len(values)]
+        diffs = [abs(values[i] - target) for i in candidates]
+        best = min(diffs)
+        return [i for i, d in zip(candidates, diffs) if d == best], best
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def temperature_options(self):
+        return self._temperature_options
+
+    @property
+    def yeast_types(self):
+        return self._yeast_types
+
+    def find_row(self, temp):
+        return self._row_index.get(quantize_temp(temp))
+
+    def hour_range(self, temp):
+        row = self.find_row(temp)
+        if row is None:
+            print(f"{temp} is not in the list.")
+            row = self._row_l
+        return list(self._hour_ranges.get(row, []))
+
+    def snap_hours(self, temp, hours):
+        """Nearest selectable hour value for temp; ties go to the value listed first."""
+        row = self.find_row(temp)
+        if row is None:
+            print(f"{temp} is not in the list.")
+            row = self._row_l
+        values, first_position = self._snap_indexes[row]
+        if hours != hours:  # NaN matches nothing; the scan kept the first value
+            return float(self._hour_ranges[row][0])
+        pos = bisect_left(values, hours)
+        if pos == 0:
+            return float(values[0])
+        if pos == len(values):
+            return float(values[-1])
+        below, above = values[pos - 1], values[pos]
+        diff_below, diff_above = hours - below, above - hours
+        if diff_below == diff_above:
+            return float(below if first_position[pos - 1] < first_position[pos] else above)
+        return float(below if diff_below < diff_above else above)
+
+    def room_column(self, row, hours):
+        data_row = self._data[row]
+        values, _, last_col, _ = self._sorted_hours[row]
+        label_diff = np.nanmin(np.abs(data_row[:FIRST_LOOKUP_COLUMN] - hours))
+        if len(values) == 0:
+            raise IndexError(f"No hour values in row {row}.")
+        nearest, best = self._nearest(values, hours)
+        if label_diff < best:
+            # A label cell is closer than every hour cell; the original scan found no column either
+            raise IndexError(f"No hour column close to {hours} in row {row}.")
+        return int(max(last_col[i] for i in nearest))
+
+    def fridge_column(self, row, hours):
+        values, first_col, _, first_valid = self._sorted_hours[row]
+        if first_valid is None:
+            raise ValueError(f"No hour values in row {row}.")
+        if np.isnan(hours):
+            return int(first_valid)
+        nearest, _ = self._nearest(values, hours)
+        return int(min(first_col[i] for i in nearest))
+
+    def yeast_percentage(self, yeast_type, room_temp, room_hours, fridge_temp, fridge_hours):
+        return self.yeast_percentage_chain(yeast_type, [(fridge_temp, fridge_hours), (room_temp, room_hours)])
+
+    def yeast_percentage_chain(self, yeast_type, stages):
+        """Yeast percentage for fermentation stages given in order as (temperature, hours); the last one ends at baking.
+
+        The last stage picks the column (i.e. yeast level) whose hours match at its temperature. Working
+        backwards, each earlier stage adds its hours to the time that column needs at that stage's temperature
+        (the equivalent elapsed hours) and moves to the column matching the sum. Two stages are the original
+        fridge-then-room lookup.
+        """
+        rows = [self.find_row(temp) for temp, _ in stages]
+        if any(row is None for row in rows):
+            temps = " or ".join(str(temp) for temp, _ in stages)
+            raise ValueError(f"{temps} is not in the list of temperature options.")
+
+        col = self.room_column(rows[-1], stages[-1][1])
+        for row, (_, hours) in zip(reversed(rows[:-1]), reversed(stages[:-1])):
+            col = self.fridge_column(row, self._data[row, col] + hours)
+        return float(self._data[self._yeast_types.index(yeast_type), col])
+
+    def nearest_temperature(self, temp):
+        """The temperature option closest to temp (the first one on ties)."""
+        row = self.find_row(temp)
+        if row is not None:
+            return self._temperature_options[row - self._row_l]
+        return self._temperature_options[int(np.argmin(np.abs(self._options_array - float(temp))))]
+
+    def check_temperatures(self, temps):
+        """Raise ValueError for the first temperature outside the range of options; those inside can be snapped."""
+        temps = np.asarray(temps, dtype=np.float64).reshape(-1)
+        low, high = min(self._temperature_options), max(self._temperature_options)
+        outside = ~((temps >= low) & (temps <= high))  # NaN is outside too
+        if outside.any():
+            raise ValueError(f"{temps[np.argmax(outside)].item()} is outside the temperature range {low} to {high}.")
+
+    # Batch lookups: the same rules as above, applied to whole columns at once
+
+    def nearest_rows(self, temps):
+        """Table rows of the temperature options closest to each temp (first option on ties)."""
+        temps = np.asarray(temps, dtype=np.float64)
+        diffs = np.abs(self._options_array[None, :] - temps[:, None])
+        return self._option_rows[np.argmin(diffs, axis=1)]
+
+    def yeast_type_indexes(self, yeast_types):
+        names, inverse = np.unique(np.asarray(yeast_types, dtype=str), return_inverse=True)
+        try:
+            lookup = np.array([self._yeast_types.index(name) for name in names], dtype=np.int64)
+        except ValueError:
+            raise ValueError(f"Unknown yeast type in {names.tolist()}; expected one of {self._yeast_types}.")
+        return lookup[inverse.reshape(-1)]
+
+    def snap_hours_many(self, rows, hours):
+        hours = np.asarray(hours, dtype=np.float64)
+        diffs = np.abs(self._pad_hours[rows] - hours[:, None])
+        diffs[np.isnan(diffs)] = np.inf
+        return self._pad_hours[rows, np.argmin(diffs, axis=1)]
+
+    def _nearest_many(self, rows, targets):
+        """Vectorized searchsorted over each row's sorted distinct values; returns the two neighbours' state."""
+        values = self._pad_values[rows]
+        pos = np.sum(values < targets[:, None], axis=1)
+        last = values.shape[1] - 1
+        lo = np.clip(pos - 1, 0, last)
+        hi = np.clip(pos, 0, last)
+        take = np.arange(len(rows))
+        d_lo = np.where(pos > 0, np.abs(values[take, lo] - targets), np.inf)
+        d_hi = np.abs(values[take, hi] - targets)
+        d_hi[np.isinf(values[take, hi])] = np.inf
+        return lo, hi, d_lo, d_hi, np.minimum(d_lo, d_hi)
+
+    def room_columns(self, rows, hours):
+        hours = np.asarray(hours, dtype=np.float64)
+        take = np.arange(len(rows))
+        lo, hi, d_lo, d_hi, best = self._nearest_many(rows, hours)
+        with np.errstate(invalid='ignore'):
+            label_diff = np.nanmin(np.abs(self._data[rows, :FIRST_LOOKUP_COLUMN] - hours[:, None]), axis=1)
+        bad = label_diff < best
+        if np.any(bad):
+            i = int(np.flatnonzero(bad)[0])
+            raise IndexError(f"No hour column close to {hours[i]} in row {rows[i]}.")
+        last = self._pad_last[rows]
+        col_lo = np.where(d_lo == best, last[take, lo], -1)
+        col_hi = np.where(d_hi == best, last[take, hi], -1)
+        return np.maximum(col_lo, col_hi)
+
+    def fridge_columns(self, rows, hours):
+        hours = np.asarray(hours, dtype=np.float64)
+        take = np.arange(len(rows))
+        missing = np.isnan(hours)
+        lo, hi, d_lo, d_hi, best = self._nearest_many(rows, np.where(missing, 0.0, hours))
+        first = self._pad_first[rows]
+        big = np.iinfo(np.int64).max
+        col_lo = np.where(d_lo == best, first[take, lo], big)
+        col_hi = np.where(d_hi == best, first[take, hi], big)
+        return np.where(missing, self._pad_first_valid[rows], np.minimum(col_lo, col_hi))
+
+    def yeast_percentages(self, type_indexes, room_rows, room_hours, fridge_rows, fridge_hours, pre_stages=()):
+        """pre_stages: (rows, hours, active) arrays for stages before the cold proof, latest first. Rows where
+        active is False have fewer stages and skip that one (their rows/hours entries are ignored)."""
+        col = self.room_columns(room_rows, room_hours)
+        for rows, hours, active in [(fridge_rows, fridge_hours, None), *pre_stages]:
+            # One vectorized lookup per stage in the precomputed per-row sorted hour index
+            combined = self._data[rows, col] + np.asarray(hours, dtype=np.float64)
+            stage_col = self.fridge_columns(rows, combined)
+            col = stage_col if active is None else np.where(active, stage_col, col)
+        return self._data[type_indexes, col]